@@ -1,11 +1,13 @@
 import itertools
-from typing import Iterator
+from typing import Iterator, Tuple, List
 
 from suitebot.ai.bot_ai import BotAi
+from suitebot.ai.deadline import Deadline
+from suitebot.ai.endgame import EndgameSolver
+from suitebot.ai.turn_context import TurnContext
 from suitebot.game.direction import ALL_DIRECTIONS, UP, DOWN, LEFT, RIGHT
-from suitebot.game.game_state import GameState
+from suitebot.game.game_state import GameState, FREE
 from suitebot.game.move import Move
-from suitebot.game.point import Point
 
 BOT_NAME = 'Airbot'
 
@@ -27,15 +29,39 @@ DETOUR_DOUBLE_MOVES = tuple([Move(d1, d2) for (d1, d2) in
 NOOK_PENALTY = -100
 COLLISION_PENALTY = -200
 CLOSE_TO_WALLS_REWARD = 30
+CRAMPED_CHAMBER_PENALTY = -100
+# the time the chamber analysis may take per free cell, about twice what it takes on a 100x100 plan
+CHAMBER_ANALYSIS_SECONDS_PER_CELL = 5e-6
 
 
 class Airbot(BotAi):
-    """OpenAir team's bot AI.  Based off SampleBot AI."""
-
-    _bot_id = None  # type: int
-    _game_state = None  # type: GameState
+    """OpenAir team's bot AI.  Based off SampleBot AI.
+
+    The moves are scored as one batch per turn: the suppliers' moves are
+    collected first, then each score calculator scores all of them at once.
+    Suppliers and calculators get the turn's TurnContext, which computes
+    what they share - the cells each move passes through, the number of
+    blocked neighbours of a cell, the cells next to the enemies' heads -
+    once per turn.  The AI itself keeps no state of the turn, so one
+    instance can play several games at once.
+
+    The cramped-chamber calculator is opt-in: its chamber analysis costs
+    about 2.5 us per free cell (some 25 ms on an empty 100x100 plan), an
+    order of magnitude more than the other calculators together.  Even when
+    enabled, it is skipped on turns whose deadline leaves too little time.
+    """
+
+    thread_safe = True
+
+    def __init__(self, chamber_analysis: bool = False) -> None:
+        """
+        :param chamber_analysis: whether to penalize the moves into cramped chambers
+        """
+        self._chamber_analysis = chamber_analysis
+        self._endgame = EndgameSolver()
 
     def get_move_suppliers(self):
+        """Returns the move suppliers: each takes the turn's context and returns its moves."""
         return (
             {
                 'func': self._safe_move_supplier,
@@ -51,156 +77,161 @@ class Airbot(BotAi):
             },
         )
 
-    def make_move(self, bot_id: int, game_state: GameState) -> Move:
-        self._bot_id = bot_id
-        self._game_state = game_state
-        if self._is_dead():
-            return DEFAULT_MOVE
-
-        move_suppliers = self.get_move_suppliers()
-        move_score_calculators = (
+    def get_move_score_calculators(self):
+        """Returns the score calculators: each takes the turn's context and the list of all moves supplied
+        and returns their scores."""
+        calculators = (
             self._nook_risk_calculator,
             self._collision_risk_calculator,
             self._staying_close_to_walls_calculator,
         )
-        scored_moves = []
-        for move_supplier in move_suppliers:
-            supplier_func = move_supplier['func']
-            supplier_coeff = move_supplier['coefficient']
-
-            try:
-                supplied_moves = list(supplier_func())
-                if not supplied_moves:
-                    continue
-                for move in supplied_moves:
-                    score = 1.0
-                    for score_calculator in move_score_calculators:
-                        score += score_calculator(move)
-                    scored_moves.append(
-                        {
-                            'move': move,
-                            'score': score * supplier_coeff,
-                        }
-                    )
-            except StopIteration:
-                continue
-        if scored_moves:
-            sorted_moves = list(sorted(scored_moves, key=lambda elem: elem['score']))
-            best_move = sorted_moves[-1]['move']
-            return best_move
-        return DEFAULT_MOVE
+        if self._chamber_analysis:
+            calculators += (self._cramped_chamber_calculator,)
+        return calculators
+
+    def make_move(self, bot_id: int, game_state: GameState, deadline: Deadline = None) -> Move:
+        """Scores the moves of all suppliers and returns the best one.
+
+        On equal scores, the move supplied last wins.  With a deadline, the
+        first safe move supplied is recorded on it right away, then the best
+        move after each score calculator; once the deadline expires, the
+        calculators left are skipped.
+
+        Once no opponent can reach the bot any more, the moves are left to the
+        endgame solver instead.
+        """
+        context = TurnContext(bot_id, game_state, deadline)
+        if context.is_dead():
+            return DEFAULT_MOVE
+
+        moves, coefficients = self._supplied_moves(context)
+        best_move = moves[0] if moves else None
+        if deadline and best_move:
+            deadline.update_best_move(best_move)
+
+        endgame_move = self._endgame.make_move(bot_id, game_state, deadline)
+        if endgame_move is not None:
+            if deadline:
+                deadline.update_best_move(endgame_move)
+            return endgame_move
+
+        for scored_moves in self._score_stages(context, moves, coefficients):
+            if scored_moves:
+                best_move = _best_scored_move(scored_moves)
+            if deadline:
+                if best_move:
+                    deadline.update_best_move(best_move)
+                if deadline.is_expired():
+                    break
+        return best_move or DEFAULT_MOVE
+
+    def score_moves(self, bot_id: int, game_state: GameState, deadline: Deadline = None) -> List[Tuple[Move, float]]:
+        """Returns the moves of all suppliers with their scores, in the order they were supplied.
+
+        :param bot_id: ID of the bot operated by the AI
+        :param game_state: current game state
+        :param deadline: once it expires, the score calculators left are skipped
+        :return the scored moves, empty if the bot is dead
+        """
+        context = TurnContext(bot_id, game_state, deadline)
+        if context.is_dead():
+            return []
+        moves, coefficients = self._supplied_moves(context)
+        scored_moves = []  # type: List[Tuple[Move, float]]
+        for scored_moves in self._score_stages(context, moves, coefficients):
+            if deadline and deadline.is_expired():
+                break
+        return scored_moves
+
+    def _supplied_moves(self, context: TurnContext) -> Tuple[List[Move], List[float]]:
+        moves = []  # type: List[Move]
+        coefficients = []  # type: List[float]
+        for move_supplier in self.get_move_suppliers():
+            supplied = list(move_supplier['func'](context))
+            moves.extend(supplied)
+            coefficients.extend([move_supplier['coefficient']] * len(supplied))
+        return moves, coefficients
+
+    def _score_stages(self, context: TurnContext, moves: List[Move],
+                      coefficients: List[float]) -> Iterator[List[Tuple[Move, float]]]:
+        """Yields the scored moves before the first score calculator and after each one."""
+        scores = [1.0] * len(moves)
+        yield [(move, score * coefficient) for (move, score, coefficient) in zip(moves, scores, coefficients)]
+        for score_calculator in self.get_move_score_calculators():
+            scores = [score + calculated for (score, calculated) in zip(scores, score_calculator(context, moves))]
+            yield [(move, score * coefficient) for (move, score, coefficient) in zip(moves, scores, coefficients)]
 
     def get_name(self) -> str:
         return BOT_NAME
 
-    def _is_dead(self) -> bool:
-        return self._bot_id not in self._game_state.get_live_bot_ids()
-
-    def _safe_move_supplier(self) -> Iterator[Move]:
-        return filter(self._is_safe_move, SINGLE_MOVES)
-
-    def _safe_haste_move_supplier(self) -> Iterator[Move]:
-        return filter(self._is_safe_double_move, STRAIGHT_DOUBLE_MOVES)
-
-    def _safe_detour_move_supplier(self) -> Iterator[Move]:
-        return filter(self._is_safe_double_move, DETOUR_DOUBLE_MOVES)
-
-    def _is_safe_move(self, move: Move) -> bool:
-        dest = self._destination(move)
-        return dest not in self._game_state.get_obstacle_locations()
-
-    def _is_safe_double_move(self, move: Move) -> bool:
-        dests = list(self._destinations(move))
-        unpassable_points = self._game_state.get_obstacle_locations()
-        return all(dest not in unpassable_points for dest in dests)
-
-    def _nook_risk_calculator(self, move: Move) -> float:
-        if self._is_not_nook(move):
-            return 0
-        else:
-            return NOOK_PENALTY
-
-    def _collision_risk_calculator(self, move: Move) -> float:
-        if self._is_move_safe_from_enemies(move):
-            return 0
-        else:
-            return COLLISION_PENALTY
-
-    def _staying_close_to_walls_calculator(self, move: Move) -> float:
-        if self._is_move_close_to_walls(move):
-            return CLOSE_TO_WALLS_REWARD
-        else:
-            return 0
-
-    def _is_move_close_to_walls(self, move: Move) -> bool:
-        dests = self._destinations(move)
-        for dest in dests:
-            walls_nearby_cnt = 0
-            for adj_dir in ALL_DIRECTIONS:
-                adj_cell = adj_dir.destination_from(dest,
-                                  height=self._game_state.get_plan_height(),
-                                  width=self._game_state.get_plan_width())
-                if adj_cell in self._game_state.get_obstacle_locations():
-                    walls_nearby_cnt += 1
-            # 1-2 walls are fine, otherwise not as good
-            if walls_nearby_cnt not in (1, 2):
-                return False
-        return True
-
-
-    def _is_not_nook(self, move: Move) -> bool:
-        move_destination = self._destination(move)
+    def _safe_move_supplier(self, context: TurnContext) -> Iterator[Move]:
+        is_free_index = context.game_state.is_free_index
+        return (move for move in SINGLE_MOVES if is_free_index(context.destination(move)))
+
+    def _safe_haste_move_supplier(self, context: TurnContext) -> Iterator[Move]:
+        return (move for move in STRAIGHT_DOUBLE_MOVES if self._is_safe_double_move(context, move))
+
+    def _safe_detour_move_supplier(self, context: TurnContext) -> Iterator[Move]:
+        return (move for move in DETOUR_DOUBLE_MOVES if self._is_safe_double_move(context, move))
+
+    def _is_safe_double_move(self, context: TurnContext, move: Move) -> bool:
+        is_free_index = context.game_state.is_free_index
+        return all(is_free_index(dest) for dest in context.destinations(move))
+
+    def _nook_risk_calculator(self, context: TurnContext, moves: List[Move]) -> List[float]:
         # after the move there should be no other safe moves (or just one
         # because we don't count our tail from current state)
-        cnt = 0
-        for dest in ALL_DIRECTIONS:
-            possible_dest = dest.destination_from(move_destination,
-                                  height=self._game_state.get_plan_height(),
-                                  width=self._game_state.get_plan_width())
-            if possible_dest in self._game_state.get_obstacle_locations():
-                cnt += 1
-        if cnt >= 3:
-            return False
-        return True
-
-    def _is_move_safe_from_enemies(self, move: Move) -> bool:
-        dests = self._destinations(move)
-        for dest in dests:
-            if not self._is_clear_from_enemies(dest):
-                return False
-        return True
-
-    def _is_clear_from_enemies(self, point: Point) -> bool:
-        cnt = 0
-        all_bot_locations = [
-            self._game_state.get_bot_location(b)
-            for b in self._game_state.get_live_bot_ids()
-            if b != self._bot_id
+        blocked_neighbor_count = context.blocked_neighbor_count
+        return [
+            NOOK_PENALTY if blocked_neighbor_count(context.destination(move)) >= 3 else 0
+            for move in moves
+        ]
+
+    def _collision_risk_calculator(self, context: TurnContext, moves: List[Move]) -> List[float]:
+        # a move is risky if it passes next to an enemy's head, i.e. into its move zone
+        enemy_zone = context.enemy_zone()
+        return [
+            COLLISION_PENALTY if not enemy_zone.isdisjoint(context.destinations(move)) else 0
+            for move in moves
         ]
-        for direction in ALL_DIRECTIONS:
-            # actually we check if, getting to that point, we get into the move
-            # zone of an enemy, i.e. if it's adjacent to that point
-            adjacent_square = direction.destination_from(point,
-                                  height=self._game_state.get_plan_height(),
-                                  width=self._game_state.get_plan_width())
-            if adjacent_square in all_bot_locations:
-                return False
-        return True
-
-    def _destination(self, move: Move) -> Point:
-        return list(self._destinations(move))[-1]
-
-    def _destinations(self, move: Move) -> Point:
-        bot_location = self._game_state.get_bot_location(self._bot_id)
-        prev_loc = bot_location
-        for step_name in ('step1', 'step2'):
-            step = getattr(move, step_name)
-            if not step:
-                continue
-            height = self._game_state.get_plan_height()
-            width = self._game_state.get_plan_width()
-            dest = step.destination_from(prev_loc,
-                                         height=height,
-                                         width=width)
-            prev_loc = dest
-            yield dest
+
+    def _staying_close_to_walls_calculator(self, context: TurnContext, moves: List[Move]) -> List[float]:
+        # 1-2 walls next to every cell of the move are fine, otherwise not as good
+        blocked_neighbor_count = context.blocked_neighbor_count
+        return [
+            CLOSE_TO_WALLS_REWARD
+            if all(blocked_neighbor_count(dest) in (1, 2) for dest in context.destinations(move)) else 0
+            for move in moves
+        ]
+
+    def _cramped_chamber_calculator(self, context: TurnContext, moves: List[Move]) -> List[float]:
+        """Penalizes each move in proportion to the space it loses compared to the best move.
+
+        Skipped if the turn's deadline leaves too little time for the chamber analysis.
+        """
+        if not moves:
+            return []
+        if context.deadline and \
+                context.deadline.remaining() < CHAMBER_ANALYSIS_SECONDS_PER_CELL * context.grid.count(FREE):
+            return [0] * len(moves)
+        chambers = context.chambers()
+        max_fillable = chambers.max_fillable()
+        if max_fillable <= 0:
+            return [0] * len(moves)
+        scores = []
+        for move in moves:
+            # the second step of a double move fills a cell, it does not lose it
+            fillable = chambers.fillable_after(move) + (1 if move.step2 else 0)
+            fillable = min(fillable, max_fillable)
+            scores.append(CRAMPED_CHAMBER_PENALTY * (1 - fillable / max_fillable))
+        return scores
+
+
+def _best_scored_move(scored_moves: List[Tuple[Move, float]]) -> Move:
+    """Returns the move with the best score; on equal scores, the last one."""
+    best_move, best_score = scored_moves[0]
+    for (move, score) in scored_moves:
+        if score >= best_score:
+            best_move = move
+            best_score = score
+    return best_move
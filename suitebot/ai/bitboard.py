@@ -0,0 +1,63 @@
+from functools import lru_cache
+from typing import List, Tuple
+
+from suitebot.game.game_state import GameState, FREE, OCCUPIED
+
+# occupancy grid bytes to the digits of a bitboard: free cells are 1 bits
+_FREE_BITS_TABLE = bytes.maketrans(bytes([FREE, OCCUPIED]), b'10')
+
+
+@lru_cache(maxsize=16)
+def _column_masks(width: int, height: int) -> Tuple[int, int, int, int, int]:
+    """Returns the bitboards of the whole plan, of its first and last columns, and of the rest of the plan of each."""
+    all_cells = (1 << (width * height)) - 1
+    first_column = sum(1 << (y * width) for y in range(height))
+    last_column = first_column << (width - 1)
+    return all_cells, first_column, last_column, all_cells ^ first_column, all_cells ^ last_column
+
+
+def free_bitboard(game_state: GameState) -> int:
+    """Returns the free cells of the game state as an int whose bit y * width + x is set if the cell is free."""
+    return int(game_state.get_grid().translate(_FREE_BITS_TABLE)[::-1] or b'0', 2)
+
+
+def bit_count(bitboard: int) -> int:
+    return bin(bitboard).count('1')
+
+
+class BitboardPlan:
+    """Neighbourhood operations on bitboards of a wrapping plan: one bit per cell, at y * width + x."""
+
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        (self._all, self._first_column, self._last_column,
+         self._not_first_column, self._not_last_column) = _column_masks(width, height)
+        self._wrap_shift = width * (height - 1)
+
+    def expand(self, cells: int) -> int:
+        """Returns the cells next to the given cells (wrapping around the edges of the plan)."""
+        width = self.width
+        wrap_shift = self._wrap_shift
+        return (((cells & self._not_last_column) << 1) | ((cells & self._last_column) >> (width - 1))
+                | ((cells & self._not_first_column) >> 1) | ((cells & self._first_column) << (width - 1))
+                | (((cells << width) | (cells << wrap_shift)) & self._all)
+                | (cells >> width) | (cells >> wrap_shift))
+
+    def flood_levels(self, sources: int, free: int) -> List[int]:
+        """Multi-source BFS, a whole level at a time.
+
+        Returns the cumulative levels: levels[k] holds the cells at distance
+        at most k from the sources, moving over free cells only.
+        """
+        free &= ~sources
+        visited = frontier = sources
+        levels = [visited]
+        expand = self.expand
+        while True:
+            frontier = expand(frontier) & free
+            if not frontier:
+                return levels
+            free ^= frontier
+            visited |= frontier
+            levels.append(visited)
@@ -1,6 +1,7 @@
 from abc import ABCMeta, abstractmethod
 from typing import Optional
 
+from suitebot.ai.deadline import Deadline
 from suitebot.game.game_state import GameState
 from suitebot.game.move import Move
 
@@ -8,15 +9,37 @@ from suitebot.game.move import Move
 class BotAi:
     __metaclass__ = ABCMeta
 
+    # whether make_move() may run in several threads at once, e.g. for the moves of different games
+    thread_safe = False
+
     @abstractmethod
-    def make_move(self, bot_id: int, game_state: GameState) -> Optional[Move]:
+    def make_move(self, bot_id: int, game_state: GameState, deadline: Deadline = None) -> Optional[Move]:
         """Returns the move that the AI intends to play.
 
+        If a deadline is given, the AI should return before it expires and
+        record its best move so far on it as the calculation progresses.
+
         :param bot_id: ID of the bot operated by the AI
         :param game_state: current game state
+        :param deadline: time budget of the move, or None for no limit
         :return the move that the AI intends to play
         """
 
+    def ponder(self, bot_id: int, game_state: GameState, move: Move, deadline: Deadline) -> None:
+        """Thinks ahead while waiting for the next move request (optional).
+
+        Called once the move has been sent, in a thread of its own; the AI may
+        search the positions expected after the move so that its next
+        make_move() starts warm.  Pondering must stop as soon as the deadline
+        expires - it is cancelled when the next request arrives - and leave
+        the game state as it found it.
+
+        :param bot_id: ID of the bot operated by the AI
+        :param game_state: the game state the move was made in
+        :param move: the move played
+        :param deadline: cancelled when the AI is needed again
+        """
+
     @abstractmethod
     def get_name(self) -> str:
         """Returns the name of the bot.
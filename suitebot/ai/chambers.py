@@ -0,0 +1,137 @@
+from array import array
+from typing import Dict, List, Tuple
+
+from suitebot.game.direction import neighbor_table, direction_ordinal
+from suitebot.game.game_state import GameState, FREE
+from suitebot.game.move import Move
+
+_UNVISITED = -1
+_NO_BLOCK = -1
+
+
+class ChamberAnalysis:
+    """Chambers of the free space reachable from a bot, for estimating how much of it the bot can fill.
+
+    Tarjan's algorithm (an iterative DFS over the free cells, with the plan
+    wrapping around its edges) splits the space reachable from the bot's
+    head into biconnected blocks - chambers - joined by articulation points,
+    i.e. cells that cannot be passed through twice.  The blocks form a tree
+    rooted at the head.  A bot can fill the chamber it enters, but can then
+    leave it through one articulation point only, so the fillable space of
+    a chamber is its size plus the fillable space of its best child chamber.
+
+    The analysis is done once per turn; the moves of the turn are evaluated
+    against it.  Its cost is proportional to the reachable space, which
+    shrinks as the board fills in.
+    """
+
+    def __init__(self, game_state: GameState, bot_id: int) -> None:
+        width = game_state.get_plan_width()
+        self._neighbors = neighbor_table(width, game_state.get_plan_height())
+        self._grid = game_state.get_grid()
+        xs, ys = game_state.get_bot(bot_id).get_segment_coordinates()
+        self._root = ys[-1] * width + xs[-1]
+        cell_count = len(self._grid)
+        self._block_of = array('i', [_NO_BLOCK]) * cell_count
+        self._block_sizes = []  # type: List[int]
+        # the two best child chambers of each block, as (fillable space, articulation point)
+        self._block_best_children = []  # type: List[Tuple[Tuple[int, int], Tuple[int, int]]]
+        # the fillable space below each articulation point, i.e. of its best child chamber
+        self._fillable_below = {}  # type: Dict[int, int]
+        self.reachable_area = self._analyze(cell_count)
+
+    def _analyze(self, cell_count: int) -> int:
+        neighbors = self._neighbors
+        grid = self._grid
+        root = self._root
+        discovery = array('i', [_UNVISITED]) * cell_count
+        low = array('i', [0]) * cell_count
+        discovery[root] = 0
+        counter = 1
+        path = [root]           # the DFS path
+        next_directions = [0]   # per cell of the path, the next direction to explore
+        visited = []            # visited cells not assigned to a block yet
+
+        while path:
+            cell = path[-1]
+            direction = next_directions[-1]
+            if direction < 4:
+                next_directions[-1] = direction + 1
+                neighbor = neighbors[direction][cell]
+                if grid[neighbor] != FREE and neighbor != root:
+                    continue
+                if discovery[neighbor] == _UNVISITED:
+                    discovery[neighbor] = low[neighbor] = counter
+                    counter += 1
+                    path.append(neighbor)
+                    next_directions.append(0)
+                    visited.append(neighbor)
+                elif discovery[neighbor] < low[cell]:
+                    low[cell] = discovery[neighbor]
+                continue
+
+            path.pop()
+            next_directions.pop()
+            if not path:
+                break
+            parent = path[-1]
+            if low[cell] < low[parent]:
+                low[parent] = low[cell]
+            if low[cell] >= discovery[parent]:
+                # the subtree of cell, down to the chambers already found, is a chamber below parent
+                members = []
+                while True:
+                    member = visited.pop()
+                    members.append(member)
+                    if member == cell:
+                        break
+                self._add_block(parent, members)
+        return counter - 1
+
+    def _add_block(self, parent: int, members: List[int]) -> None:
+        block = len(self._block_sizes)
+        block_of = self._block_of
+        fillable_below = self._fillable_below
+        best = second = (0, _NO_BLOCK)
+        for member in members:
+            block_of[member] = block
+            below = fillable_below.get(member)
+            if below is not None:
+                if below > best[0]:
+                    best, second = (below, member), best
+                elif below > second[0]:
+                    second = (below, member)
+        self._block_sizes.append(len(members))
+        self._block_best_children.append((best, second))
+        fillable = len(members) + best[0]
+        if fillable > fillable_below.get(parent, 0):
+            fillable_below[parent] = fillable
+
+    def fillable_from(self, cell: int) -> int:
+        """Returns how many cells the bot can fill after stepping onto the given cell (not counting it)."""
+        block = self._block_of[cell]
+        if block == _NO_BLOCK:
+            return 0
+        best, second = self._block_best_children[block]
+        leaving = second[0] if best[1] == cell else best[0]
+        return max(self._block_sizes[block] - 1 + leaving, self._fillable_below.get(cell, 0))
+
+    def fillable_after(self, move: Move) -> int:
+        """Returns how many cells the bot can fill after the given move; 0 if the move crashes."""
+        cell = self._root
+        trail = []
+        for step in (move.step1, move.step2):
+            if step is None:
+                break
+            cell = self._neighbors[direction_ordinal(step)][cell]
+            if self._grid[cell] != FREE or cell in trail:
+                return 0
+            trail.append(cell)
+        block = self._block_of[cell]
+        # cells of the move already taken from the chamber of the destination
+        taken = sum(1 for trail_cell in trail[:-1] if self._block_of[trail_cell] == block)
+        return max(self.fillable_from(cell) - taken, 0)
+
+    def max_fillable(self) -> int:
+        """Returns the most cells the bot can fill, starting with any step."""
+        return self._fillable_below.get(self._root, 0) - 1 if self.reachable_area else 0
@@ -0,0 +1,45 @@
+from time import monotonic
+from typing import Optional
+
+from suitebot.game.move import Move
+
+
+class Deadline:
+    """Time budget of a single turn.
+
+    Besides the time budget, a deadline carries the best move found so far:
+    an anytime AI records every improvement with update_best_move(), so that
+    a move is available whenever the deadline is enforced.
+    """
+
+    def __init__(self, budget: float) -> None:
+        """Creates a deadline expiring after the given budget.
+
+        :param budget: the time budget in seconds
+        """
+        self._expires_at = monotonic() + budget
+        self._best_move = None  # type: Optional[Move]
+
+    def remaining(self) -> float:
+        """Returns the time left until the deadline.
+
+        :return the time left in seconds, zero if the deadline has passed
+        """
+        return max(0.0, self._expires_at - monotonic())
+
+    def is_expired(self) -> bool:
+        return monotonic() >= self._expires_at
+
+    def cancel(self) -> None:
+        """Lets the deadline expire right away, e.g. to stop pondering."""
+        self._expires_at = monotonic()
+
+    def get_best_move(self) -> Optional[Move]:
+        """Returns the best move recorded so far.
+
+        :return the best move recorded so far or None if there is none
+        """
+        return self._best_move
+
+    def update_best_move(self, move: Move) -> None:
+        self._best_move = move
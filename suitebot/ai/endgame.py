@@ -0,0 +1,302 @@
+from typing import Dict, List, Optional, Tuple
+
+from suitebot.ai.deadline import Deadline
+from suitebot.ai.bitboard import BitboardPlan, free_bitboard, bit_count
+from suitebot.game.direction import ALL_DIRECTIONS, neighbor_table
+from suitebot.game.game_state import GameState
+from suitebot.game.move import Move
+
+# regions up to this size are solved exactly
+EXACT_REGION_LIMIT = 24
+# the exact solver gives up (and the heuristic takes over) after memoizing this many states
+MAX_EXACT_STATES = 200000
+# without a deadline, the heuristic plans this many steps ahead per turn
+HEURISTIC_PLAN_STEPS = 256
+# with a deadline, the heuristic plans until this fraction of the remaining time is used
+HEURISTIC_TIME_SHARE = 0.5
+
+_DIRECTION_ORDINALS = range(len(ALL_DIRECTIONS))
+
+
+class _SolverBudgetExceeded(Exception):
+    pass
+
+
+class EndgameSolver:
+    """Plays the endgame: our bot is alone in its region of the plan.
+
+    Once no opponent can reach our region, the game is a single-player
+    longest-path problem: the longer our path, the longer we survive.  The
+    solver finds an exact longest path of single moves for small regions
+    (depth-first search over the cells, memoized by cell and the bitmask of
+    the cells still free) and a near-optimal one for bigger regions
+    (greedy: never cut the region into parts without going into the biggest
+    one, and otherwise hug the walls, i.e. pick the cell with the fewest
+    free neighbours).
+
+    The planned path is kept from turn to turn, per bot and plan size: as
+    long as the bot follows it and the board agrees with it, each turn just
+    replays its next step, no matter how costly it was to find.  The
+    isolation is checked every turn, and a path is only replayed if its cells
+    are still free and the region has not grown beyond the one it was
+    planned for - so a path planned in one game is never replayed in
+    another.  The isolation check stops as soon as it meets an opponent, so
+    that it stays cheap before the endgame.  The heuristic path is planned a
+    bounded number of steps (or a share of the time budget) at a time and
+    extended when it runs out.
+    """
+
+    def __init__(self) -> None:
+        # the planned paths by (bot ID, plan width, plan height)
+        self._paths = {}  # type: Dict[Tuple[int, int, int], _PlannedPath]
+
+    def make_move(self, bot_id: int, game_state: GameState, deadline: Deadline = None) -> Optional[Move]:
+        """Returns the endgame move of the bot, or None if the bot is not isolated from all opponents.
+
+        :param bot_id: ID of the bot operated by the AI
+        :param game_state: current game state
+        :param deadline: the time budget of the move, if any
+        :return the move, None if the bot is not in an endgame
+        """
+        width = game_state.get_plan_width()
+        height = game_state.get_plan_height()
+        neighbors = neighbor_table(width, height)
+        head = _head(game_state, bot_id)
+        key = (bot_id, width, height)
+
+        plan = BitboardPlan(width, height)
+        region = _isolated_region(plan, game_state, bot_id, head)
+        if region is None:
+            self._paths.pop(key, None)
+            return None
+        if not region:
+            return None    # no way out
+
+        planned = self._paths.get(key)
+        if planned is not None:
+            move = planned.next_move(head, region, neighbors)
+            if move is not None:
+                return move
+
+        path = None
+        if bit_count(region) <= EXACT_REGION_LIMIT:
+            try:
+                path = _longest_path(head, region, neighbors, deadline)
+            except _SolverBudgetExceeded:
+                pass
+        if path is None:
+            path = _greedy_path(head, region, plan, neighbors, deadline)
+        planned = self._paths[key] = _PlannedPath(path, region)
+        return planned.next_move(head, region, neighbors)
+
+
+class _PlannedPath:
+    """A path planned in a region, starting at the bot's head, and how far the bot has followed it."""
+
+    def __init__(self, path: List[int], region: int) -> None:
+        self._path = path
+        self._position = 0
+        # the region (without the head) we expect at the current position: it only shrinks by our own moves
+        self._expected_region = region
+        # the cells of the path still to go
+        self._remaining = 0
+        for cell in path[1:]:
+            self._remaining |= 1 << cell
+
+    def next_move(self, head: int, region: int, neighbors: Tuple) -> Optional[Move]:
+        """Returns the next move of the path, None if the bot is not on it, the path has run out, or the
+        board does not agree with it."""
+        path = self._path
+        position = self._position
+        expected_region = self._expected_region
+        remaining = self._remaining
+        # the bot has played the previous step of the path (or is at its start)
+        if position < len(path) and path[position] != head and position + 1 < len(path) \
+                and path[position + 1] == head:
+            position += 1
+            expected_region &= ~(1 << head)
+            remaining &= ~(1 << head)
+        if position + 1 >= len(path) or path[position] != head:
+            return None
+        # the cells of the path are still free and reachable, and nothing has joined the region
+        if remaining & ~region or region & ~expected_region:
+            return None
+        self._position = position
+        self._expected_region = expected_region
+        self._remaining = remaining
+        return _move_between(head, path[position + 1], neighbors)
+
+
+def _head(game_state: GameState, bot_id: int) -> int:
+    xs, ys = game_state.get_bot(bot_id).get_segment_coordinates()
+    return ys[-1] * game_state.get_plan_width() + xs[-1]
+
+
+def _isolated_region(plan: BitboardPlan, game_state: GameState, bot_id: int, head: int) -> Optional[int]:
+    """Returns the bitboard of the free cells reachable from the head, or None if there are no live opponents or
+    one of them can enter the region.
+
+    The flood fill stops at the first level that reaches a cell next to an opponent's head, so that it costs
+    little while an opponent is close; only an isolated bot pays for the flood fill of its whole region.
+    """
+    enemy_heads = 0
+    for enemy_id in game_state.get_live_bot_ids():
+        enemy = game_state.get_bot(enemy_id)
+        if enemy_id != bot_id and enemy.get_segment_count():
+            enemy_heads |= 1 << _head(game_state, enemy_id)
+    if not enemy_heads:
+        return None
+    enemy_zone = plan.expand(enemy_heads)
+    if enemy_zone & (1 << head):
+        return None
+    expand = plan.expand
+    free = free_bitboard(game_state)
+    region = 0
+    frontier = 1 << head
+    while True:
+        frontier = expand(frontier) & free
+        if not frontier:
+            return region
+        if frontier & enemy_zone:
+            return None
+        free ^= frontier
+        region |= frontier
+
+
+def _move_between(cell: int, next_cell: int, neighbors: Tuple) -> Move:
+    for ordinal in _DIRECTION_ORDINALS:
+        if neighbors[ordinal][cell] == next_cell:
+            return Move(ALL_DIRECTIONS[ordinal])
+    raise ValueError("cells %i and %i are not adjacent" % (cell, next_cell))
+
+
+def _cells(bitboard: int) -> List[int]:
+    cells = []
+    while bitboard:
+        lowest = bitboard & -bitboard
+        cells.append(lowest.bit_length() - 1)
+        bitboard ^= lowest
+    return cells
+
+
+def _longest_path(head: int, region: int, neighbors: Tuple, deadline: Optional[Deadline]) -> List[int]:
+    """Returns a longest path from the head over the cells of the region, head included.
+
+    The region's cells are numbered so that the cells still free fit in a
+    small bitmask; the longest path from each (cell, free cells) state is
+    memoized.  Raises _SolverBudgetExceeded if there are too many states, or
+    if the search takes more than its share of the deadline.
+    """
+    stop_at_remaining = deadline.remaining() * (1 - HEURISTIC_TIME_SHARE) if deadline else None
+    cells = _cells(region)
+    local = {cell: i for (i, cell) in enumerate(cells)}
+    adjacency = [
+        sorted({local[table[cell]] for table in neighbors if table[cell] in local})
+        for cell in cells
+    ]
+    start = sorted({local[table[head]] for table in neighbors if table[head] in local})
+    memo = {}  # type: Dict[Tuple[int, int], int]
+
+    def longest(cell: int, remaining: int) -> int:
+        """Length of the longest path from the cell over the remaining cells, the cell not included."""
+        key = (cell, remaining)
+        length = memo.get(key)
+        if length is not None:
+            return length
+        if len(memo) >= MAX_EXACT_STATES:
+            raise _SolverBudgetExceeded()
+        if stop_at_remaining is not None and len(memo) % 1024 == 1023 and deadline.remaining() <= stop_at_remaining:
+            raise _SolverBudgetExceeded()
+        length = 0
+        upper_bound = bin(remaining).count('1')
+        for neighbor in adjacency[cell]:
+            if remaining >> neighbor & 1:
+                length = max(length, 1 + longest(neighbor, remaining & ~(1 << neighbor)))
+                if length == upper_bound:
+                    break
+        memo[key] = length
+        return length
+
+    all_cells = (1 << len(cells)) - 1
+    path = [head]
+    candidates = start
+    remaining = all_cells
+    while candidates:
+        (length, cell) = max((longest(cell, remaining & ~(1 << cell)), cell) for cell in candidates)
+        remaining &= ~(1 << cell)
+        path.append(cells[cell])
+        candidates = [neighbor for neighbor in adjacency[cell] if remaining >> neighbor & 1]
+    return path
+
+
+def _greedy_path(head: int, region: int, plan: BitboardPlan, neighbors: Tuple,
+                 deadline: Optional[Deadline]) -> List[int]:
+    """Returns a path from the head over the cells of the region, head included, planned greedily.
+
+    The cells still to be filled are kept as one connected part of the
+    region; the bot only flood-fills when a step may cut that part in two.
+    """
+    if deadline:
+        stop_at_remaining = deadline.remaining() * (1 - HEURISTIC_TIME_SHARE)
+        max_steps = None
+    else:
+        stop_at_remaining = None
+        max_steps = HEURISTIC_PLAN_STEPS
+    path = [head]
+    cell = head
+    # the head itself may separate parts of the region
+    remaining = max(_parts_next_to(head, region, plan, neighbors), key=bit_count)
+    while True:
+        candidates = [table[cell] for table in neighbors if remaining >> table[cell] & 1]
+        if not candidates:
+            break
+        best = None
+        for candidate in candidates:
+            free_neighbors = sum(remaining >> table[candidate] & 1 for table in neighbors)
+            if not free_neighbors:
+                part = 0    # a dead end
+            elif _may_cut(candidate, remaining, neighbors):
+                part = max(_parts_next_to(candidate, remaining & ~(1 << candidate), plan, neighbors), key=bit_count)
+            else:
+                part = remaining & ~(1 << candidate)
+            # the bigger the part left, the better; then hug the walls: the fewer free neighbours, the better
+            key = (-bit_count(part), free_neighbors)
+            if best is None or key < best[0]:
+                best = (key, candidate, part)
+        (_, cell, remaining) = best
+        path.append(cell)
+        if max_steps is not None and len(path) > max_steps:
+            break
+        if stop_at_remaining is not None and deadline.remaining() <= stop_at_remaining:
+            break
+    return path
+
+
+def _parts_next_to(cell: int, free: int, plan: BitboardPlan, neighbors: Tuple) -> List[int]:
+    """Returns the connected parts of the free cells that are next to the cell."""
+    parts = []
+    for table in neighbors:
+        neighbor = table[cell]
+        if free >> neighbor & 1 and not any(part >> neighbor & 1 for part in parts):
+            parts.append(plan.flood_levels(1 << neighbor, free)[-1])
+    return parts
+
+
+def _may_cut(cell: int, free: int, neighbors: Tuple) -> bool:
+    """Tells whether filling the cell may cut the free cells next to it apart.
+
+    Looks at the 8 cells around: if their free cells form a single run,
+    the cell's free neighbours stay connected around it.
+    """
+    up, down, left, right = neighbors
+    ring = (up[cell], right[up[cell]], right[cell], down[right[cell]],
+            down[cell], left[down[cell]], left[cell], up[left[cell]])
+    free_ring = [free >> ring_cell & 1 for ring_cell in ring]
+    # runs of free cells around the ring that touch one of the (orthogonal) neighbours
+    runs = 0
+    for i in range(0, 8, 2):
+        if free_ring[i] and not (free_ring[i - 1] and free_ring[i - 2]):
+            runs += 1
+    if runs == 0 and all(free_ring):
+        runs = 1
+    return runs > 1
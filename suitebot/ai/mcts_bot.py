@@ -0,0 +1,320 @@
+import math
+import os
+import random
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple, Union
+
+from suitebot.ai.airbot import Airbot, DEFAULT_MOVE, SINGLE_MOVES, STRAIGHT_DOUBLE_MOVES, DETOUR_DOUBLE_MOVES
+from suitebot.ai.bot_ai import BotAi
+from suitebot.ai.deadline import Deadline
+from suitebot.game.bot import Bot
+from suitebot.game.direction import neighbor_table, direction_ordinal
+from suitebot.game.game_state import GameState, FREE
+from suitebot.game.move import Move
+from suitebot.game import shared_board
+from suitebot.game.shared_board import BoardDescriptor, SharedBoard
+
+BOT_NAME = 'MCTSbot'
+
+TREE_MOVES = SINGLE_MOVES + STRAIGHT_DOUBLE_MOVES + DETOUR_DOUBLE_MOVES
+
+# playouts per worker and move without a deadline
+DEFAULT_ITERATIONS = 200
+# with a deadline, the workers search for this share of the remaining time
+DEADLINE_TIME_SHARE = 0.8
+# a playout stops after this many turns; the outcome is then judged by the bots still alive
+MAX_PLAYOUT_TURNS = 40
+EXPLORATION = math.sqrt(2)
+
+WIN = 1.0
+DRAW = 0.5
+LOSS = 0.0
+
+# root statistics of a search: (visits, total reward) per move
+RootStats = Dict[Move, Tuple[int, float]]
+
+# a game state in a form cheap to send to the workers: (width, height, grid, bots as (ID, is alive, xs, ys))
+GameStateSnapshot = Tuple[int, int, bytes, List[Tuple[int, bool, object, object]]]
+
+
+class MctsBot(BotAi):
+    """Monte Carlo tree search with root parallelism.
+
+    Each worker grows its own tree from the current position: the tree
+    holds our moves (open loop - the opponents' moves are not part of it),
+    the opponents play random safe moves, and every iteration ends with a
+    random playout, played simultaneously with GameState.apply_moves.  The
+    workers' root statistics are merged and the most visited move is played.
+
+    With more than one worker, the workers are the processes of a pool that
+    is started by the first move and reused by all later moves.  A pool does
+    not survive a fork, so every process gets a pool of its own: an AI
+    created before the prefork server forks starts one pool per worker of
+    the server.  The game state is written once per move to a shared board
+    (see shared_board), and the workers only get its descriptor; without
+    shared memory (Python < 3.8), they get a pickled snapshot.  With one
+    worker the search runs in the calling thread.
+    """
+
+    thread_safe = True
+
+    def __init__(self, workers: int = None, iterations: int = DEFAULT_ITERATIONS, executor: Executor = None,
+                 seed: int = None) -> None:
+        """Creates the AI; the pool of worker processes is started by the first move.
+
+        :param workers: number of root-parallel searches (default: CPU count)
+        :param iterations: playouts per worker and move when there is no deadline
+        :param executor: the executor to run the searches on instead of an own process pool
+        :param seed: seed of the searches' random choices; without a deadline, the same seed plays the same moves
+        """
+        self._workers = workers or os.cpu_count() or 1
+        self._iterations = iterations
+        self._executor = executor
+        self._own_pool = executor is None and self._workers > 1
+        # the process that started the pool
+        self._pool_pid = None  # type: Optional[int]
+        self._seed = random.Random(seed)
+        self._board = SharedBoard() if executor is not None and shared_board.is_supported() else None
+        # the shared board holds the game state of one move at a time
+        self._lock = threading.Lock()
+
+    def make_move(self, bot_id: int, game_state: GameState, deadline: Deadline = None) -> Move:
+        if bot_id not in game_state.get_live_bot_ids():
+            return DEFAULT_MOVE
+
+        scored_moves = Airbot().score_moves(bot_id, game_state)
+        if not scored_moves:
+            return DEFAULT_MOVE
+        heuristic_move = max(scored_moves, key=lambda elem: elem[1])[0]
+        if deadline:
+            deadline.update_best_move(heuristic_move)
+
+        if deadline:
+            stop_at = time.monotonic() + deadline.remaining() * DEADLINE_TIME_SHARE
+            iterations = None
+        else:
+            stop_at = None
+            iterations = self._iterations
+        seeds = [self._seed.getrandbits(32) for _ in range(self._workers)]
+
+        if self._own_pool:
+            self._ensure_pool()
+        if self._executor is None:
+            # on a copy: the game state may be shared with the next request if the deadline is enforced
+            results = [search(snapshot(game_state), bot_id, seeds[0], stop_at, iterations)]
+        else:
+            with self._lock:
+                board = self._board.write(game_state) if self._board is not None else snapshot(game_state)
+                futures = [self._executor.submit(search, board, bot_id, seed, stop_at, iterations)
+                           for seed in seeds]
+                done, _ = wait(futures, timeout=deadline.remaining() if deadline else None)
+            # in the order of submission, so that the merged statistics do not depend on the order of completion
+            results = [future.result() for future in futures if future in done and future.exception() is None]
+
+        merged = merge_root_stats(results)
+        if not merged:
+            return heuristic_move
+        best_move = max(merged, key=lambda move: merged[move][0])
+        if deadline:
+            deadline.update_best_move(best_move)
+        return best_move
+
+    def _ensure_pool(self) -> None:
+        """Starts the pool of worker processes, unless this process has already started it.
+
+        A pool inherited through a fork is left alone: its processes and its
+        shared board belong to the parent process.
+        """
+        with self._lock:
+            if self._pool_pid == os.getpid():
+                return
+            self._executor = ProcessPoolExecutor(max_workers=self._workers)
+            # start all the processes now rather than one by one as the searches are submitted
+            wait([self._executor.submit(os.getpid) for _ in range(self._workers)])
+            self._board = SharedBoard() if shared_board.is_supported() else None
+            self._pool_pid = os.getpid()
+
+    def shutdown(self) -> None:
+        """Stops the worker processes and releases the shared board."""
+        if self._own_pool and self._pool_pid != os.getpid():
+            return
+        if self._executor is not None:
+            self._executor.shutdown()
+        if self._board is not None:
+            self._board.close()
+
+    def get_name(self) -> str:
+        return BOT_NAME
+
+
+def snapshot(game_state: GameState) -> GameStateSnapshot:
+    """Returns the game state in a form cheap to pickle."""
+    return (
+        game_state.get_plan_width(),
+        game_state.get_plan_height(),
+        bytes(game_state.get_grid()),
+        [(bot.id, bot.is_alive) + bot.get_segment_coordinates() for bot in game_state.get_bots()],
+    )
+
+
+def restore(state_snapshot: GameStateSnapshot) -> GameState:
+    """Re-creates a game state from its snapshot.
+
+    The bots' segments are part of the snapshot's grid, which is used as the static grid.
+    """
+    (width, height, grid, bots_data) = state_snapshot
+    bots = {}
+    for (bot_id, is_alive, xs, ys) in bots_data:
+        bot = Bot(id=bot_id, name='Bot #{}'.format(bot_id))
+        for (x, y) in zip(xs, ys):
+            bot.add_segment_at(x, y)
+        bot.is_alive = is_alive
+        bots[bot_id] = bot
+    return GameState(plan_width=width, plan_height=height, bots=bots, static_grid=grid)
+
+
+def merge_root_stats(results: List[RootStats]) -> RootStats:
+    merged = {}  # type: RootStats
+    for result in results:
+        for (move, (visits, reward)) in result.items():
+            (merged_visits, merged_reward) = merged.get(move, (0, 0.0))
+            merged[move] = (merged_visits + visits, merged_reward + reward)
+    return merged
+
+
+def search(board: Union[BoardDescriptor, GameStateSnapshot], bot_id: int, seed: int, stop_at: Optional[float],
+           iterations: Optional[int]) -> RootStats:
+    """Grows a search tree until time.monotonic() reaches stop_at or the iterations are done.
+
+    Runs in the worker processes; returns the statistics of the root's moves,
+    empty if the shared board has already been overwritten by the next move.
+    """
+    game_state = shared_board.read_game_state(board) if isinstance(board, BoardDescriptor) else restore(board)
+    if game_state is None:
+        return {}
+    return _Search(game_state, bot_id, random.Random(seed)).run(stop_at, iterations)
+
+
+class _Node:
+    __slots__ = ('visits', 'reward', 'children')
+
+    def __init__(self) -> None:
+        self.visits = 0
+        self.reward = 0.0
+        self.children = {}  # type: Dict[Move, _Node]
+
+
+class _Search:
+
+    def __init__(self, game_state: GameState, bot_id: int, rng: random.Random) -> None:
+        self._game_state = game_state
+        self._bot_id = bot_id
+        self._rng = rng
+        self._width = game_state.get_plan_width()
+        self._neighbors = neighbor_table(self._width, game_state.get_plan_height())
+        self._grid = game_state.get_grid()
+        self._root = _Node()
+
+    def run(self, stop_at: Optional[float], iterations: Optional[int]) -> RootStats:
+        iteration = 0
+        while iterations is None or iteration < iterations:
+            if stop_at is not None and time.monotonic() >= stop_at:
+                break
+            self._iterate()
+            iteration += 1
+        return {move: (child.visits, child.reward) for (move, child) in self._root.children.items()}
+
+    def _iterate(self) -> None:
+        game_state = self._game_state
+        path = [self._root]
+        applied = 0
+        try:
+            node = self._root
+            outcome = None
+            # selection and expansion, down to the first new node
+            while outcome is None:
+                moves = self._safe_moves(self._bot_id, TREE_MOVES)
+                if not moves:
+                    outcome = LOSS
+                    break
+                move = self._select(node, moves)
+                child = node.children.get(move)
+                expanded = child is None
+                if expanded:
+                    child = node.children[move] = _Node()
+                self._play_turn(move)
+                applied += 1
+                path.append(child)
+                node = child
+                outcome = self._outcome()
+                if expanded:
+                    break
+            # playout
+            turns = 0
+            while outcome is None and turns < MAX_PLAYOUT_TURNS:
+                self._play_turn(self._random_move(self._bot_id))
+                applied += 1
+                turns += 1
+                outcome = self._outcome()
+            if outcome is None:
+                outcome = self._judge()
+        finally:
+            for _ in range(applied):
+                game_state.undo()
+        for visited in path:
+            visited.visits += 1
+            visited.reward += outcome
+
+    def _select(self, node: _Node, moves: List[Move]) -> Move:
+        """UCB1 over the moves safe in the current position; untried moves first."""
+        untried = [move for move in moves if move not in node.children]
+        if untried:
+            return self._rng.choice(untried)
+        log_visits = math.log(node.visits or 1)
+        children = node.children
+        return max(moves, key=lambda move: children[move].reward / children[move].visits
+                   + EXPLORATION * math.sqrt(log_visits / children[move].visits))
+
+    def _play_turn(self, our_move: Move) -> None:
+        moves = {bot_id: self._random_move(bot_id) for bot_id in self._game_state.get_live_bot_ids()}
+        moves[self._bot_id] = our_move
+        self._game_state.apply_moves(moves)
+
+    def _random_move(self, bot_id: int) -> Move:
+        moves = self._safe_moves(bot_id, SINGLE_MOVES)
+        return self._rng.choice(moves) if moves else DEFAULT_MOVE
+
+    def _safe_moves(self, bot_id: int, moves) -> List[Move]:
+        xs, ys = self._game_state.get_bot(bot_id).get_segment_coordinates()
+        if not xs:
+            # a bot without segments has no head to move from (apply_moves skips it)
+            return []
+        head = ys[-1] * self._width + xs[-1]
+        neighbors = self._neighbors
+        grid = self._grid
+        safe = []
+        for move in moves:
+            cell = neighbors[direction_ordinal(move.step1)][head]
+            if grid[cell] != FREE:
+                continue
+            if move.step2 is not None and grid[neighbors[direction_ordinal(move.step2)][cell]] != FREE:
+                continue
+            safe.append(move)
+        return safe
+
+    def _outcome(self) -> Optional[float]:
+        """Returns the outcome of the game if it is over for us, None otherwise."""
+        live_bot_ids = self._game_state.get_live_bot_ids()
+        if self._bot_id not in live_bot_ids:
+            return DRAW if not live_bot_ids else LOSS
+        if len(live_bot_ids) == 1:
+            return WIN
+        return None
+
+    def _judge(self) -> float:
+        """The outcome of an unfinished playout: a draw, improved by the opponents that died."""
+        enemies = [bot for bot in self._game_state.get_bots() if bot.id != self._bot_id]
+        dead = sum(1 for bot in enemies if not bot.is_alive)
+        return DRAW + (WIN - DRAW) * dead / len(enemies) / 2
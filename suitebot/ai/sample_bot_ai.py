@@ -2,6 +2,7 @@ import itertools
 from typing import Iterator
 
 from suitebot.ai.bot_ai import BotAi
+from suitebot.ai.deadline import Deadline
 from suitebot.game.direction import DOWN, ALL_DIRECTIONS
 from suitebot.game.game_state import GameState
 from suitebot.game.move import Move
@@ -19,7 +20,7 @@ class SampleBotAi(BotAi):
     _bot_id = None  # type: int
     _game_state = None  # type: GameState
 
-    def make_move(self, bot_id: int, game_state: GameState) -> Move:
+    def make_move(self, bot_id: int, game_state: GameState, deadline: Deadline = None) -> Move:
         """If a treasure is close (distance 1), go to it;
         otherwise, if a battery is close, go to it;
         otherwise, if a treasure is reachable (distance 2), go to it;
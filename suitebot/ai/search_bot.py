@@ -0,0 +1,339 @@
+import itertools
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from suitebot.ai.airbot import Airbot, DEFAULT_MOVE, SINGLE_MOVES, STRAIGHT_DOUBLE_MOVES, DETOUR_DOUBLE_MOVES
+from suitebot.ai.bot_ai import BotAi
+from suitebot.ai.deadline import Deadline
+from suitebot.ai.transposition_table import TranspositionTable, ZobristHasher, EXACT, LOWER_BOUND, UPPER_BOUND
+from suitebot.game.direction import neighbor_table, direction_ordinal
+from suitebot.game.game_state import GameState, FREE
+from suitebot.game.move import Move
+
+BOT_NAME = 'Searchbot'
+
+# search depth (in turns) without a deadline; with one, the search deepens until it expires
+DEFAULT_MAX_DEPTH = 2
+DEADLINE_MAX_DEPTH = 64
+
+WIN = 1e6
+LOSS = -1e6
+DRAW = LOSS / 2
+
+# the evaluation compares the areas reachable by the bots, up to this many cells each
+EVALUATION_AREA_LIMIT = 128
+
+# how many nodes are searched between deadline checks
+DEADLINE_CHECK_INTERVAL = 64
+# pondering checks every node, so that it stops right away when the next request arrives
+PONDER_CHECK_INTERVAL = 1
+
+# pondering searches the positions after our move and these many likeliest moves of each opponent
+PONDER_REPLIES = 2
+# and at most this many of the resulting positions, the likeliest first
+PONDER_MAX_POSITIONS = 4
+
+SEARCH_MOVES = SINGLE_MOVES + STRAIGHT_DOUBLE_MOVES + DETOUR_DOUBLE_MOVES
+
+
+class SearchBot(BotAi):
+    """Iterative-deepening alpha-beta search over simultaneous moves.
+
+    The search is paranoid: every turn, the opponents jointly pick the reply
+    that is worst for us, knowing our move; the moves of the turn are then
+    played simultaneously (GameState.apply_moves).  Opponents only play
+    single moves, and opponents too far away to interact with us within the
+    remaining depth are left out of the search.
+
+    Positions are cached in a Zobrist-hashed transposition table that is
+    kept from turn to turn; our moves at the root are ordered by Airbot's
+    scores, and the best move of the previous iteration (or of the table)
+    is always searched first.  A position the table has an exact result of
+    is deepened from where that search stopped.
+
+    While pondering, the positions expected after our move - the opponents
+    playing the moves Airbot likes best for them - are searched deeper and
+    deeper, in turns, into the same table: if one of them is the next
+    position, its search starts warm.
+    """
+
+    thread_safe = True
+
+    def __init__(self, max_depth: int = DEFAULT_MAX_DEPTH, transposition_table: TranspositionTable = None) -> None:
+        self._max_depth = max_depth
+        # (an empty table is falsy)
+        self._transposition_table = transposition_table if transposition_table is not None else TranspositionTable()
+
+    def make_move(self, bot_id: int, game_state: GameState, deadline: Deadline = None) -> Move:
+        if bot_id not in game_state.get_live_bot_ids():
+            return DEFAULT_MOVE
+        search = _Search(bot_id, game_state, self._transposition_table, deadline)
+        max_depth = DEADLINE_MAX_DEPTH if deadline else self._max_depth
+        return search.run(max_depth) or DEFAULT_MOVE
+
+    def ponder(self, bot_id: int, game_state: GameState, move: Move, deadline: Deadline) -> None:
+        expected_moves = _expected_moves(bot_id, game_state, move, deadline)
+        root_moves = {}  # type: Dict[int, List[Move]]
+        for depth in range(1, DEADLINE_MAX_DEPTH + 1):
+            for (i, moves) in enumerate(expected_moves):
+                if deadline.is_expired():
+                    return
+                game_state.apply_moves(moves)
+                try:
+                    live_bot_ids = game_state.get_live_bot_ids()
+                    if bot_id not in live_bot_ids or len(live_bot_ids) == 1:
+                        continue
+                    search = _Search(bot_id, game_state, self._transposition_table, deadline, PONDER_CHECK_INTERVAL)
+                    if i not in root_moves:
+                        root_moves[i] = search.ordered_root_moves()
+                        if deadline.is_expired():
+                            return
+                    search.run(depth, root_moves[i])
+                finally:
+                    game_state.undo()
+
+    def get_name(self) -> str:
+        return BOT_NAME
+
+
+def _expected_moves(bot_id: int, game_state: GameState, move: Move, deadline: Deadline) -> List[Dict[int, Move]]:
+    """Returns our move combined with the likeliest replies of the opponents, the likeliest combinations first."""
+    enemy_replies = []
+    for enemy_id in game_state.get_live_bot_ids():
+        if enemy_id == bot_id:
+            continue
+        if deadline.is_expired():
+            return []
+        scored_moves = sorted(Airbot().score_moves(enemy_id, game_state, deadline), key=lambda elem: -elem[1])
+        replies = scored_moves[:PONDER_REPLIES] or [(DEFAULT_MOVE, 0.0)]
+        enemy_replies.append([(enemy_id, reply, score) for (reply, score) in replies])
+    combinations = sorted(itertools.product(*enemy_replies), key=lambda replies: -sum(elem[2] for elem in replies))
+    expected_moves = []
+    for replies in combinations[:PONDER_MAX_POSITIONS]:
+        moves = {enemy_id: reply for (enemy_id, reply, score) in replies}
+        moves[bot_id] = move
+        expected_moves.append(moves)
+    return expected_moves
+
+
+class _SearchTimeout(Exception):
+    pass
+
+
+class _Search:
+    """A single search; the game state is modified during the search and restored afterwards."""
+
+    def __init__(self, bot_id: int, game_state: GameState, transposition_table: TranspositionTable,
+                 deadline: Optional[Deadline], check_interval: int = DEADLINE_CHECK_INTERVAL) -> None:
+        self._bot_id = bot_id
+        self._game_state = game_state
+        self._transposition_table = transposition_table
+        self._deadline = deadline
+        self._check_interval = check_interval
+        self._width = game_state.get_plan_width()
+        self._height = game_state.get_plan_height()
+        self._neighbors = neighbor_table(self._width, self._height)
+        self._grid = game_state.get_grid()
+        self._hasher = ZobristHasher(self._width, self._height)
+        self._nodes = 0
+
+    def ordered_root_moves(self) -> List[Move]:
+        """Returns our safe moves, ordered by Airbot's scores (as far as they got before the deadline)."""
+        scored_moves = Airbot().score_moves(self._bot_id, self._game_state, self._deadline)
+        return [move for (move, score) in sorted(scored_moves, key=lambda elem: -elem[1])]
+
+    def run(self, max_depth: int, root_moves: List[Move] = None) -> Optional[Move]:
+        """Deepens the search up to max_depth; returns the best move, None if there is no safe move.
+
+        :param root_moves: our moves in the order to search them, reordered by the search
+        """
+        if root_moves is None:
+            root_moves = self.ordered_root_moves()
+        if not root_moves:
+            return None
+        best_move = root_moves[0]
+        # the table may hold searches of other bots, e.g. of another seat of the same game
+        position_hash = self._hasher.hash(self._game_state) ^ self._hasher.perspective_key(self._bot_id)
+        first_depth = 1
+        entry = self._transposition_table.get(position_hash)
+        if entry is not None and entry.flag == EXACT and entry.best_move is not None \
+                and entry.best_move in root_moves:
+            # searched before (e.g. while pondering): go on from there
+            best_move = entry.best_move
+            root_moves.remove(best_move)
+            root_moves.insert(0, best_move)
+            first_depth = entry.depth + 1
+        if self._deadline:
+            self._deadline.update_best_move(best_move)
+        for depth in range(first_depth, max_depth + 1):
+            try:
+                value, move = self._max_node(depth, LOSS * 2, WIN * 2, position_hash, root_moves)
+            except _SearchTimeout:
+                break
+            best_move = move
+            if self._deadline:
+                self._deadline.update_best_move(best_move)
+            root_moves.remove(best_move)
+            root_moves.insert(0, best_move)
+            if abs(value) >= WIN:
+                break    # the outcome is decided
+        return best_move
+
+    def _max_node(self, depth: int, alpha: float, beta: float, position_hash: int,
+                  moves: List[Move] = None) -> Tuple[float, Optional[Move]]:
+        """Our turn: returns the value of the position and our best move."""
+        self._nodes += 1
+        if self._deadline and self._nodes % self._check_interval == 0 and self._deadline.is_expired():
+            raise _SearchTimeout()
+
+        entry = self._transposition_table.get(position_hash)
+        table_move = None
+        if entry is not None:
+            table_move = entry.best_move
+            if entry.depth >= depth and moves is None:
+                if entry.flag == EXACT:
+                    return entry.value, entry.best_move
+                if entry.flag == LOWER_BOUND:
+                    alpha = max(alpha, entry.value)
+                elif entry.flag == UPPER_BOUND:
+                    beta = min(beta, entry.value)
+                if alpha >= beta:
+                    return entry.value, entry.best_move
+
+        if depth == 0:
+            return self._evaluate(), None
+
+        if moves is None:
+            moves = self._safe_moves(self._bot_id)
+            if not moves:
+                return LOSS - depth, None
+            if table_move is not None and table_move in moves:
+                moves.remove(table_move)
+                moves.insert(0, table_move)
+
+        original_alpha = alpha
+        best_value = None
+        best_move = None
+        for move in moves:
+            value = self._min_node(move, depth, alpha, beta, position_hash)
+            if best_value is None or value > best_value:
+                best_value = value
+                best_move = move
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= original_alpha:
+            flag = UPPER_BOUND
+        elif best_value >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        self._transposition_table.put(position_hash, depth, best_value, flag, best_move)
+        return best_value, best_move
+
+    def _min_node(self, our_move: Move, depth: int, alpha: float, beta: float, position_hash: int) -> float:
+        """The opponents' reply to our move: returns the value of the worst outcome for us."""
+        worst_value = None
+        for enemy_moves in self._enemy_joint_moves(depth):
+            moves = dict(enemy_moves)
+            moves[self._bot_id] = our_move
+            heads = self._live_heads()
+            self._game_state.apply_moves(moves)
+            try:
+                child_hash = self._child_hash(position_hash, heads)
+                value = self._value_after_moves(depth, alpha, beta if worst_value is None else min(beta, worst_value),
+                                                child_hash)
+            finally:
+                self._game_state.undo()
+            if worst_value is None or value < worst_value:
+                worst_value = value
+            if worst_value <= alpha:
+                break
+        return worst_value
+
+    def _value_after_moves(self, depth: int, alpha: float, beta: float, position_hash: int) -> float:
+        live_bot_ids = self._game_state.get_live_bot_ids()
+        if self._bot_id not in live_bot_ids:
+            return (DRAW if len(live_bot_ids) == 0 else LOSS) - depth
+        if len(live_bot_ids) == 1:
+            return WIN + depth
+        value, _ = self._max_node(depth - 1, alpha, beta, position_hash)
+        return value
+
+    def _safe_moves(self, bot_id: int) -> List[Move]:
+        return [move for move in SEARCH_MOVES if self._is_safe(bot_id, move)]
+
+    def _is_safe(self, bot_id: int, move: Move) -> bool:
+        cell = self._head(bot_id)
+        for step in (move.step1, move.step2):
+            if step is None:
+                break
+            cell = self._neighbors[direction_ordinal(step)][cell]
+            if self._grid[cell] != FREE:
+                return False
+        return True
+
+    def _enemy_joint_moves(self, depth: int) -> List[Tuple[Tuple[int, Move], ...]]:
+        our_head = self._head(self._bot_id)
+        enemy_moves = []
+        for bot_id in self._game_state.get_live_bot_ids():
+            if bot_id == self._bot_id:
+                continue
+            # two bots get at most 4 cells closer to each other per turn
+            if self._distance(our_head, self._head(bot_id)) > 4 * depth:
+                continue
+            moves = [move for move in SINGLE_MOVES if self._is_safe(bot_id, move)] or [DEFAULT_MOVE]
+            enemy_moves.append([(bot_id, move) for move in moves])
+        return list(itertools.product(*enemy_moves))
+
+    def _head(self, bot_id: int) -> int:
+        xs, ys = self._game_state.get_bot(bot_id).get_segment_coordinates()
+        return ys[-1] * self._width + xs[-1]
+
+    def _distance(self, cell1: int, cell2: int) -> int:
+        dx = abs(cell1 % self._width - cell2 % self._width)
+        dy = abs(cell1 // self._width - cell2 // self._width)
+        return min(dx, self._width - dx) + min(dy, self._height - dy)
+
+    def _live_heads(self) -> List[Tuple[int, int, int]]:
+        """Returns (bot ID, segment count, head cell) of every live bot."""
+        return [
+            (bot_id, self._game_state.get_bot(bot_id).get_segment_count(), self._head(bot_id))
+            for bot_id in self._game_state.get_live_bot_ids()
+        ]
+
+    def _child_hash(self, position_hash: int, heads: List[Tuple[int, int, int]]) -> int:
+        """Updates the hash of the position before apply_moves() with what the moves changed."""
+        hasher = self._hasher
+        width = self._width
+        for (bot_id, segment_count, head) in heads:
+            bot = self._game_state.get_bot(bot_id)
+            position_hash ^= hasher.head_key(bot_id, head)
+            xs, ys = bot.get_segment_coordinates()
+            for i in range(segment_count, len(xs)):
+                position_hash ^= hasher.cell_key(ys[i] * width + xs[i])
+            if bot.is_alive:
+                position_hash ^= hasher.head_key(bot_id, ys[-1] * width + xs[-1])
+        return position_hash
+
+    def _evaluate(self) -> float:
+        """Our reachable area minus the biggest reachable area of an opponent."""
+        our_area = self._reachable_area(self._head(self._bot_id))
+        enemy_area = max((self._reachable_area(self._head(bot_id))
+                          for bot_id in self._game_state.get_live_bot_ids() if bot_id != self._bot_id), default=0)
+        return float(our_area - enemy_area)
+
+    def _reachable_area(self, start: int) -> int:
+        grid = self._grid
+        neighbors = self._neighbors
+        visited = {start}
+        queue = deque((start,))
+        while queue and len(visited) <= EVALUATION_AREA_LIMIT:
+            cell = queue.popleft()
+            for direction_neighbors in neighbors:
+                neighbor = direction_neighbors[cell]
+                if grid[neighbor] == FREE and neighbor not in visited:
+                    visited.add(neighbor)
+                    queue.append(neighbor)
+        return len(visited) - 1
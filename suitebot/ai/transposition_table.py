@@ -0,0 +1,105 @@
+import random
+import threading
+from functools import lru_cache, reduce
+from itertools import compress
+from operator import xor
+from typing import Dict, Optional, Tuple, NamedTuple
+
+from suitebot.game.game_state import GameState
+from suitebot.game.move import Move
+
+HASH_MASK = (1 << 64) - 1
+_HEAD_MIXER = 0x9E3779B97F4A7C15
+
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+DEFAULT_MAX_ENTRIES = 1 << 18
+
+TranspositionEntry = NamedTuple('TranspositionEntry', [
+    ('depth', int),
+    ('value', float),
+    ('flag', int),
+    ('best_move', Optional[Move]),
+])
+
+
+@lru_cache(maxsize=16)
+def _cell_keys(cell_count: int) -> Tuple[int, ...]:
+    rng = random.Random(cell_count)
+    return tuple(rng.getrandbits(64) for _ in range(cell_count))
+
+
+@lru_cache(maxsize=16)
+def _perspective_key(bot_id: int) -> int:
+    return random.Random(-1 - bot_id).getrandbits(64)
+
+
+class ZobristHasher:
+    """Zobrist hashing of positions: occupied cells plus the heads of the live bots.
+
+    The hash of a position is the XOR of a random key of every occupied cell
+    and of every live bot's head (bot ID, cell), so that a move changes the
+    hash by XOR-ing in just the keys of the cells it touches.  The results of
+    a search are from the point of view of the searching bot: XOR-ing in its
+    perspective key keeps the searches of different bots apart in one table.
+    """
+
+    def __init__(self, plan_width: int, plan_height: int) -> None:
+        self._cell_keys = _cell_keys(plan_width * plan_height)
+
+    def cell_key(self, cell: int) -> int:
+        return self._cell_keys[cell]
+
+    def head_key(self, bot_id: int, cell: int) -> int:
+        return ((self._cell_keys[cell] ^ (bot_id + 1)) * _HEAD_MIXER) & HASH_MASK
+
+    def perspective_key(self, bot_id: int) -> int:
+        return _perspective_key(bot_id)
+
+    def hash(self, game_state: GameState) -> int:
+        """Computes the hash of the position from scratch."""
+        grid = game_state.get_grid()
+        value = reduce(xor, compress(self._cell_keys, grid), 0)
+        width = game_state.get_plan_width()
+        for bot_id in game_state.get_live_bot_ids():
+            location = game_state.get_bot_location(bot_id)
+            if location is not None:
+                value ^= self.head_key(bot_id, location.y * width + location.x)
+        return value
+
+
+class TranspositionTable:
+    """Search results by position hash, holding at most max_entries positions.
+
+    Deeper results are never replaced by shallower ones of the same position;
+    once the table is full, the oldest entries are evicted first.  Searches
+    in several threads may share a table.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self._max_entries = max_entries
+        self._entries = {}  # type: Dict[int, TranspositionEntry]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, position_hash: int) -> Optional[TranspositionEntry]:
+        return self._entries.get(position_hash)
+
+    def put(self, position_hash: int, depth: int, value: float, flag: int, best_move: Optional[Move]) -> None:
+        entries = self._entries
+        with self._lock:
+            existing = entries.pop(position_hash, None)
+            if existing is not None and existing.depth > depth:
+                entries[position_hash] = existing
+                return
+            entries[position_hash] = TranspositionEntry(depth, value, flag, best_move)
+            if len(entries) > self._max_entries:
+                del entries[next(iter(entries))]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,89 @@
+from array import array
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from suitebot.ai.chambers import ChamberAnalysis
+from suitebot.ai.deadline import Deadline
+from suitebot.game.direction import neighbor_table, direction_ordinal
+from suitebot.game.game_state import GameState, FREE
+from suitebot.game.move import Move
+
+
+class TurnContext:
+    """What a turn's move suppliers and score calculators share: the game state and memoized facts about it.
+
+    A context is created for one make_move call and dropped afterwards, so
+    nothing is carried over between turns, or between concurrent games.
+    The facts cheap to get are computed upfront; the others on first use.
+    """
+
+    def __init__(self, bot_id: int, game_state: GameState, deadline: Deadline = None) -> None:
+        self.bot_id = bot_id
+        self.game_state = game_state
+        # the deadline of the turn, None if there is none
+        self.deadline = deadline  # type: Optional[Deadline]
+        self.width = game_state.get_plan_width()
+        self.height = game_state.get_plan_height()
+        self.neighbors = neighbor_table(self.width, self.height)  # type: Tuple[array, ...]
+        self.grid = game_state.get_grid()
+        self.live_bot_ids = frozenset(game_state.get_live_bot_ids())
+        # our head, None if we are dead
+        self.head = self._head_of(bot_id) if bot_id in self.live_bot_ids else None  # type: Optional[int]
+        self._enemy_heads = None  # type: Optional[FrozenSet[int]]
+        self._enemy_zone = None  # type: Optional[FrozenSet[int]]
+        self._move_destinations = {}  # type: Dict[Move, Tuple[int, ...]]
+        self._blocked_neighbor_counts = {}  # type: Dict[int, int]
+        self._chambers = None  # type: Optional[ChamberAnalysis]
+
+    def is_dead(self) -> bool:
+        return self.head is None
+
+    def _head_of(self, bot_id: int) -> Optional[int]:
+        xs, ys = self.game_state.get_bot(bot_id).get_segment_coordinates()
+        return ys[-1] * self.width + xs[-1] if xs else None
+
+    def enemy_heads(self) -> FrozenSet[int]:
+        """Returns the grid indices of the heads of the live enemies."""
+        if self._enemy_heads is None:
+            heads = (self._head_of(bot_id) for bot_id in self.live_bot_ids if bot_id != self.bot_id)
+            self._enemy_heads = frozenset(head for head in heads if head is not None)
+        return self._enemy_heads
+
+    def enemy_zone(self) -> FrozenSet[int]:
+        """Returns the cells next to the heads of the live enemies, i.e. the cells they can move to."""
+        if self._enemy_zone is None:
+            self._enemy_zone = frozenset(
+                neighbors[head] for head in self.enemy_heads() for neighbors in self.neighbors)
+        return self._enemy_zone
+
+    def destinations(self, move: Move) -> Tuple[int, ...]:
+        """Returns the grid indices of the cells we pass through when playing the move."""
+        destinations = self._move_destinations.get(move)
+        if destinations is None:
+            dest = self.head
+            cells = []
+            for step in (move.step1, move.step2):
+                if not step:
+                    continue
+                dest = self.neighbors[direction_ordinal(step)][dest]
+                cells.append(dest)
+            destinations = self._move_destinations[move] = tuple(cells)
+        return destinations
+
+    def destination(self, move: Move) -> int:
+        """Returns the grid index of the cell where the move ends."""
+        return self.destinations(move)[-1]
+
+    def blocked_neighbor_count(self, index: int) -> int:
+        """Returns the number of blocked cells next to the cell."""
+        count = self._blocked_neighbor_counts.get(index)
+        if count is None:
+            grid = self.grid
+            count = self._blocked_neighbor_counts[index] = sum(
+                1 for neighbors in self.neighbors if grid[neighbors[index]] != FREE)
+        return count
+
+    def chambers(self) -> ChamberAnalysis:
+        """Returns the chamber analysis of the space we can reach."""
+        if self._chambers is None:
+            self._chambers = ChamberAnalysis(self.game_state, self.bot_id)
+        return self._chambers
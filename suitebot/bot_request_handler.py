@@ -1,26 +1,220 @@
+import threading
+from concurrent.futures import Future, TimeoutError
+from time import perf_counter
+from typing import List, Optional, Tuple
+
 from suitebot import json_util
 from suitebot.ai.bot_ai import BotAi
+from suitebot.ai.deadline import Deadline
+from suitebot.game.direction import ALL_DIRECTIONS, DOWN
+from suitebot.game_session import GameSessionCache
+from suitebot.game.game_state import GameState
+from suitebot.game.move import Move
+from suitebot.request_profiler import RequestProfiler
 from suitebot.server.simple_request_handler import SimpleRequestHandler
+from suitebot.server.stats import ServerStats, PARSE_PHASE, GAME_STATE_PHASE, MAKE_MOVE_PHASE
 
 NAME_REQUEST = "NAME"
+PROFILE_REQUEST = "PROFILE"
+MOVE_REQUEST_TYPE = "MOVE"
+# errors of the AI while pondering are recorded under this request type
+PONDER_REQUEST_TYPE = "PONDER"
+
+# played when the AI overruns its deadline without having recorded any move, and no single move is safe either
+FALLBACK_MOVE = Move(DOWN)
+
+# part of the time budget reserved for sending the response
+DEADLINE_SAFETY_MARGIN = 0.01
+
+# pondering stops after this many seconds even if no request arrives
+PONDER_TIME_LIMIT = 60.0
 
 
 class BotRequestHandler(SimpleRequestHandler):
-    def __init__(self, bot_ai: BotAi) -> None:
+    def __init__(self, bot_ai: BotAi, time_budget: float = None, stats: ServerStats = None,
+                 profiler: RequestProfiler = None, sessions: GameSessionCache = None, ponder: bool = False) -> None:
+        """
+        :param bot_ai: the AI making the moves
+        :param time_budget: default time budget of a move in seconds, used when the
+                            request does not specify its own; None for no limit
+        :param stats: statistics to record errors and phase latencies in, usually
+                      shared with the server
+        :param profiler: profiler of the AI's moves; "PROFILE <count>" requests are
+                         only accepted if there is one
+        :param sessions: cache of the game states of the games in progress, updated
+                         incrementally from request to request; None to build every
+                         game state from scratch
+        :param ponder: let the AI ponder (BotAi.ponder) after each move it made,
+                       until the next request arrives
+        """
         self._bot_ai = bot_ai
+        self._time_budget = time_budget
+        self._stats = stats or ServerStats()
+        self._profiler = profiler
+        self._sessions = sessions
+        self._ponder = ponder
+        # guards the pondering state and the overrunning AI threads below, so that pondering never overlaps the
+        # processing of a request, nor an AI overrunning its deadline
+        self._lock = threading.Lock()
+        # the number of requests being processed
+        self._active_requests = 0
+        # the last move request and its (bot ID, game state, move), to ponder once its response has been sent
+        self._ponder_position = None  # type: Optional[Tuple[str, Tuple[int, GameState, Move]]]
+        self._pondering = None  # type: Optional[Tuple[threading.Thread, Deadline]]
+        # the threads of the AI still making moves past their deadlines
+        self._overrunning = []  # type: List[threading.Thread]
 
     def process_request(self, request: str) -> str:
+        # the AI (and the game state) are needed again: stop pondering first
+        with self._lock:
+            self._active_requests += 1
+            pondering = self._take_pondering()
+        self._stop(pondering)
         try:
             return self._process_request_internal(request)
         except Exception as e:
+            self._stats.record_error(self.get_request_type(request))
             return 'ERROR: ' + str(e)
+        finally:
+            with self._lock:
+                self._active_requests -= 1
+
+    def on_response_sent(self, request: str) -> None:
+        with self._lock:
+            if self._ponder_position is None or self._ponder_position[0] != request:
+                return
+            position = self._ponder_position[1]
+            self._ponder_position = None
+            if self._active_requests or self._pondering is not None or self._is_overrunning():
+                # another request is being processed, or the last move still is: they need the AI
+                return
+            deadline = Deadline(PONDER_TIME_LIMIT)
+            thread = threading.Thread(target=self._run_ponder, args=position + (deadline,), daemon=True)
+            thread.start()
+            self._pondering = (thread, deadline)
+
+    def stop_pondering(self) -> None:
+        """Cancels pondering and waits until the AI has stopped."""
+        with self._lock:
+            pondering = self._take_pondering()
+        self._stop(pondering)
+
+    def _take_pondering(self) -> Optional[Tuple[threading.Thread, Deadline]]:
+        pondering = self._pondering
+        self._pondering = None
+        return pondering
+
+    @staticmethod
+    def _stop(pondering: Optional[Tuple[threading.Thread, Deadline]]) -> None:
+        # (joined without holding the lock: other requests need not wait for it)
+        if pondering is None:
+            return
+        thread, deadline = pondering
+        deadline.cancel()
+        thread.join()
+
+    def _is_overrunning(self) -> bool:
+        self._overrunning = [thread for thread in self._overrunning if thread.is_alive()]
+        return bool(self._overrunning)
+
+    def _run_ponder(self, bot_id: int, game_state: GameState, move: Move, deadline: Deadline) -> None:
+        try:
+            self._bot_ai.ponder(bot_id, game_state, move, deadline)
+        except Exception:
+            self._stats.record_error(PONDER_REQUEST_TYPE)
+
+    def get_request_type(self, request: str) -> str:
+        if request == NAME_REQUEST:
+            return NAME_REQUEST
+        if request.startswith(PROFILE_REQUEST):
+            return PROFILE_REQUEST
+        return MOVE_REQUEST_TYPE
 
     def _process_request_internal(self, request: str) -> str:
         if request == NAME_REQUEST:
             return self._bot_ai.get_name()
+        if request.startswith(PROFILE_REQUEST):
+            return self._process_profile_request(request)
         return self._process_move_request(request)
 
+    def _process_profile_request(self, request: str) -> str:
+        if self._profiler is None:
+            raise ValueError("profiling is not enabled")
+        count = request[len(PROFILE_REQUEST):].strip()
+        self._profiler.profile_next(int(count) if count else 1)
+        return 'OK'
+
     def _process_move_request(self, request: str) -> str:
-        bot_id, game_state = json_util.bot_id_and_game_state_from_json(request)
-        move = self._bot_ai.make_move(bot_id, game_state)
+        started = perf_counter()
+        move_request = json_util.parse_move_request(request)
+        deadline = self._create_deadline(json_util.time_budget_from_move_request(move_request))
+        parsed = perf_counter()
+        if self._sessions is not None:
+            bot_id, game_state = self._sessions.bot_id_and_game_state_from_move_request(move_request)
+        else:
+            bot_id, game_state = json_util.bot_id_and_game_state_from_move_request(move_request)
+        created = perf_counter()
+        profile = self._profiler is not None and self._profiler.should_profile()
+        move = self._make_move(bot_id, game_state, deadline, profile)
+        finished = perf_counter()
+        if self._ponder and move is not None:
+            with self._lock:
+                self._ponder_position = (request, (bot_id, game_state, move))
+        self._stats.record_latency(MOVE_REQUEST_TYPE, PARSE_PHASE, parsed - started)
+        self._stats.record_latency(MOVE_REQUEST_TYPE, GAME_STATE_PHASE, created - parsed)
+        self._stats.record_latency(MOVE_REQUEST_TYPE, MAKE_MOVE_PHASE, finished - created)
         return str(move)
+
+    def _create_deadline(self, request_time_budget: Optional[float]) -> Optional[Deadline]:
+        time_budget = request_time_budget if request_time_budget is not None else self._time_budget
+        if time_budget is None:
+            return None
+        return Deadline(max(0.0, time_budget - DEADLINE_SAFETY_MARGIN))
+
+    def _make_move(self, bot_id: int, game_state: GameState, deadline: Optional[Deadline],
+                   profile: bool = False) -> Optional[Move]:
+        if deadline is None:
+            return self._call_ai(bot_id, game_state, deadline, profile)
+
+        # chosen before the AI starts changing the game state
+        fallback_move = _safe_move(bot_id, game_state)
+
+        # the AI runs in its own thread so that the deadline holds even if the AI overruns it
+        future = Future()
+
+        def make_move():
+            try:
+                future.set_result(self._call_ai(bot_id, game_state, deadline, profile))
+            except Exception as e:
+                future.set_exception(e)
+
+        thread = threading.Thread(target=make_move, daemon=True)
+        thread.start()
+        try:
+            return future.result(timeout=deadline.remaining())
+        except TimeoutError:
+            # the AI is still busy with the move and the game state: the game state is left to it, and the
+            # game's next request rebuilds its own
+            with self._lock:
+                self._overrunning.append(thread)
+            if self._sessions is not None:
+                self._sessions.discard(game_state)
+            return deadline.get_best_move() or fallback_move
+
+    def _call_ai(self, bot_id: int, game_state: GameState, deadline: Optional[Deadline], profile: bool) -> Optional[Move]:
+        if profile:
+            return self._profiler.profile(self._bot_ai.make_move, bot_id, game_state, deadline)
+        return self._bot_ai.make_move(bot_id, game_state, deadline)
+
+
+def _safe_move(bot_id: int, game_state: GameState) -> Move:
+    """Returns a single move of the bot into a free cell, FALLBACK_MOVE if there is none."""
+    location = game_state.get_bot_location(bot_id)
+    if location is None:
+        return FALLBACK_MOVE
+    width = game_state.get_plan_width()
+    height = game_state.get_plan_height()
+    for direction in ALL_DIRECTIONS:
+        if game_state.is_free(direction.destination_from(location, height=height, width=width)):
+            return Move(direction)
+    return FALLBACK_MOVE
@@ -1,26 +1,104 @@
+import argparse
+import functools
 import sys
-from typing import List
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 
-#from suitebot.ai.sample_bot_ai import SampleBotAi
 from suitebot.ai.airbot import Airbot
+from suitebot.ai.mcts_bot import MctsBot
+from suitebot.ai.sample_bot_ai import SampleBotAi
+from suitebot.ai.search_bot import SearchBot
 from suitebot.bot_request_handler import BotRequestHandler
+from suitebot.game_session import GameSessionCache
+from suitebot.request_profiler import RequestProfiler, OUTPUT_FORMATS, PSTATS_FORMAT
+from suitebot.server.async_server import AsyncServer
+from suitebot.server.prefork_server import PreforkServer
 from suitebot.server.simple_server import SimpleServer
+from suitebot.server.stats import ServerStats
 
 DEFAULT_PORT = 9001
 
+SIMPLE_SERVER = 'simple'
+ASYNC_SERVER = 'async'
+PREFORK_SERVER = 'prefork'
+SERVER_MODES = (SIMPLE_SERVER, ASYNC_SERVER, PREFORK_SERVER)
 
-def _determine_port(args: List[str]) -> int:
-    if len(args) == 1:
-        return int(args[0])
-    else:
-        return DEFAULT_PORT
+# AIs selectable with --ai, by name
+BOT_AIS = OrderedDict([
+    ('airbot', Airbot),
+    ('airbot-chambers', functools.partial(Airbot, chamber_analysis=True)),
+    ('search', SearchBot),
+    ('mcts', MctsBot),
+    ('sample', SampleBotAi),
+])
+DEFAULT_AI = 'airbot'
 
+# worker threads of the async server for a thread-safe AI: the moves of different games share one core (the GIL),
+# so a slow move no longer holds up the others, but moves made at the same time each take longer
+DEFAULT_ASYNC_WORKERS = 4
 
-if __name__ == "__main__":
-    #bot_ai = SampleBotAi() # replace with your own AI
-    bot_ai = Airbot() # replace with your own AI
 
-    port = _determine_port(sys.argv[1:])
+def _parse_args(args: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='suitebot.bot_server')
+    parser.add_argument('port', type=int, nargs='?', default=DEFAULT_PORT)
+    parser.add_argument('--ai', choices=BOT_AIS, default=DEFAULT_AI,
+                        help='the AI playing the moves (default: %(default)s)')
+    parser.add_argument('--server', choices=SERVER_MODES, default=SIMPLE_SERVER,
+                        help='server implementation (default: %(default)s)')
+    parser.add_argument('--keep-alive', action='store_true',
+                        help='serve many newline-delimited requests per connection')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='number of worker processes of the prefork server (default: CPU count), or of '
+                             'worker threads of the async server (default: %i for a thread-safe AI, 1 otherwise)'
+                             % DEFAULT_ASYNC_WORKERS)
+    parser.add_argument('--time-budget', type=int, default=None, metavar='MS',
+                        help='time budget of a move in milliseconds, unless the request sets its own')
+    parser.add_argument('--profile-dir', default=None,
+                        help='enable profiling of moves, writing the profiles to this directory')
+    parser.add_argument('--profile-format', choices=OUTPUT_FORMATS, default=PSTATS_FORMAT,
+                        help='format of the profiles (default: %(default)s)')
+    parser.add_argument('--profile-next', type=int, default=0, metavar='N',
+                        help='profile the first N moves; more can be requested with "PROFILE <N>"')
+    parser.add_argument('--profile-sample', type=float, default=0.0, metavar='RATE',
+                        help='profile a random sample of moves, e.g. 0.01 for 1%% of them')
+    parser.add_argument('--sessions', action='store_true',
+                        help='keep the game states of games in progress and only apply what changed between moves')
+    parser.add_argument('--ponder', action='store_true',
+                        help='let the AI think ahead between its move and the next request')
+    return parser.parse_args(args)
+
+
+def _create_profiler(options: argparse.Namespace) -> Optional[RequestProfiler]:
+    if options.profile_dir is None:
+        return None
+    profiler = RequestProfiler(options.profile_dir, options.profile_format, sample_rate=options.profile_sample)
+    profiler.profile_next(options.profile_next)
+    return profiler
+
+
+def _create_server(options: argparse.Namespace, request_handler: BotRequestHandler, stats: ServerStats,
+                   thread_safe: bool = False):
+    if options.server == ASYNC_SERVER:
+        workers = options.workers or (DEFAULT_ASYNC_WORKERS if thread_safe else 1)
+        executor = ThreadPoolExecutor(max_workers=workers)
+        return AsyncServer(options.port, request_handler, executor=executor, keep_alive=options.keep_alive,
+                           stats=stats)
+    if options.server == PREFORK_SERVER:
+        return PreforkServer(options.port, request_handler, workers=options.workers, keep_alive=options.keep_alive,
+                             stats=stats)
+    return SimpleServer(options.port, request_handler, keep_alive=options.keep_alive, stats=stats)
+
+
+if __name__ == "__main__":
+    options = _parse_args(sys.argv[1:])
+    bot_ai = BOT_AIS[options.ai]()
 
-    print("listening on port %i" % port)
-    SimpleServer(port, BotRequestHandler(bot_ai)).run()
+    print("listening on port %i (%s server)" % (options.port, options.server))
+    time_budget = options.time_budget / 1000 if options.time_budget is not None else None
+    stats = ServerStats()
+    request_handler = BotRequestHandler(bot_ai, time_budget=time_budget, stats=stats,
+                                        profiler=_create_profiler(options),
+                                        sessions=GameSessionCache() if options.sessions else None,
+                                        ponder=options.ponder)
+    _create_server(options, request_handler, stats, thread_safe=bot_ai.thread_safe).run()
@@ -1,24 +1,61 @@
-from typing import Iterable
+from array import array
+from typing import Iterable, Callable, Optional, Sequence, Tuple
 
 from suitebot.game.point import Point
 
 
 class Bot:
+    """A bot and its segments (its tail, ending with its head).
+
+    The segments are stored as two compact arrays of coordinates; the Point
+    objects returned by get_segments() are only created on demand and cached
+    until the next segment is added.
+    """
+    __slots__ = ('id', 'name', 'is_alive', 'on_segment_added', '_xs', '_ys', '_segments')
+
     def __init__(self, id: int, name: str, segments: Iterable[Point] = None):
         self.id = id
         self.name = name
-        self._segments = segments or []
+        self._xs = array('i')
+        self._ys = array('i')
+        for point in segments or ():
+            self._xs.append(point.x)
+            self._ys.append(point.y)
+        self._segments = None  # type: Optional[Sequence[Point]]
         self.is_alive = False
+        # called with the coordinates of every added segment; set by the game state the bot belongs to
+        self.on_segment_added = None  # type: Optional[Callable[[int, int], None]]
 
     def add_segment(self, point: Point):
-        self._segments.append(point)
+        self.add_segment_at(point.x, point.y)
+
+    def add_segment_at(self, x: int, y: int):
+        self._xs.append(x)
+        self._ys.append(y)
+        self._segments = None
+        if self.on_segment_added is not None:
+            self.on_segment_added(x, y)
 
-    def get_segments(self) -> Iterable[Point]:
+    def remove_last_segment(self) -> None:
+        """Removes the head, making the previous segment the head again; used to undo moves."""
+        self._xs.pop()
+        self._ys.pop()
+        self._segments = None
+
+    def get_segments(self) -> Sequence[Point]:
+        if self._segments is None:
+            self._segments = list(map(Point, self._xs, self._ys))
         return self._segments
 
+    def get_segment_coordinates(self) -> Tuple[array, array]:
+        """Returns the arrays of the x and y coordinates of the segments; the caller must not modify them."""
+        return self._xs, self._ys
+
+    def get_segment_count(self) -> int:
+        return len(self._xs)
+
     def get_location(self) -> Point:
-        segments = self.get_segments()
-        if segments:
-            return segments[-1]
+        if self._xs:
+            return Point(self._xs[-1], self._ys[-1])
         else:
             return None
@@ -1,4 +1,7 @@
+from array import array
 from enum import Enum
+from functools import lru_cache
+from typing import Tuple
 
 from suitebot.game.point import Point
 
@@ -29,6 +32,10 @@ class Direction(Enum):
                 dest_x -= width
         return Point(dest_x, dest_y)
 
+    def destination_index_from(self, index: int, width: int, height: int) -> int:
+        """Index-based destination_from on a wrapping plan: returns the grid index of the neighbour."""
+        return neighbor_table(width, height)[_DIRECTION_ORDINALS[self]][index]
+
     def __str__(self) -> str:
         return self.name[0].upper()
 
@@ -39,3 +46,28 @@ LEFT = Direction.left
 RIGHT = Direction.right
 
 ALL_DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+
+_DIRECTION_ORDINALS = {direction: i for (i, direction) in enumerate(ALL_DIRECTIONS)}
+
+
+def direction_ordinal(direction: Direction) -> int:
+    """Returns the position of the direction in ALL_DIRECTIONS, i.e. in the neighbor_table."""
+    return _DIRECTION_ORDINALS[direction]
+
+
+@lru_cache(maxsize=16)
+def neighbor_table(width: int, height: int) -> Tuple[array, ...]:
+    """Returns the neighbour indices of all cells of a wrapping plan of the given size.
+
+    The table holds one array per direction, in the order of ALL_DIRECTIONS;
+    table[d][i] is the grid index (y * width + x) of the cell next to the
+    cell with index i in direction d.  Tables are cached per plan size.
+    """
+    table = []
+    for direction in ALL_DIRECTIONS:
+        dx, dy = direction.value
+        table.append(array('i', (
+            ((y + dy) % height) * width + (x + dx) % width
+            for y in range(height)
+            for x in range(width))))
+    return tuple(table)
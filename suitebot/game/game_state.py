@@ -1,22 +1,59 @@
-from typing import Iterable, Dict, Tuple, Optional, FrozenSet
+import re
+from typing import Iterable, Dict, Tuple, Optional, FrozenSet, Set, List
 
-from suitebot.game.point import Point
+from suitebot.game.point import Point, from_index
 from suitebot.game.bot import Bot
+from suitebot.game.direction import neighbor_table, direction_ordinal
+from suitebot.game.move import Move
+
+FREE = 0
+OCCUPIED = 1
+
+_OCCUPIED_CELL_PATTERN = re.compile(bytes([OCCUPIED]))
 
 
 class GameState:
+    """State of the game plan: its size, the static obstacles and the bots.
+
+    The game state keeps an occupancy grid of the plan, one byte per cell at
+    index y * width + x, so that whether a cell is free is an O(1) lookup.
+    The grid is kept up to date as bots (added with add_bot or passed to the
+    constructor) get new segments.
+
+    For look-ahead, moves can be simulated with apply_moves() and rolled back
+    with undo(), which update the grid, the bots' segments and is_alive flags.
+
+    The static obstacles can be given either as points or, cheaper for big
+    plans, as a grid of the same layout (see game_state_factory); in the
+    latter case the points are only created if get_obstacle_locations() is
+    called.
+    """
+
     def __init__(self,
                  plan_width: int,
                  plan_height: int,
                  bots: Dict[int, Bot],
-                 obstacles: Iterable[Point] = ()):
+                 obstacles: Iterable[Point] = (),
+                 static_grid: bytes = None):
 
         self._plan_width = plan_width
         self._plan_height = plan_height
 
         self._bots = bots
 
-        self._static_obstacles = frozenset(obstacles)
+        self._obstacle_locations = None  # type: Optional[FrozenSet[Point]]
+        self._undo_stack = []  # type: List[List[Tuple[Bot, int]]]
+        if static_grid is not None:
+            self._static_grid = static_grid
+            self._static_obstacles = None  # type: Optional[Set[Point]]
+            self._grid = bytearray(static_grid)
+        else:
+            self._static_obstacles = set(obstacles)
+            self._grid = bytearray(plan_width * plan_height)
+            for obstacle in self._static_obstacles:
+                self._occupy(obstacle.x, obstacle.y)
+        for bot in bots.values():
+            self._track_bot(bot)
 
     def get_plan_width(self) -> int:
         """Returns the width of the game plan.
@@ -38,6 +75,36 @@ class GameState:
     def get_bot(self, id: int) -> Bot:
         return self._bots[id]
 
+    def add_bot(self, bot: Bot) -> None:
+        self._bots[bot.id] = bot
+        self._track_bot(bot)
+
+    def add_obstacle(self, point: Point) -> None:
+        """Adds a static obstacle to the game plan."""
+        self._get_static_obstacles().add(point)
+        self._occupy(point.x, point.y)
+
+    def _get_static_obstacles(self) -> Set[Point]:
+        if self._static_obstacles is None:
+            width = self._plan_width
+            self._static_obstacles = {
+                from_index(match.start(), width)
+                for match in _OCCUPIED_CELL_PATTERN.finditer(self._static_grid)
+            }
+        return self._static_obstacles
+
+    def _track_bot(self, bot: Bot) -> None:
+        grid = self._grid
+        width = self._plan_width
+        for (x, y) in zip(*bot.get_segment_coordinates()):
+            grid[y * width + x] = OCCUPIED
+        self._obstacle_locations = None
+        bot.on_segment_added = self._occupy
+
+    def _occupy(self, x: int, y: int) -> None:
+        self._grid[y * self._plan_width + x] = OCCUPIED
+        self._obstacle_locations = None
+
     def get_all_bot_ids(self) -> Tuple[int]:
         """Returns the list of the IDs of all bots, including the dead ones.
 
@@ -62,7 +129,7 @@ class GameState:
         return self.get_bot(bot_id).get_location()
 
     def _generate_obstacle_locations(self) -> Iterable[Point]:
-        for obstacle in self._static_obstacles:
+        for obstacle in self._get_static_obstacles():
             yield obstacle
         for bot in self.get_bots():
             for segment in bot.get_segments():
@@ -71,9 +138,100 @@ class GameState:
     def get_obstacle_locations(self) -> FrozenSet[Point]:
         """Returns the set of coordinates of all obstacles on the game plan.
 
+        The set is built on the first call and cached until a bot moves.
+
         :return the set of coordinates of all obstacles
         """
-        return set(self._generate_obstacle_locations())
+        if self._obstacle_locations is None:
+            self._obstacle_locations = frozenset(self._generate_obstacle_locations())
+        return self._obstacle_locations
+
+    def get_grid(self) -> bytearray:
+        """Returns the occupancy grid: FREE or OCCUPIED per cell, at index y * width + x.
+
+        The grid is live - it changes as the bots move - and must not be modified by the caller.
+
+        :return the occupancy grid
+        """
+        return self._grid
+
+    def is_free(self, point: Point) -> bool:
+        """Tells whether the cell at the given location contains no obstacle.
+
+        :param point: location on the game plan, 0 <= x < width and 0 <= y < height
+        :return True if the cell is free
+        """
+        return self._grid[point.y * self._plan_width + point.x] == FREE
+
+    def is_free_index(self, index: int) -> bool:
+        """Tells whether the cell at the given grid index (y * width + x) contains no obstacle.
+
+        :param index: grid index of the cell
+        :return True if the cell is free
+        """
+        return self._grid[index] == FREE
+
+    def apply_moves(self, moves: Dict[int, Move]) -> None:
+        """Plays a move of each of the given bots simultaneously, following the rules of the game.
+
+        The bots make their first steps at the same time, then the bots playing
+        a double move make their second steps at the same time.  A bot dies
+        when it steps onto an occupied cell (an obstacle, or a segment of any
+        bot including segments added by the previous step) or onto the same
+        cell as another bot in the same step (a head-on crash kills both).
+        A dead bot stays where it was and does not occupy the cell it crashed
+        into.  Dead bots, and live bots without a move, do not move.
+
+        Every call can be rolled back by undo().
+
+        :param moves: the moves of the bots, by bot ID
+        """
+        width = self._plan_width
+        neighbors = neighbor_table(width, self._plan_height)
+        grid = self._grid
+
+        # per moving bot: [bot, current cell, steps (direction ordinals), segments added]
+        movers = []
+        for (bot_id, move) in moves.items():
+            bot = self._bots[bot_id]
+            if not bot.is_alive or move is None or not bot.get_segment_count():
+                continue
+            xs, ys = bot.get_segment_coordinates()
+            steps = (direction_ordinal(move.step1),) if not move.step2 \
+                else (direction_ordinal(move.step1), direction_ordinal(move.step2))
+            movers.append([bot, ys[-1] * width + xs[-1], steps, 0])
+
+        for step in (0, 1):
+            destinations = {}
+            for mover in movers:
+                bot, cell, steps = mover[0], mover[1], mover[2]
+                if step < len(steps) and bot.is_alive:
+                    destinations.setdefault(neighbors[steps[step]][cell], []).append(mover)
+            for (destination, arriving) in destinations.items():
+                if grid[destination] != FREE or len(arriving) > 1:
+                    for mover in arriving:
+                        mover[0].is_alive = False
+                    continue
+                mover = arriving[0]
+                mover[0].add_segment_at(destination % width, destination // width)
+                mover[1] = destination
+                mover[3] += 1
+
+        self._undo_stack.append([(mover[0], mover[3]) for mover in movers])
+        self._obstacle_locations = None
+
+    def undo(self) -> None:
+        """Rolls back the last apply_moves() that has not been rolled back yet."""
+        width = self._plan_width
+        grid = self._grid
+        for (bot, added) in self._undo_stack.pop():
+            xs, ys = bot.get_segment_coordinates()
+            for _ in range(added):
+                grid[ys[-1] * width + xs[-1]] = FREE
+                bot.remove_last_segment()
+            # only live bots move
+            bot.is_alive = True
+        self._obstacle_locations = None
 
     def _assert_known_bot(self, bot_id: int) -> None:
         if bot_id not in self._bots:
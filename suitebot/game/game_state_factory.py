@@ -1,48 +1,69 @@
 from typing import List
 
-from suitebot.game.game_state import GameState
-from suitebot.game.point import Point
+from suitebot.game.game_state import GameState, FREE, OCCUPIED
+from suitebot.game.point import from_index
 from suitebot.game.bot import Bot
 
 OBSTACLE = "*"
 EMPTY = " "
 
+_DIGITS = b"0123456789"
+_VALID_CHARS = (OBSTACLE + EMPTY).encode('ascii') + _DIGITS
+
+# plan characters to static grid cells: obstacles are occupied, bots' heads
+# are occupied by the game state as it tracks the bots' segments
+_STATIC_GRID_TABLE = bytes.maketrans(
+    (OBSTACLE + EMPTY).encode('ascii') + _DIGITS,
+    bytes([OCCUPIED, FREE]) + bytes([FREE]) * len(_DIGITS))
+
 
 def create_from_game_plan_lines(game_plan_lines: List[str]) -> GameState:
-    bot_ids = []
-    bot_location_map = {}
-    obstacles = []
+    """Creates the game state of a plan given as lines of characters.
+
+    The plan is processed a whole line at a time: the lines are joined and
+    translated into the static grid with bytes.translate, and the bots' heads
+    are located with bytes.find; no Point is created for empty cells or
+    obstacles.
+    """
     _assert_rectangular_plan(game_plan_lines)
-    for (y, line) in enumerate(game_plan_lines):
-        for (x, char) in enumerate(line):
-            location = Point(x, y)
-            if char == OBSTACLE:
-                obstacles.append(location)
-            elif char.isdigit():
-                bot_id = int(char)
-                bot_ids.append(bot_id)
-                bot_location_map[bot_id] = location
-            elif char != EMPTY:
-                raise ValueError("unrecognized character: %s" % char)
+    width = len(game_plan_lines[0])
+    plan = ''.join(game_plan_lines).encode('ascii', errors='replace')
+    if plan.translate(None, _VALID_CHARS):
+        _raise_unrecognized_character(game_plan_lines)
+
+    # find bots in the order of their first appearance; a bot appearing
+    # more than once is located at its last appearance
+    first_appearances = []
+    for digit in _DIGITS:
+        first = plan.find(digit)
+        if first >= 0:
+            first_appearances.append((first, digit))
+    first_appearances.sort()
 
     bots = {}
 
     # add bots
-    for bot_id in bot_ids:
-        bot = Bot(id=bot_id, name='Bot #{}'.format(bot_id))
-        if bot_id in bot_location_map:
-            location = bot_location_map[bot_id]
-            bot.add_segment(location)
+    for (first, digit) in first_appearances:
+        bot_id = digit - _DIGITS[0]
+        location = from_index(plan.rfind(digit), width)
+        bot = Bot(id=bot_id, name='Bot #{}'.format(bot_id), segments=[location])
         bots[bot_id] = bot
 
     return GameState(
-        plan_width=len(game_plan_lines[0]),
+        plan_width=width,
         plan_height=len(game_plan_lines),
         bots=bots,
-        obstacles=obstacles,
+        static_grid=plan.translate(_STATIC_GRID_TABLE),
     )
 
 
+def _raise_unrecognized_character(game_plan_lines: List[str]) -> None:
+    for line in game_plan_lines:
+        for char in line:
+            if char not in (OBSTACLE, EMPTY) and not ('0' <= char <= '9'):
+                raise ValueError("unrecognized character: %s" % char)
+
+
 def _assert_rectangular_plan(lines: List[str]) -> None:
     width = len(lines[0])
     for (i, line) in enumerate(lines, start = 1):
@@ -1,16 +1,56 @@
-from suitebot.game.direction import Direction
+from typing import Dict, Tuple
+
+from suitebot.game.direction import Direction, ALL_DIRECTIONS
+
+# directions by their letter in the string form of moves
+_DIRECTIONS_BY_LETTER = {str(direction): direction for direction in ALL_DIRECTIONS}
 
 
 class Move:
-    def __init__(self, step1: Direction, step2: Direction = None) -> None:
-        if not step1:
-            raise ValueError("step1 is mandatory")
-        self.step1 = step1
-        self.step2 = step2
+    """A move of one or two steps.
+
+    Moves are immutable flyweights: creating a move returns the one shared
+    instance with the same steps.
+    """
+    __slots__ = ('step1', 'step2', '_hash')
+
+    _instances = {}  # type: Dict[Tuple[Direction, Direction], Move]
+
+    def __new__(cls, step1: Direction, step2: Direction = None) -> 'Move':
+        move = cls._instances.get((step1, step2))
+        if move is None:
+            if not step1:
+                raise ValueError("step1 is mandatory")
+            move = super().__new__(cls)
+            move.step1 = step1
+            move.step2 = step2
+            move._hash = hash((step1, step2))
+            move = cls._instances.setdefault((step1, step2), move)
+        return move
+
+    @classmethod
+    def from_string(cls, move_string: str) -> 'Move':
+        """Returns the move of the given string form, e.g. 'U' or 'RD' (see __str__).
+
+        :raises ValueError: if the string is not a move
+        """
+        try:
+            steps = [_DIRECTIONS_BY_LETTER[letter] for letter in move_string]
+        except KeyError:
+            raise ValueError("not a move: %r" % move_string)
+        if not 1 <= len(steps) <= 2:
+            raise ValueError("not a move: %r" % move_string)
+        return cls(*steps)
+
+    def __reduce__(self):
+        return Move, (self.step1, self.step2)
 
     def __eq__(self, other) -> bool:
         return self.step1 == other.step1 and self.step2 == other.step2
 
+    def __hash__(self) -> int:
+        return self._hash
+
     def __str__(self) -> str:
         if not self.step2:
             return str(self.step1)
@@ -1,3 +1,13 @@
 from typing import NamedTuple
 
 Point = NamedTuple('Point', [('x', int), ('y', int)])
+
+
+def to_index(point: Point, width: int) -> int:
+    """Returns the grid index (y * width + x) of the point on a plan of the given width."""
+    return point.y * width + point.x
+
+
+def from_index(index: int, width: int) -> Point:
+    """Returns the point at the grid index on a plan of the given width."""
+    return Point(index % width, index // width)
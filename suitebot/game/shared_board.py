@@ -0,0 +1,178 @@
+import struct
+import threading
+from array import array
+from typing import Dict, NamedTuple, Optional
+
+try:
+    from multiprocessing import resource_tracker, shared_memory
+except ImportError:
+    # Python < 3.8: the boards are sent to the workers pickled instead
+    shared_memory = None
+
+from suitebot.game.bot import Bot
+from suitebot.game.game_state import GameState
+
+# width, height, bot count, bot capacity, generation
+_HEADER = struct.Struct('<IIIIQ')
+_HEADER_SIZE = 24
+_INT_SIZE = array('i').itemsize
+
+BoardDescriptor = NamedTuple('BoardDescriptor', [
+    ('name', str),          # name of the shared memory block
+    ('generation', int),    # the number of the write the board is expected to hold
+])
+
+
+def is_supported() -> bool:
+    """Tells whether shared boards are available (Python 3.8+)."""
+    return shared_memory is not None
+
+
+class SharedBoard:
+    """A game state in shared memory, written by one process and read by its worker processes.
+
+    The board is flat: a header, then the IDs, head cells (y * width + x,
+    -1 for bots without segments) and alive flags of the bots, then the
+    occupancy grid.  The writer overwrites the board every turn and hands
+    the workers a small BoardDescriptor; the workers map the block and read
+    their game state straight from it (see read_game_state): nothing but
+    the descriptor is pickled or sent through pipes.
+
+    Every write gets a new generation number; a reader that finds another
+    generation than the descriptor's (the board was overwritten since the
+    job was submitted) gets None instead of a torn board.  A bigger plan or
+    more bots than the block was created for get a new block.
+    """
+
+    def __init__(self) -> None:
+        self._memory = None  # type: Optional[shared_memory.SharedMemory]
+        self._bot_capacity = 0
+        self._cell_capacity = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def write(self, game_state: GameState) -> BoardDescriptor:
+        """Writes the game state to the board; returns the descriptor to hand to the readers."""
+        with self._lock:
+            width = game_state.get_plan_width()
+            height = game_state.get_plan_height()
+            bots = list(game_state.get_bots())
+            self._ensure_capacity(len(bots), width * height)
+            buffer = self._memory.buf
+            self._generation += 1
+            # readers of the previous generation must not accept the board while it is being written
+            _HEADER.pack_into(buffer, 0, 0, 0, 0, 0, 0)
+
+            ids = array('i', (bot.id for bot in bots))
+            heads = array('i', (_head(bot, width) for bot in bots))
+            alive = bytes(1 if bot.is_alive else 0 for bot in bots)
+            offset = _HEADER_SIZE
+            buffer[offset:offset + len(ids) * _INT_SIZE] = ids.tobytes()
+            offset += self._bot_capacity * _INT_SIZE
+            buffer[offset:offset + len(heads) * _INT_SIZE] = heads.tobytes()
+            offset += self._bot_capacity * _INT_SIZE
+            buffer[offset:offset + len(alive)] = alive
+            offset += self._bot_capacity
+            buffer[offset:offset + width * height] = game_state.get_grid()
+            # the header last: a reader never sees the new generation with old contents
+            _HEADER.pack_into(buffer, 0, width, height, len(bots), self._bot_capacity, self._generation)
+            return BoardDescriptor(self._memory.name, self._generation)
+
+    def _ensure_capacity(self, bot_count: int, cell_count: int) -> None:
+        if self._memory is not None and bot_count <= self._bot_capacity and cell_count <= self._cell_capacity:
+            return
+        self.close()
+        self._bot_capacity = max(bot_count, self._bot_capacity)
+        self._cell_capacity = max(cell_count, self._cell_capacity)
+        size = _HEADER_SIZE + self._bot_capacity * (2 * _INT_SIZE + 1) + self._cell_capacity
+        self._memory = shared_memory.SharedMemory(create=True, size=size)
+
+    def close(self) -> None:
+        """Releases the shared memory block."""
+        if self._memory is not None:
+            self._memory.close()
+            self._memory.unlink()
+            self._memory = None
+
+
+def _head(bot: Bot, width: int) -> int:
+    xs, ys = bot.get_segment_coordinates()
+    return ys[-1] * width + xs[-1] if xs else -1
+
+
+# the blocks mapped by this (reader) process, by name
+_attached = {}  # type: Dict[str, shared_memory.SharedMemory]
+_attached_lock = threading.Lock()
+
+
+def _attach(name: str) -> 'shared_memory.SharedMemory':
+    with _attached_lock:
+        memory = _attached.get(name)
+        if memory is None:
+            # the writer owns the block: the reader's resource tracker must neither unlink it nor report it leaked
+            try:
+                memory = shared_memory.SharedMemory(name=name, track=False)
+            except TypeError:
+                # Python < 3.13
+                memory = _attach_untracked(name)
+            _attached[name] = memory
+        return memory
+
+
+def _attach_untracked(name: str) -> 'shared_memory.SharedMemory':
+    """Attaches a block without the registration that SharedMemory sends to the resource tracker.
+
+    The registration is skipped rather than undone by unregistering: a
+    worker started before the writer's tracker has a tracker of its own, but
+    the others share the writer's, where an unregister would also drop the
+    writer's registration (and the second reader's would fail).
+    """
+    register = resource_tracker.register
+
+    def register_others(resource_name: str, resource_type: str) -> None:
+        if resource_type != 'shared_memory' or resource_name.lstrip('/') != name.lstrip('/'):
+            register(resource_name, resource_type)
+
+    resource_tracker.register = register_others
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def read_game_state(descriptor: BoardDescriptor) -> Optional[GameState]:
+    """Reads the game state from a shared board, in a worker process.
+
+    The game state gets its own copy of the grid, to be modified by
+    simulations, and one segment (the head) per bot.
+
+    :param descriptor: the descriptor returned by SharedBoard.write()
+    :return the game state, None if the board has been overwritten since
+    """
+    memory = _attach(descriptor.name)
+    buffer = memory.buf
+    width, height, bot_count, bot_capacity, generation = _HEADER.unpack_from(buffer, 0)
+    if generation != descriptor.generation:
+        return None
+
+    offset = _HEADER_SIZE
+    ids = array('i')
+    ids.frombytes(buffer[offset:offset + bot_count * _INT_SIZE])
+    offset += bot_capacity * _INT_SIZE
+    heads = array('i')
+    heads.frombytes(buffer[offset:offset + bot_count * _INT_SIZE])
+    offset += bot_capacity * _INT_SIZE
+    alive = bytes(buffer[offset:offset + bot_count])
+    offset += bot_capacity
+    grid = bytes(buffer[offset:offset + width * height])
+    if _HEADER.unpack_from(buffer, 0)[4] != generation:
+        return None
+
+    bots = {}
+    for (bot_id, head, is_alive) in zip(ids, heads, alive):
+        bot = Bot(id=bot_id, name='Bot #{}'.format(bot_id))
+        if head >= 0:
+            bot.add_segment_at(head % width, head // width)
+        bot.is_alive = bool(is_alive)
+        bots[bot_id] = bot
+    return GameState(plan_width=width, plan_height=height, bots=bots, static_grid=grid)
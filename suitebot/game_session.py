@@ -0,0 +1,170 @@
+import threading
+from collections import OrderedDict
+from typing import List, Tuple, Optional, Hashable
+
+from suitebot import json_util
+from suitebot.game.game_state import GameState
+from suitebot.game.game_state_factory import OBSTACLE, EMPTY
+from suitebot.game.point import Point
+
+DEFAULT_MAX_SESSIONS = 64
+
+GAME_ID_KEY = 'gameId'
+
+
+class GameSession:
+    """The game state of one game as of its last move request, plus what is needed to extend it."""
+
+    def __init__(self, game_state: GameState, move_request: dict) -> None:
+        self.game_state = game_state
+        self.plan_lines = None  # type: Optional[List[str]]
+        self.segment_counts = None  # type: Optional[dict]
+        self.remember(move_request)
+
+    def remember(self, move_request: dict) -> None:
+        if json_util.detect_format(move_request) == json_util.TRON_LEAGUE_FORMAT:
+            state_map = move_request['gameState']['playerStateMap']
+            self.segment_counts = {id: len(item['segments']) for id, item in state_map.items()}
+        else:
+            self.plan_lines = move_request['gamePlan']
+
+
+class GameSessionCache:
+    """Game states of the games in progress, carried over from one move request to the next.
+
+    A session is identified by the game ID (if the request has one), the
+    bot IDs and the plan size.  When a move request extends the state of
+    the previous request of its session - bots only got new segments, and
+    obstacles only appeared - just the new cells are applied to the cached
+    game state; any other request rebuilds the game state from scratch.
+
+    The cached game states are shared between requests, so AIs must leave
+    them as they found them.
+    """
+
+    def __init__(self, max_sessions: int = DEFAULT_MAX_SESSIONS) -> None:
+        self._max_sessions = max_sessions
+        self._sessions = OrderedDict()  # type: OrderedDict[Hashable, GameSession]
+        self._lock = threading.Lock()
+
+    def bot_id_and_game_state_from_move_request(self, move_request: dict) -> Tuple[int, GameState]:
+        """Same as json_util.bot_id_and_game_state_from_move_request, reusing the session's game state."""
+        tron_league = json_util.detect_format(move_request) == json_util.TRON_LEAGUE_FORMAT
+        bot_id = move_request['aiPlayerId'] if tron_league else move_request['yourBotId']
+        key = _session_key(move_request, tron_league)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None:
+                self._sessions.move_to_end(key)
+                extended = _extend_tron_league(session, move_request) if tron_league \
+                    else _extend_suitebot(session, move_request)
+                if extended:
+                    session.remember(move_request)
+                    return bot_id, session.game_state
+            bot_id, game_state = json_util.bot_id_and_game_state_from_move_request(move_request)
+            self._sessions[key] = GameSession(game_state, move_request)
+            self._sessions.move_to_end(key)
+            while len(self._sessions) > self._max_sessions:
+                self._sessions.popitem(last=False)
+            return bot_id, game_state
+
+    def discard(self, game_state: GameState) -> None:
+        """Drops the session of the game state, e.g. because an AI is still changing it."""
+        with self._lock:
+            for (key, session) in list(self._sessions.items()):
+                if session.game_state is game_state:
+                    del self._sessions[key]
+
+
+def _session_key(move_request: dict, tron_league: bool) -> Hashable:
+    if tron_league:
+        game_state_data = move_request['gameState']
+        game_plan_data = game_state_data['gamePlan']
+        return (
+            json_util.TRON_LEAGUE_FORMAT,
+            move_request.get(GAME_ID_KEY),
+            move_request['aiPlayerId'],
+            tuple(sorted(int(item['id']) for item in game_state_data['players'])),
+            game_plan_data['width'],
+            game_plan_data['height'],
+        )
+    plan_lines = move_request['gamePlan']
+    return (
+        json_util.SUITEBOT_FORMAT,
+        move_request.get(GAME_ID_KEY),
+        move_request['yourBotId'],
+        tuple(move_request['botIds']),
+        len(plan_lines[0]) if plan_lines else 0,
+        len(plan_lines),
+    )
+
+
+def _extend_suitebot(session: GameSession, move_request: dict) -> bool:
+    """Applies the cells changed since the previous plan to the session's game state.
+
+    Returns False, leaving the game state untouched, if the new plan does not
+    extend the previous one.
+    """
+    old_lines = session.plan_lines
+    new_lines = move_request['gamePlan']
+    if len(new_lines) != len(old_lines):
+        return False
+    game_state = session.game_state
+    new_obstacles = []
+    new_heads = {}
+    for (y, (old_line, new_line)) in enumerate(zip(old_lines, new_lines)):
+        if old_line == new_line:
+            continue
+        if len(old_line) != len(new_line):
+            return False
+        for (x, (old_char, new_char)) in enumerate(zip(old_line, new_line)):
+            if old_char == new_char:
+                continue
+            if old_char == EMPTY and new_char == OBSTACLE:
+                new_obstacles.append(Point(x, y))
+            elif old_char == EMPTY and new_char.isdigit():
+                bot_id = int(new_char)
+                if bot_id in new_heads:
+                    return False
+                new_heads[bot_id] = Point(x, y)
+            elif not (old_char.isdigit() and new_char == OBSTACLE):
+                # anything but a bot's head turning into its tail
+                return False
+    try:
+        bots = {bot_id: game_state.get_bot(bot_id) for bot_id in new_heads}
+    except KeyError:
+        return False
+    for obstacle in new_obstacles:
+        game_state.add_obstacle(obstacle)
+    for bot_id, head in new_heads.items():
+        bots[bot_id].add_segment(head)
+    json_util.update_live_bots(game_state, move_request)
+    return True
+
+
+def _extend_tron_league(session: GameSession, move_request: dict) -> bool:
+    """Applies the segments added since the previous request to the session's game state.
+
+    Returns False, leaving the game state untouched, if the bots' segments do
+    not extend the segments of the previous request.
+    """
+    game_state = session.game_state
+    game_state_data = move_request['gameState']
+    state_map = game_state_data['playerStateMap']
+    if state_map.keys() != session.segment_counts.keys():
+        return False
+    for id, item in state_map.items():
+        old_count = session.segment_counts[id]
+        segments = item['segments']
+        if len(segments) < old_count:
+            return False
+        if old_count and Point(**segments[old_count - 1]) != game_state.get_bot_location(int(id)):
+            return False
+    for id, item in state_map.items():
+        bot = game_state.get_bot(int(id))
+        for point_data in item['segments'][session.segment_counts[id]:]:
+            bot.add_segment(Point(**point_data))
+    live_bot_ids = {int(item['id']) for item in game_state_data['livePlayers']}
+    for bot in game_state.get_bots():
+        bot.is_alive = bot.id in live_bot_ids
+    return True
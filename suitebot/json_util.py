@@ -1,15 +1,76 @@
+import hashlib
 import json
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Optional, Tuple, List
+
+# optional faster JSON backends, in the order of preference
+try:
+    import orjson as _json_backend
+except ImportError:
+    try:
+        import ujson as _json_backend
+    except ImportError:
+        _json_backend = json
 
 from suitebot.game import game_state_factory
-from suitebot.game.game_state import GameState
+from suitebot.game.game_state import GameState, OCCUPIED
 from suitebot.game.bot import Bot
 from suitebot.game.point import Point
 
+TIME_BUDGET_KEY = 'timeBudgetMs'
+
+SUITEBOT_FORMAT = 'suitebot'
+TRON_LEAGUE_FORMAT = 'tron-league'
+
+# static grids of the tron-league plans, by digest of the plan size and walls
+STATIC_GRID_CACHE_SIZE = 32
+_static_grid_cache = OrderedDict()  # type: OrderedDict[bytes, bytes]
+_static_grid_cache_lock = threading.Lock()
+
+
+def parse_move_request(move_request_json: str) -> dict:
+    """Parses the move request JSON, using the fastest JSON library installed (orjson, ujson or json)."""
+    return _json_backend.loads(move_request_json)
+
+
+def detect_format(move_request: dict) -> str:
+    """Returns the format of a parsed move request: SUITEBOT_FORMAT or TRON_LEAGUE_FORMAT.
+
+    :raises ValueError: if the format is not recognized
+    """
+    if 'gameState' in move_request:
+        return TRON_LEAGUE_FORMAT
+    if 'gamePlan' in move_request:
+        return SUITEBOT_FORMAT
+    raise ValueError("unrecognized move request format")
+
+
+def bot_id_and_game_state_from_move_request(move_request: dict) -> Tuple[int, GameState]:
+    """Returns the bot ID and the game state of a parsed move request in either format."""
+    if detect_format(move_request) == TRON_LEAGUE_FORMAT:
+        return move_request['aiPlayerId'], _game_state_from_tron_league_move_request(move_request)
+    return move_request['yourBotId'], _game_state_from_move_request(move_request)
+
+
+def bot_id_and_game_state_from_json(move_request_json: str) -> Tuple[int, GameState]:
+    """Returns the bot ID and the game state of a move request in either format, parsing the JSON once."""
+    return bot_id_and_game_state_from_move_request(parse_move_request(move_request_json))
+
 
 def game_state_from_json(move_request_json: str) -> GameState:
-    move_request = json.loads(move_request_json)
+    return _game_state_from_move_request(parse_move_request(move_request_json))
+
+
+def _game_state_from_move_request(move_request: dict) -> GameState:
     game_state = game_state_factory.create_from_game_plan_lines(move_request['gamePlan'])
+    update_live_bots(game_state, move_request)
+    return game_state
+
 
+def update_live_bots(game_state: GameState, move_request: dict) -> None:
+    """Adds the bots missing on the plan and sets the is_alive flags of all bots of a suitebot move request."""
     # update bots: set is_alive flag
     # (we aren't sure how a dead bot is represented on plan lines:
     # maybe it isn't there, maybe it's there)
@@ -18,35 +79,40 @@ def game_state_from_json(move_request_json: str) -> GameState:
             bot = game_state.get_bot(id)
         except KeyError:
             bot = Bot(id=id, name=id)
-            game_state._bots[id] = bot
+            game_state.add_bot(bot)
         bot.is_alive = id in move_request['liveBotIds']
 
     # update bots: set segments
     # (N/A for this API: we don't track bots' tails)
 
-    return game_state
-
 
 def your_bot_id_from_json(move_request_json: str) -> int:
-    move_request = json.loads(move_request_json)
+    move_request = parse_move_request(move_request_json)
     return move_request['yourBotId']
 
 
 def your_bot_id_from_tron_league_json(move_request_json: str) -> int:
-    move_request = json.loads(move_request_json)
+    move_request = parse_move_request(move_request_json)
     return move_request['aiPlayerId']
 
 
-def game_state_from_tron_league_json(move_request_json: str) -> (int, GameState):
-    move_request = json.loads(move_request_json)
-    meta = move_request['gameState']
+def time_budget_from_move_request(move_request: dict) -> Optional[float]:
+    """Returns the time budget of the move request in seconds, or None if the request has none."""
+    time_budget_ms = move_request.get(TIME_BUDGET_KEY)
+    if time_budget_ms is None:
+        return None
+    return time_budget_ms / 1000
+
 
+def game_state_from_tron_league_json(move_request_json: str) -> GameState:
+    return _game_state_from_tron_league_move_request(parse_move_request(move_request_json))
+
+
+def _game_state_from_tron_league_move_request(move_request: dict) -> GameState:
     game_state_data = move_request['gameState']
     game_plan_data = game_state_data['gamePlan']
-
-    # TODO:
-    # use gamePlan.startingPositions
-    # use gamePlan.walls
+    width = game_plan_data['width']
+    height = game_plan_data['height']
 
     bots = {}
 
@@ -71,8 +137,47 @@ def game_state_from_tron_league_json(move_request_json: str) -> (int, GameState)
             point = Point(**point_data)
             bot.add_segment(point)
 
+    # bots without segments stand on their starting positions
+    # (the starting positions are listed in the order of the players)
+    starting_positions = game_plan_data.get('startingPositions', ())
+    for (bot, point_data) in zip(bots.values(), starting_positions):
+        if not bot.get_segments():
+            bot.add_segment(Point(**point_data))
+
     return GameState(
-        plan_width=game_plan_data['width'],
-        plan_height=game_plan_data['height'],
+        plan_width=width,
+        plan_height=height,
         bots=bots,
+        static_grid=_static_grid_from_walls(width, height, game_plan_data.get('walls', ())),
     )
+
+
+def _static_grid_from_walls(width: int, height: int, walls: List[dict]) -> bytes:
+    """Returns the static grid of a plan with the given walls.
+
+    The walls of a plan do not change during a game, so the grids are cached
+    by a digest of the plan size and the walls and reused by every move of
+    the game.
+    """
+    coordinates = array('i', [width, height])
+    for point_data in walls:
+        coordinates.append(point_data['x'])
+        coordinates.append(point_data['y'])
+    digest = hashlib.blake2b(coordinates.tobytes(), digest_size=16).digest()
+
+    with _static_grid_cache_lock:
+        static_grid = _static_grid_cache.get(digest)
+        if static_grid is not None:
+            _static_grid_cache.move_to_end(digest)
+            return static_grid
+
+    grid = bytearray(width * height)
+    for i in range(2, len(coordinates), 2):
+        grid[coordinates[i + 1] * width + coordinates[i]] = OCCUPIED
+    static_grid = bytes(grid)
+
+    with _static_grid_cache_lock:
+        _static_grid_cache[digest] = static_grid
+        while len(_static_grid_cache) > STATIC_GRID_CACHE_SIZE:
+            _static_grid_cache.popitem(last=False)
+    return static_grid
@@ -0,0 +1,361 @@
+import argparse
+import json
+import random
+import socket
+import sys
+from abc import ABCMeta, abstractmethod
+from time import perf_counter
+from typing import Dict, List, NamedTuple, Optional
+
+from suitebot import json_util
+from suitebot.ai.bot_ai import BotAi
+from suitebot.bot_request_handler import BotRequestHandler, NAME_REQUEST
+from suitebot.game.bot import Bot
+from suitebot.game.game_state import GameState, FREE, OCCUPIED
+from suitebot.game.game_state_factory import OBSTACLE, EMPTY
+from suitebot.game.move import Move
+from suitebot.game.point import from_index
+from suitebot.game_session import GameSessionCache, GAME_ID_KEY
+from suitebot.server.simple_server import RESPONSE_DELIMITER
+
+DEFAULT_PLAN_WIDTH = 30
+DEFAULT_PLAN_HEIGHT = 30
+# share of the cells of a random plan that are walls
+DEFAULT_WALL_DENSITY = 0.05
+# the bots of a random plan start at least this far apart (if the plan allows)
+MIN_STARTING_DISTANCE = 4
+DEFAULT_SOCKET_TIMEOUT = 5.0
+
+GameResult = NamedTuple('GameResult', [
+    ('rounds', int),                            # the number of rounds played
+    ('winner', Optional[int]),                  # the last bot standing, None for a draw
+    ('death_rounds', Dict[int, Optional[int]]), # the round each bot died in (1 = the first), None if it survived
+    ('latencies', Dict[int, List[float]]),      # the time each bot took for its moves, in seconds
+])
+
+# the grid as suitebot plan characters
+_PLAN_CHARS = bytes.maketrans(bytes([FREE, OCCUPIED]), (EMPTY + OBSTACLE).encode('ascii'))
+
+
+class Player:
+    """The side of a bot in a game: answers the move requests of the referee."""
+    __metaclass__ = ABCMeta
+
+    @abstractmethod
+    def make_move(self, move_request: dict) -> Optional[Move]:
+        """Returns the bot's move, None if the bot did not reply with a valid move.
+
+        :param move_request: the move request, as the game server would send it
+        """
+
+    @abstractmethod
+    def get_name(self) -> str:
+        pass
+
+    def close(self) -> None:
+        """Releases what the player holds once the games are over."""
+        pass
+
+
+class AiPlayer(Player):
+    """A BotAi playing in-process.
+
+    The requests go through a BotRequestHandler, as in a bot server: the AI
+    gets the game state it would get from the JSON, and its deadline is
+    enforced the same way.
+    """
+
+    def __init__(self, bot_ai: BotAi, sessions: bool = True) -> None:
+        """
+        :param bot_ai: the AI making the moves
+        :param sessions: keep the game state from move to move, as the bot server with --sessions
+        """
+        self._bot_ai = bot_ai
+        self._request_handler = BotRequestHandler(bot_ai, sessions=GameSessionCache() if sessions else None)
+
+    def make_move(self, move_request: dict) -> Optional[Move]:
+        return _parse_move(self._request_handler.process_request(json.dumps(move_request)))
+
+    def get_name(self) -> str:
+        return self._bot_ai.get_name()
+
+    def close(self) -> None:
+        # e.g. MctsBot: stop its worker processes
+        shutdown = getattr(self._bot_ai, 'shutdown', None)
+        if shutdown is not None:
+            shutdown()
+
+
+class SocketPlayer(Player):
+    """A bot server playing over the socket protocol, one connection per request."""
+
+    def __init__(self, host: str, port: int, timeout: float = DEFAULT_SOCKET_TIMEOUT) -> None:
+        self._address = (host, port)
+        self._timeout = timeout
+        self._name = None  # type: Optional[str]
+
+    def make_move(self, move_request: dict) -> Optional[Move]:
+        try:
+            return _parse_move(self._send(json.dumps(move_request)))
+        except OSError:
+            return None
+
+    def get_name(self) -> str:
+        if self._name is None:
+            self._name = self._send(NAME_REQUEST)
+        return self._name
+
+    def _send(self, request: str) -> str:
+        with socket.create_connection(self._address, timeout=self._timeout) as connection:
+            connection.sendall((request + RESPONSE_DELIMITER).encode('utf'))
+            with connection.makefile(encoding='utf') as reader:
+                return reader.read().strip()
+
+
+def _parse_move(response: str) -> Optional[Move]:
+    try:
+        return Move.from_string(response)
+    except ValueError:
+        return None
+
+
+class Game:
+    """A game refereed locally, following the rules of the game server.
+
+    The plan wraps around; every round, each live bot gets a move request
+    describing the same position, then the moves (single or double) are
+    played simultaneously with GameState.apply_moves, which eliminates the
+    bots that crash.  A bot that does not reply with a valid move is
+    eliminated too, and its segments stay on the plan.  The game is over
+    when at most one bot is left (none if it started with one), or after
+    max_rounds.
+
+    The move requests are dicts of the JSON the game server sends, in the
+    suitebot format (plan lines: walls and tails as obstacles, live bots'
+    heads as their digits) or in the tron-league format.
+    """
+
+    def __init__(self, game_state: GameState, players: Dict[int, Player], time_budget: float = None,
+                 request_format: str = json_util.SUITEBOT_FORMAT, max_rounds: int = None,
+                 game_id: str = None) -> None:
+        """
+        :param game_state: the starting position, modified as the game goes on
+        :param players: the players, by the ID of the bot they play
+        :param time_budget: the time budget of a move in seconds, sent with the requests; None for no limit
+        :param request_format: json_util.SUITEBOT_FORMAT or json_util.TRON_LEAGUE_FORMAT
+        :param max_rounds: the game is a draw after this many rounds; None to play until it is decided
+        :param game_id: sent with the requests, so that bot servers can keep the game in a session
+        """
+        if set(players) != game_state.get_all_bot_ids():
+            raise ValueError("every bot needs a player")
+        if request_format == json_util.SUITEBOT_FORMAT and any(not 0 <= bot_id <= 9 for bot_id in players):
+            raise ValueError("the suitebot format only has room for bot IDs 0-9")
+        self._game_state = game_state
+        self._players = players
+        self._time_budget = time_budget
+        self._request_format = request_format
+        self._max_rounds = max_rounds
+        self._game_id = game_id
+        self._width = game_state.get_plan_width()
+        self._bot_ids = sorted(players)
+        self._starting_positions = [game_state.get_bot_location(bot_id) for bot_id in self._bot_ids]
+        self._walls = self._find_walls()
+        self._bot_count = len(players)
+        self.round = 0
+        live_bot_ids = game_state.get_live_bot_ids()
+        self._death_rounds = {bot_id: None if bot_id in live_bot_ids else 0 for bot_id in self._bot_ids}
+        self._latencies = {bot_id: [] for bot_id in self._bot_ids}  # type: Dict[int, List[float]]
+
+    def _find_walls(self) -> List[dict]:
+        occupied = bytearray(self._game_state.get_grid())
+        for bot in self._game_state.get_bots():
+            for (x, y) in zip(*bot.get_segment_coordinates()):
+                occupied[y * self._width + x] = FREE
+        return [{'x': point.x, 'y': point.y}
+                for point in (from_index(index, self._width) for (index, cell) in enumerate(occupied) if cell)]
+
+    def get_game_state(self) -> GameState:
+        return self._game_state
+
+    def is_over(self) -> bool:
+        live_bot_count = len(self._game_state.get_live_bot_ids())
+        if live_bot_count == 0 or (live_bot_count == 1 and self._bot_count > 1):
+            return True
+        return self._max_rounds is not None and self.round >= self._max_rounds
+
+    def play(self) -> GameResult:
+        """Plays the game to its end."""
+        while not self.is_over():
+            self.play_round()
+        return self.get_result()
+
+    def play_round(self) -> None:
+        game_state = self._game_state
+        live_bot_ids = sorted(game_state.get_live_bot_ids())
+        # all requests describe the position before the round
+        move_requests = {bot_id: self.move_request(bot_id) for bot_id in live_bot_ids}
+        moves = {}
+        for bot_id in live_bot_ids:
+            started = perf_counter()
+            moves[bot_id] = self._players[bot_id].make_move(move_requests[bot_id])
+            self._latencies[bot_id].append(perf_counter() - started)
+        self.round += 1
+        for (bot_id, move) in moves.items():
+            if move is None:
+                game_state.get_bot(bot_id).is_alive = False
+        game_state.apply_moves(moves)
+        for bot_id in live_bot_ids:
+            if not game_state.get_bot(bot_id).is_alive:
+                self._death_rounds[bot_id] = self.round
+
+    def get_result(self) -> GameResult:
+        live_bot_ids = self._game_state.get_live_bot_ids()
+        winner = next(iter(live_bot_ids)) if len(live_bot_ids) == 1 and self._bot_count > 1 else None
+        return GameResult(self.round, winner, dict(self._death_rounds),
+                          {bot_id: list(latencies) for (bot_id, latencies) in self._latencies.items()})
+
+    def move_request(self, bot_id: int) -> dict:
+        """Returns the move request for the bot in the current position."""
+        if self._request_format == json_util.TRON_LEAGUE_FORMAT:
+            move_request = self._tron_league_move_request(bot_id)
+        else:
+            move_request = self._suitebot_move_request(bot_id)
+        if self._time_budget is not None:
+            move_request[json_util.TIME_BUDGET_KEY] = int(self._time_budget * 1000)
+        if self._game_id is not None:
+            move_request[GAME_ID_KEY] = self._game_id
+        return move_request
+
+    def plan_lines(self) -> List[str]:
+        """Returns the plan as the lines of a suitebot move request."""
+        game_state = self._game_state
+        plan = bytearray(game_state.get_grid().translate(_PLAN_CHARS))
+        for bot_id in game_state.get_live_bot_ids():
+            location = game_state.get_bot_location(bot_id)
+            plan[location.y * self._width + location.x] = ord(str(bot_id))
+        plan_string = plan.decode('ascii')
+        return [plan_string[start:start + self._width] for start in range(0, len(plan_string), self._width)]
+
+    def _suitebot_move_request(self, bot_id: int) -> dict:
+        return {
+            'gamePlan': self.plan_lines(),
+            'yourBotId': bot_id,
+            'botIds': self._bot_ids,
+            'liveBotIds': sorted(self._game_state.get_live_bot_ids()),
+        }
+
+    def _tron_league_move_request(self, bot_id: int) -> dict:
+        game_state = self._game_state
+        players = [{'id': bot.id, 'name': bot.name} for bot in map(game_state.get_bot, self._bot_ids)]
+        return {
+            'aiPlayerId': bot_id,
+            'gameState': {
+                'gamePlan': {
+                    'width': self._width,
+                    'height': game_state.get_plan_height(),
+                    'startingPositions': [{'x': point.x, 'y': point.y} for point in self._starting_positions],
+                    'walls': self._walls,
+                },
+                'players': players,
+                'livePlayers': [player for player in players if game_state.get_bot(player['id']).is_alive],
+                'playerStateMap': {
+                    str(bot.id): {'segments': [{'x': x, 'y': y} for (x, y) in zip(*bot.get_segment_coordinates())]}
+                    for bot in map(game_state.get_bot, self._bot_ids)
+                },
+            },
+        }
+
+
+def create_random_game_state(width: int, height: int, bot_count: int, rng: random.Random,
+                             wall_density: float = DEFAULT_WALL_DENSITY) -> GameState:
+    """Returns the starting position of a game on a random plan: bots 1 to bot_count on random free cells."""
+    cell_count = width * height
+    static_grid = bytearray(cell_count)
+    for index in rng.sample(range(cell_count), int(cell_count * wall_density)):
+        static_grid[index] = OCCUPIED
+    free_cells = [index for index in range(cell_count) if static_grid[index] == FREE]
+    rng.shuffle(free_cells)
+    starts = []  # type: List[int]
+    for min_distance in range(MIN_STARTING_DISTANCE, -1, -1):
+        starts = []
+        for index in free_cells:
+            if all(_distance(index, start, width, height) >= min_distance for start in starts):
+                starts.append(index)
+                if len(starts) == bot_count:
+                    break
+        if len(starts) == bot_count:
+            break
+    if len(starts) < bot_count:
+        raise ValueError("no room for %i bots" % bot_count)
+
+    bots = {}
+    for (bot_id, start) in enumerate(starts, start=1):
+        bot = Bot(id=bot_id, name='Bot #{}'.format(bot_id), segments=[from_index(start, width)])
+        bot.is_alive = True
+        bots[bot_id] = bot
+    return GameState(plan_width=width, plan_height=height, bots=bots, static_grid=bytes(static_grid))
+
+
+def _distance(cell1: int, cell2: int, width: int, height: int) -> int:
+    dx = abs(cell1 % width - cell2 % width)
+    dy = abs(cell1 // width - cell2 // width)
+    return min(dx, width - dx) + min(dy, height - dy)
+
+
+def create_player(spec: str) -> Player:
+    """Returns the player of a command line spec: the name of an AI (see bot_server.BOT_AIS) or host:port."""
+    # imported here: the bot server imports all AIs
+    from suitebot.bot_server import BOT_AIS
+    if spec in BOT_AIS:
+        return AiPlayer(BOT_AIS[spec]())
+    host, separator, port = spec.rpartition(':')
+    if not separator or not port.isdigit():
+        raise ValueError("neither an AI nor host:port: %s" % spec)
+    return SocketPlayer(host or 'localhost', int(port))
+
+
+def _parse_args(args: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='suitebot.referee', description='Plays a game between local bots.')
+    parser.add_argument('players', nargs='+', metavar='PLAYER',
+                        help='the name of an AI (as with bot_server --ai) or host:port of a bot server')
+    parser.add_argument('--width', type=int, default=DEFAULT_PLAN_WIDTH)
+    parser.add_argument('--height', type=int, default=DEFAULT_PLAN_HEIGHT)
+    parser.add_argument('--walls', type=float, default=DEFAULT_WALL_DENSITY, metavar='DENSITY',
+                        help='share of the plan covered by walls (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=None, help='seed of the random plan')
+    parser.add_argument('--time-budget', type=int, default=None, metavar='MS',
+                        help='time budget of a move in milliseconds')
+    parser.add_argument('--max-rounds', type=int, default=None)
+    parser.add_argument('--format', choices=(json_util.SUITEBOT_FORMAT, json_util.TRON_LEAGUE_FORMAT),
+                        default=json_util.SUITEBOT_FORMAT, help='format of the move requests (default: %(default)s)')
+    parser.add_argument('--verbose', action='store_true', help='print the plan after every round')
+    return parser.parse_args(args)
+
+
+def main(args: List[str]) -> None:
+    options = _parse_args(args)
+    rng = random.Random(options.seed)
+    game_state = create_random_game_state(options.width, options.height, len(options.players), rng, options.walls)
+    players = {bot_id: create_player(spec) for (bot_id, spec) in enumerate(options.players, start=1)}
+    time_budget = options.time_budget / 1000 if options.time_budget is not None else None
+    game = Game(game_state, players, time_budget=time_budget, request_format=options.format,
+                max_rounds=options.max_rounds)
+    try:
+        while not game.is_over():
+            game.play_round()
+            if options.verbose:
+                print("round %i" % game.round)
+                print('\n'.join(game.plan_lines()))
+        result = game.get_result()
+        for (bot_id, player) in sorted(players.items()):
+            death_round = result.death_rounds[bot_id]
+            print("%i %s: %s" % (bot_id, player.get_name(),
+                                 'survived' if death_round is None else 'died in round %i' % death_round))
+        print("round %i: %s" % (result.rounds, 'bot %i wins' % result.winner if result.winner is not None else 'draw'))
+    finally:
+        for player in players.values():
+            player.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,105 @@
+import cProfile
+import collections
+import os
+import random
+import sys
+import threading
+from typing import Callable, Counter, Any
+
+PSTATS_FORMAT = 'pstats'
+COLLAPSED_FORMAT = 'collapsed'
+OUTPUT_FORMATS = (PSTATS_FORMAT, COLLAPSED_FORMAT)
+
+DEFAULT_SAMPLING_INTERVAL = 0.001
+
+
+class RequestProfiler:
+    """Profiles selected move requests and writes one file per profiled request.
+
+    Requests are selected explicitly (profile_next) or at random (sample_rate).
+    The output is either a pstats file of cProfile, or the stacks collected by
+    a sampling profiler in the collapsed format ("frame;frame;frame count"
+    lines) read by flamegraph tools.
+    """
+
+    def __init__(self, output_dir: str, output_format: str = PSTATS_FORMAT, sample_rate: float = 0.0,
+                 sampling_interval: float = DEFAULT_SAMPLING_INTERVAL) -> None:
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError("unknown profile format: %s" % output_format)
+        self._output_dir = output_dir
+        self._output_format = output_format
+        self._sample_rate = sample_rate
+        self._sampling_interval = sampling_interval
+        self._requested = 0
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def profile_next(self, count: int) -> None:
+        """Selects the next `count` requests for profiling."""
+        with self._lock:
+            self._requested = count
+
+    def should_profile(self) -> bool:
+        """Tells whether the current request should be profiled; call once per request."""
+        with self._lock:
+            if self._requested > 0:
+                self._requested -= 1
+                return True
+        return self._sample_rate > 0 and random.random() < self._sample_rate
+
+    def profile(self, func: Callable, *args) -> Any:
+        """Calls the function, profiling it, and writes the profile; returns the result of the function."""
+        path = self._next_path()
+        if self._output_format == PSTATS_FORMAT:
+            profile = cProfile.Profile()
+            try:
+                return profile.runcall(func, *args)
+            finally:
+                profile.dump_stats(path)
+        sampler = _StackSampler(threading.get_ident(), self._sampling_interval)
+        sampler.start()
+        try:
+            return func(*args)
+        finally:
+            sampler.stop()
+            sampler.write(path)
+
+    def _next_path(self) -> str:
+        with self._lock:
+            self._sequence += 1
+            sequence = self._sequence
+        os.makedirs(self._output_dir, exist_ok=True)
+        file_name = 'move-%i-%06i.%s' % (os.getpid(), sequence, self._output_format)
+        return os.path.join(self._output_dir, file_name)
+
+
+class _StackSampler(threading.Thread):
+    """Periodically records the stack of the target thread."""
+
+    def __init__(self, target_thread_id: int, interval: float) -> None:
+        super().__init__(daemon=True)
+        self._target_thread_id = target_thread_id
+        self._interval = interval
+        self._stopped = threading.Event()
+        self._stacks = collections.Counter()  # type: Counter[str]
+
+    def run(self) -> None:
+        while not self._stopped.wait(self._interval):
+            frame = sys._current_frames().get(self._target_thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append('%s (%s:%i)' % (code.co_name, os.path.basename(code.co_filename), code.co_firstlineno))
+                frame = frame.f_back
+            self._stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+    def write(self, path: str) -> None:
+        with open(path, 'w') as output:
+            for stack, count in self._stacks.items():
+                output.write('%s %i\n' % (stack, count))
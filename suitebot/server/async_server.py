@@ -0,0 +1,137 @@
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+import json
+from time import time, perf_counter
+from typing import Optional
+
+from suitebot.server.simple_request_handler import SimpleRequestHandler, DEFAULT_REQUEST_TYPE
+from suitebot.server.simple_server import SHUTDOWN_REQUEST, UPTIME_REQUEST, STATS_REQUEST, CONTROL_REQUESTS, \
+    RESPONSE_DELIMITER
+from suitebot.server.stats import ServerStats, READ_PHASE, SEND_PHASE
+
+# longest request line accepted, in bytes; asyncio's default limit of 64 KiB is exceeded by big game plans
+MAX_REQUEST_SIZE = 16 * 1024 * 1024
+
+# the event loop of the running coroutine (asyncio.get_running_loop is only there since Python 3.7)
+_get_running_loop = getattr(asyncio, 'get_running_loop', asyncio.get_event_loop)
+
+
+class AsyncServer(object):
+    """Asyncio counterpart of SimpleServer.
+
+    Connections are served concurrently by the event loop; the (CPU-heavy)
+    request handler runs in an executor so that slow move calculations do not
+    block accepting and answering other connections.  The default executor has
+    a single worker thread because request handlers are not required to be
+    thread-safe; pass a bigger executor if yours is.
+
+    Keep-alive mode and STATS work as in SimpleServer: requests on one
+    connection are answered in order, while other connections are served in
+    the meantime.  A request longer than max_request_size bytes is answered
+    with an error, and its connection closed.
+    """
+    _start_timestamp = 0
+
+    def __init__(self, port: int, request_handler: SimpleRequestHandler, executor: Executor = None,
+                 keep_alive: bool = False, stats: ServerStats = None,
+                 max_request_size: int = MAX_REQUEST_SIZE) -> None:
+        self._port = port
+        self._request_handler = request_handler
+        self._keep_alive = keep_alive
+        self._max_request_size = max_request_size
+        self._stats = stats or ServerStats()
+        self._executor = executor or ThreadPoolExecutor(max_workers=1)
+        self._shutdown = None  # type: asyncio.Event
+
+    def run(self) -> None:
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self._serve())
+        finally:
+            loop.close()
+            self._executor.shutdown(wait=False)
+
+    async def _serve(self) -> None:
+        self._start_timestamp = time()
+        self._shutdown = asyncio.Event()
+        server = await asyncio.start_server(self._handle_connection, port=self._port, reuse_address=True,
+                                            limit=self._max_request_size)
+        try:
+            await self._shutdown.wait()
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            if self._keep_alive:
+                await self._handle_requests(reader, writer)
+            else:
+                await self._handle_request(reader, writer)
+        finally:
+            writer.close()
+
+    async def _handle_requests(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        while True:
+            line = await self._read_line(reader, writer)
+            if not line:
+                return
+            request = line.decode('utf').strip()
+            if not request:
+                continue
+            if not await self._reply(writer, request, perf_counter(), RESPONSE_DELIMITER):
+                return
+
+    async def _handle_request(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        started = perf_counter()
+        request = (await self._read_line(reader, writer)).decode('utf').strip()
+        if not request:
+            return
+        read_time = perf_counter() - started
+        self._stats.record_latency(self._request_type(request), READ_PHASE, read_time)
+        await self._reply(writer, request, started, '')
+
+    async def _read_line(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bytes:
+        """Reads a request line; answers a line over the limit with an error and returns an empty line."""
+        try:
+            return await reader.readline()
+        except ValueError:
+            # the line is over the limit; the rest of the connection cannot be trusted
+            self._stats.record_error(DEFAULT_REQUEST_TYPE)
+            writer.write(('ERROR: request longer than %i bytes' % self._max_request_size + RESPONSE_DELIMITER)
+                         .encode('utf'))
+            await writer.drain()
+            return b''
+
+    async def _reply(self, writer: asyncio.StreamWriter, request: str, started: float, delimiter: str) -> bool:
+        """Sends the response to the request; returns False if the server is shutting down."""
+        response = await self._respond(request)
+        if response is None:
+            return False
+        send_started = perf_counter()
+        writer.write((response + delimiter).encode('utf'))
+        await writer.drain()
+        finished = perf_counter()
+        request_type = self._request_type(request)
+        self._stats.record_latency(request_type, SEND_PHASE, finished - send_started)
+        self._stats.record_request(request_type, finished - started)
+        if request not in CONTROL_REQUESTS:
+            self._request_handler.on_response_sent(request)
+        return True
+
+    def _request_type(self, request: str) -> str:
+        if request in CONTROL_REQUESTS:
+            return request
+        return self._request_handler.get_request_type(request)
+
+    async def _respond(self, request: str) -> Optional[str]:
+        """Returns the response to the request, or None if the server is shutting down."""
+        if request == SHUTDOWN_REQUEST:
+            self._shutdown.set()
+            return None
+        if request == UPTIME_REQUEST:
+            return str(int(time() - self._start_timestamp))
+        if request == STATS_REQUEST:
+            return json.dumps(self._stats.to_dict(), sort_keys=True)
+        loop = _get_running_loop()
+        return await loop.run_in_executor(self._executor, self._request_handler.process_request, request)
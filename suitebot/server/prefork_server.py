@@ -0,0 +1,63 @@
+import multiprocessing
+import os
+import socket
+from time import time
+from typing import List
+
+from suitebot.server.simple_request_handler import SimpleRequestHandler
+from suitebot.server.simple_server import SimpleServer
+from suitebot.server.stats import ServerStats
+
+WORKER_CHECK_INTERVAL = 0.5
+
+
+class PreforkServer(SimpleServer):
+    """Multi-process variant of SimpleServer.
+
+    The listening socket is opened once and inherited by a pool of forked
+    worker processes, each of which runs the SimpleServer accept loop; the
+    kernel hands every incoming connection to exactly one idle worker, which
+    spreads the load across the pool.  The master process restarts workers
+    that die and, once any worker receives EXIT, stops the whole pool.
+    UPTIME is measured from the start of the master process in every worker;
+    STATS reports the statistics of the worker answering the request.
+    """
+
+    def __init__(self, port: int, request_handler: SimpleRequestHandler, workers: int = None,
+                 keep_alive: bool = False, stats: ServerStats = None) -> None:
+        super().__init__(port, request_handler, keep_alive=keep_alive, stats=stats)
+        self._worker_count = workers or os.cpu_count() or 1
+        self._context = multiprocessing.get_context('fork')
+        self._shutdown_event = self._context.Event()
+
+    def run(self) -> None:
+        self._start_timestamp = time()
+        sock = self._listen()
+        workers = []  # type: List[multiprocessing.Process]
+        try:
+            workers.extend(self._start_worker(sock) for _ in range(self._worker_count))
+            while not self._shutdown_event.wait(WORKER_CHECK_INTERVAL):
+                self._restart_dead_workers(workers, sock)
+        finally:
+            for worker in workers:
+                worker.terminate()
+            for worker in workers:
+                worker.join()
+            sock.close()
+
+    def _start_worker(self, sock: socket.socket) -> multiprocessing.Process:
+        worker = self._context.Process(target=self._serve, args=(sock,), daemon=True)
+        worker.start()
+        return worker
+
+    def _restart_dead_workers(self, workers: List[multiprocessing.Process], sock: socket.socket) -> None:
+        for i, worker in enumerate(workers):
+            if worker.is_alive() or self._shutdown_event.is_set():
+                continue
+            print("worker %i exited with code %s, restarting" % (worker.pid, worker.exitcode))
+            worker.join()
+            workers[i] = self._start_worker(sock)
+
+    def _shut_down(self) -> None:
+        super()._shut_down()
+        self._shutdown_event.set()
@@ -1,5 +1,7 @@
 from abc import abstractmethod, ABCMeta
 
+DEFAULT_REQUEST_TYPE = "REQUEST"
+
 
 class SimpleRequestHandler:
     __metaclass__ = ABCMeta
@@ -7,3 +9,15 @@ class SimpleRequestHandler:
     @abstractmethod
     def process_request(self, request: str) -> str:
         pass
+
+    def get_request_type(self, request: str) -> str:
+        """Returns the type of the request, under which the server keeps its statistics."""
+        return DEFAULT_REQUEST_TYPE
+
+    def on_response_sent(self, request: str) -> None:
+        """Called by the server once the response to the request has been sent.
+
+        The handler may use the time until the next request, e.g. to ponder;
+        whatever it starts must not delay the next process_request() call.
+        """
+        pass
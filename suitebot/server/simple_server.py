@@ -1,44 +1,121 @@
+import json
 import socket
-from time import time
+from time import time, perf_counter
+from typing import Optional
 
 from suitebot.server.simple_request_handler import SimpleRequestHandler
+from suitebot.server.stats import ServerStats, READ_PHASE, SEND_PHASE
 
 SHUTDOWN_REQUEST = "EXIT"
 UPTIME_REQUEST = "UPTIME"
+STATS_REQUEST = "STATS"
+CONTROL_REQUESTS = (SHUTDOWN_REQUEST, UPTIME_REQUEST, STATS_REQUEST)
+
+RESPONSE_DELIMITER = "\n"
 
 
 class SimpleServer(object):
+    """Single-threaded request/response server.
+
+    By default every connection carries exactly one request and its response.
+    In keep-alive mode a connection carries any number of newline-delimited
+    requests, which may be pipelined; each gets a newline-terminated response,
+    in order, until the client closes the connection.
+
+    STATS returns a JSON object with request counts, error counts and latency
+    percentiles per request type (see ServerStats); the socket read latency is
+    only recorded for one-shot connections, as on keep-alive connections it
+    would include the client's idle time.
+    """
     _should_shut_down = False
     _start_timestamp = 0
 
-    def __init__(self, port: int, request_handler: SimpleRequestHandler) -> None:
+    def __init__(self, port: int, request_handler: SimpleRequestHandler, keep_alive: bool = False,
+                 stats: ServerStats = None) -> None:
         self._port = port
         self._request_handler = request_handler
+        self._keep_alive = keep_alive
+        self._stats = stats or ServerStats()
 
     def run(self) -> None:
         self._start_timestamp = time()
+        sock = self._listen()
+        try:
+            self._serve(sock)
+        finally:
+            sock.close()
+
+    def _listen(self) -> socket.socket:
         sock = socket.socket()
         try:
             sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             sock.bind(('', self._port))
             sock.listen()
-            while not self._should_shut_down:
-                connection, address = sock.accept()
-                try:
-                    self._handle_request(connection)
-                finally:
-                    connection.close()                
-        finally:
+        except Exception:
             sock.close()
+            raise
+        return sock
+
+    def _serve(self, sock: socket.socket) -> None:
+        while not self._should_shut_down:
+            connection, address = sock.accept()
+            try:
+                self._handle_connection(connection)
+            finally:
+                connection.close()
+
+    def _shut_down(self) -> None:
+        self._should_shut_down = True
+
+    def _handle_connection(self, connection: socket.socket) -> None:
+        if not self._keep_alive:
+            self._handle_request(connection)
+            return
+        with connection.makefile() as reader:
+            for line in reader:
+                request = line.strip()
+                if not request:
+                    continue
+                if not self._reply(connection, request, perf_counter(), RESPONSE_DELIMITER):
+                    return
 
     def _handle_request(self, connection: socket.socket) -> None:
+        started = perf_counter()
         request = connection.makefile().readline().strip()
         if not request:
             return
+        read_time = perf_counter() - started
+        self._stats.record_latency(self._request_type(request), READ_PHASE, read_time)
+        self._reply(connection, request, started, '')
+
+    def _reply(self, connection: socket.socket, request: str, started: float, delimiter: str) -> bool:
+        """Sends the response to the request; returns False if the server is shutting down."""
+        response = self._respond(request)
+        if response is None:
+            return False
+        send_started = perf_counter()
+        connection.sendall((response + delimiter).encode('utf'))
+        finished = perf_counter()
+        request_type = self._request_type(request)
+        self._stats.record_latency(request_type, SEND_PHASE, finished - send_started)
+        self._stats.record_request(request_type, finished - started)
+        if request not in CONTROL_REQUESTS:
+            self._request_handler.on_response_sent(request)
+        return True
+
+    def _request_type(self, request: str) -> str:
+        if request in CONTROL_REQUESTS:
+            return request
+        return self._request_handler.get_request_type(request)
+
+    def _respond(self, request: str) -> Optional[str]:
+        """Returns the response to the request, or None if the server is shutting down."""
         if request == SHUTDOWN_REQUEST:
-            self._should_shut_down = True
-            return
+            self._shut_down()
+            return None
         if request == UPTIME_REQUEST:
-            connection.sendall(str(int(time() - self._start_timestamp)).encode('utf'))
+            return str(int(time() - self._start_timestamp))
+        if request == STATS_REQUEST:
+            return json.dumps(self._stats.to_dict(), sort_keys=True)
         else:
-            connection.sendall(self._request_handler.process_request(request).encode('utf'))
+            return self._request_handler.process_request(request)
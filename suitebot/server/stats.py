@@ -0,0 +1,124 @@
+import math
+from typing import Dict
+
+TOTAL_PHASE = 'total'
+READ_PHASE = 'read'
+PARSE_PHASE = 'parse'
+GAME_STATE_PHASE = 'game_state'
+MAKE_MOVE_PHASE = 'make_move'
+SEND_PHASE = 'send'
+
+PERCENTILES = (50, 95, 99)
+
+# logarithmic buckets: BUCKETS_PER_OCTAVE buckets per doubling of the latency,
+# starting at 1 microsecond; the last bucket collects everything above ~70 minutes
+BUCKETS_PER_OCTAVE = 4
+BUCKET_COUNT = 32 * BUCKETS_PER_OCTAVE
+
+
+class LatencyHistogram:
+    """Fixed-size histogram of latencies.
+
+    Recording a latency is O(1) and allocates nothing; percentiles are
+    approximated by the upper bound of the bucket they fall into (buckets
+    are ~19 % wide), the maximum is exact.
+    """
+    __slots__ = ('_counts', '_count', '_max')
+
+    def __init__(self) -> None:
+        self._counts = [0] * BUCKET_COUNT
+        self._count = 0
+        self._max = 0.0
+
+    def record(self, seconds: float) -> None:
+        microseconds = seconds * 1e6
+        if microseconds > 1:
+            bucket = min(int(math.log2(microseconds) * BUCKETS_PER_OCTAVE), BUCKET_COUNT - 1)
+        else:
+            bucket = 0
+        self._counts[bucket] += 1
+        self._count += 1
+        if seconds > self._max:
+            self._max = seconds
+
+    def get_count(self) -> int:
+        return self._count
+
+    def get_max(self) -> float:
+        return self._max
+
+    def percentile(self, percent: float) -> float:
+        """Returns the latency below which the given percentage of the recorded latencies fall.
+
+        :param percent: the percentage, 0-100
+        :return the latency in seconds, 0 if nothing has been recorded
+        """
+        if not self._count:
+            return 0.0
+        threshold = self._count * percent / 100
+        cumulative = 0
+        for bucket, count in enumerate(self._counts):
+            cumulative += count
+            if cumulative >= threshold and bucket < BUCKET_COUNT - 1:
+                return min(2 ** ((bucket + 1) / BUCKETS_PER_OCTAVE) / 1e6, self._max)
+        return self._max
+
+    def to_dict(self) -> Dict[str, float]:
+        """Returns the count, percentiles and maximum; latencies in milliseconds."""
+        result = {'count': self._count}
+        for percent in PERCENTILES:
+            result['p%i' % percent] = round(self.percentile(percent) * 1000, 3)
+        result['max'] = round(self._max * 1000, 3)
+        return result
+
+
+class RequestTypeStats:
+    __slots__ = ('count', 'errors', 'latencies')
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.latencies = {}  # type: Dict[str, LatencyHistogram]
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'latency': {phase: histogram.to_dict() for phase, histogram in self.latencies.items()},
+        }
+
+
+class ServerStats:
+    """Request counters and latency histograms, per request type and phase.
+
+    Shared by a server and its request handler: the server records the
+    request count and the read/send/total latencies, the handler records
+    errors and the latencies of the phases it goes through.
+    """
+
+    def __init__(self) -> None:
+        self._request_types = {}  # type: Dict[str, RequestTypeStats]
+
+    def _get(self, request_type: str) -> RequestTypeStats:
+        stats = self._request_types.get(request_type)
+        if stats is None:
+            stats = self._request_types[request_type] = RequestTypeStats()
+        return stats
+
+    def record_request(self, request_type: str, seconds: float) -> None:
+        stats = self._get(request_type)
+        stats.count += 1
+        self.record_latency(request_type, TOTAL_PHASE, seconds)
+
+    def record_error(self, request_type: str) -> None:
+        self._get(request_type).errors += 1
+
+    def record_latency(self, request_type: str, phase: str, seconds: float) -> None:
+        latencies = self._get(request_type).latencies
+        histogram = latencies.get(phase)
+        if histogram is None:
+            histogram = latencies[phase] = LatencyHistogram()
+        histogram.record(seconds)
+
+    def to_dict(self) -> dict:
+        return {request_type: stats.to_dict() for request_type, stats in self._request_types.items()}
@@ -0,0 +1,318 @@
+import argparse
+import ast
+import inspect
+import itertools
+import json
+import math
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from suitebot import json_util
+from suitebot.referee import Game, GameResult, AiPlayer, create_random_game_state
+from suitebot.server.stats import LatencyHistogram, PERCENTILES
+
+DEFAULT_GAMES = 100
+DEFAULT_PLAYERS_PER_GAME = 2
+DEFAULT_MIN_PLAN_SIZE = 10
+DEFAULT_MAX_PLAN_SIZE = 30
+# the wall density of every plan is drawn from 0 - this
+DEFAULT_MAX_WALL_DENSITY = 0.1
+
+INITIAL_RATING = 1500.0
+ELO_K = 16.0
+# 95 % confidence intervals
+Z_95 = 1.96
+# worker processes of an entrant's AI (e.g. MctsBot's pool): the tournament already plays a game per CPU
+ENTRANT_WORKERS = 1
+
+# a game to play: the entrants are indices into the list of entrants, by seat (bot ID - 1)
+GameJob = NamedTuple('GameJob', [
+    ('index', int),
+    ('seed', int),
+    ('entrants', Tuple[int, ...]),
+    ('width', int),
+    ('height', int),
+    ('wall_density', float),
+])
+
+GameSettings = NamedTuple('GameSettings', [
+    ('specs', Tuple[str, ...]),             # the entrants' specs (see create_ai)
+    ('time_budget', Optional[float]),       # seconds per move, None for no limit
+    ('max_rounds', Optional[int]),
+    ('request_format', str),
+])
+
+
+def parse_spec(spec: str) -> Tuple[str, Dict[str, object]]:
+    """Splits an entrant's spec, e.g. 'search:max_depth=3,transposition_table=None', into the AI name and its
+    keyword arguments (Python literals).
+
+    :raises ValueError: if the spec cannot be parsed
+    """
+    name, _, arguments = spec.partition(':')
+    kwargs = {}
+    for argument in filter(None, arguments.split(',')):
+        key, separator, value = argument.partition('=')
+        if not separator:
+            raise ValueError("not a keyword argument: %s" % argument)
+        kwargs[key.strip()] = ast.literal_eval(value.strip())
+    return name, kwargs
+
+
+def create_ai(spec: str, seed: int = None, workers: int = None):
+    """Creates the AI of an entrant's spec: an AI name from bot_server.BOT_AIS, optionally with arguments.
+
+    :param seed: seed of the AI's random choices, passed if the AI takes a seed and the spec sets none
+    :param workers: number of the AI's worker processes, passed if the AI takes it and the spec sets none
+    """
+    # imported here: the bot server imports all AIs
+    from suitebot.bot_server import BOT_AIS
+    name, kwargs = parse_spec(spec)
+    if name not in BOT_AIS:
+        raise ValueError("unknown AI: %s (choose from %s)" % (name, ', '.join(BOT_AIS)))
+    parameters = inspect.signature(BOT_AIS[name]).parameters
+    for (key, value) in (('seed', seed), ('workers', workers)):
+        if value is not None and key not in kwargs and key in parameters:
+            kwargs[key] = value
+    return BOT_AIS[name](**kwargs)
+
+
+def schedule(entrant_count: int, players_per_game: int, games: int, seed: int,
+             min_size: int, max_size: int, max_wall_density: float) -> List[GameJob]:
+    """Returns the games to play: every ordering of the entrants over the seats in turn, on random plans.
+
+    The schedule depends on the arguments only, so a tournament with the same seed plays the same games.
+    """
+    if entrant_count < players_per_game:
+        raise ValueError("%i players per game need as many entrants" % players_per_game)
+    rng = random.Random(seed)
+    seatings = itertools.cycle(itertools.permutations(range(entrant_count), players_per_game))
+    jobs = []
+    for index in range(games):
+        jobs.append(GameJob(
+            index=index,
+            seed=rng.getrandbits(32),
+            entrants=next(seatings),
+            width=rng.randint(min_size, max_size),
+            height=rng.randint(min_size, max_size),
+            wall_density=rng.uniform(0.0, max_wall_density),
+        ))
+    return jobs
+
+
+def play_game(settings: GameSettings, job: GameJob) -> Tuple[GameJob, GameResult]:
+    """Plays one game of the tournament; runs in the worker processes.
+
+    Every game gets new AIs, so that what an AI keeps between moves (e.g.
+    SearchBot's transposition table) does not depend on the games the
+    worker played before.  AIs taking a seed get one derived from the
+    game's seed and their seat, and AIs running worker processes get
+    ENTRANT_WORKERS of them unless their spec says otherwise.
+    """
+    game_state = create_random_game_state(job.width, job.height, len(job.entrants), random.Random(job.seed),
+                                          job.wall_density)
+    players = {seat + 1: AiPlayer(create_ai(settings.specs[entrant], seed=job.seed + seat + 1,
+                                            workers=ENTRANT_WORKERS))
+               for (seat, entrant) in enumerate(job.entrants)}
+    game = Game(game_state, players, time_budget=settings.time_budget, request_format=settings.request_format,
+                max_rounds=settings.max_rounds, game_id='game-%i' % job.index)
+    try:
+        return job, game.play()
+    finally:
+        for player in players.values():
+            player.close()
+
+
+def wilson_interval(successes: float, trials: int, z: float = Z_95) -> Tuple[float, float]:
+    """Returns the Wilson score interval of a proportion; draws may count as half successes."""
+    if trials == 0:
+        return 0.0, 1.0
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    center = (p + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+def expected_score(rating: float, opponent_rating: float) -> float:
+    return 1 / (1 + 10 ** ((opponent_rating - rating) / 400))
+
+
+class EntrantStats:
+    __slots__ = ('spec', 'games', 'wins', 'draws', 'losses', 'rating', 'latencies')
+
+    def __init__(self, spec: str) -> None:
+        self.spec = spec
+        self.games = 0
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+        self.rating = INITIAL_RATING
+        self.latencies = LatencyHistogram()
+
+    def get_score(self) -> float:
+        """Returns the share of the points won, a draw counting half."""
+        return (self.wins + self.draws / 2) / self.games if self.games else 0.0
+
+    def to_dict(self) -> dict:
+        low, high = wilson_interval(self.wins + self.draws / 2, self.games)
+        return {
+            'spec': self.spec,
+            'games': self.games,
+            'wins': self.wins,
+            'draws': self.draws,
+            'losses': self.losses,
+            'score': round(self.get_score(), 4),
+            'score_ci95': [round(low, 4), round(high, 4)],
+            'elo': round(self.rating, 1),
+            'latency': self.latencies.to_dict(),
+        }
+
+
+class Standings:
+    """Results of the tournament so far: the entrants' game outcomes, Elo ratings and move latencies.
+
+    A game is a win for its winner, a loss for every bot that died before
+    the end of the game, and a draw for the others.  The Elo ratings are
+    updated from every pair of seats of a game, the bot that lived longer
+    scoring the point; as Elo depends on the order of the games, the
+    results must be recorded in the order of the schedule to be
+    reproducible.
+    """
+
+    def __init__(self, specs: List[str], k: float = ELO_K) -> None:
+        self.entrants = [EntrantStats(spec) for spec in specs]
+        self._k = k
+
+    def record(self, job: GameJob, result: GameResult) -> None:
+        for (seat, entrant) in enumerate(job.entrants):
+            bot_id = seat + 1
+            stats = self.entrants[entrant]
+            stats.games += 1
+            death_round = result.death_rounds[bot_id]
+            if result.winner == bot_id:
+                stats.wins += 1
+            elif result.winner is not None or (death_round is not None and death_round < result.rounds):
+                stats.losses += 1
+            else:
+                stats.draws += 1
+            for latency in result.latencies[bot_id]:
+                stats.latencies.record(latency)
+
+        rating_changes = [0.0] * len(self.entrants)
+        for ((seat1, entrant1), (seat2, entrant2)) in itertools.combinations(enumerate(job.entrants), 2):
+            if entrant1 == entrant2:
+                continue
+            score = _pair_score(result.death_rounds[seat1 + 1], result.death_rounds[seat2 + 1])
+            change = self._k * (score - expected_score(self.entrants[entrant1].rating,
+                                                       self.entrants[entrant2].rating))
+            rating_changes[entrant1] += change
+            rating_changes[entrant2] -= change
+        for (stats, change) in zip(self.entrants, rating_changes):
+            stats.rating += change
+
+    def to_dict(self) -> dict:
+        return {'entrants': [stats.to_dict() for stats in self.entrants]}
+
+    def format_table(self) -> str:
+        header = '%-28s %6s %5s %5s %6s %6s %15s %7s' % (
+            'entrant', 'games', 'wins', 'draws', 'losses', 'score', '95% CI', 'elo')
+        header += ''.join(' %8s' % ('p%i ms' % percent) for percent in PERCENTILES) + ' %8s' % 'max ms'
+        lines = [header]
+        for stats in sorted(self.entrants, key=lambda elem: -elem.rating):
+            low, high = wilson_interval(stats.wins + stats.draws / 2, stats.games)
+            line = '%-28s %6i %5i %5i %6i %6.3f %15s %7.1f' % (
+                stats.spec, stats.games, stats.wins, stats.draws, stats.losses, stats.get_score(),
+                '[%.3f, %.3f]' % (low, high), stats.rating)
+            latencies = stats.latencies
+            line += ''.join(' %8.2f' % (latencies.percentile(percent) * 1000) for percent in PERCENTILES)
+            line += ' %8.2f' % (latencies.get_max() * 1000)
+            lines.append(line)
+        return '\n'.join(lines)
+
+
+def _pair_score(death_round1: Optional[int], death_round2: Optional[int]) -> float:
+    """The score of the first of two bots: 1 if it lived longer, 0.5 if they died in the same round."""
+    if death_round1 == death_round2:
+        return 0.5
+    if death_round1 is None:
+        return 1.0
+    if death_round2 is None:
+        return 0.0
+    return 1.0 if death_round1 > death_round2 else 0.0
+
+
+def run(settings: GameSettings, jobs: List[GameJob], workers: int = 1) -> Iterator[Tuple[GameJob, GameResult]]:
+    """Plays the games, in a pool of worker processes if there is more than one worker.
+
+    Yields the results in the order of the jobs.
+    """
+    if workers <= 1:
+        for job in jobs:
+            yield play_game(settings, job)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # the pool hands out several games at once to cut the messages, while keeping all workers busy
+        chunk_size = max(1, len(jobs) // (workers * 8))
+        for result in executor.map(play_game, itertools.repeat(settings), jobs, chunksize=chunk_size):
+            yield result
+
+
+def _parse_args(args: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='suitebot.tournament', description='Plays self-play games between AIs.')
+    parser.add_argument('entrants', nargs='+', metavar='AI',
+                        help='the name of an AI (as with bot_server --ai), optionally with keyword arguments, '
+                             'e.g. search:max_depth=3')
+    parser.add_argument('--games', type=int, default=DEFAULT_GAMES)
+    parser.add_argument('--players', type=int, default=DEFAULT_PLAYERS_PER_GAME, help='bots per game')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='seed of the schedule, the plans and the AIs taking a seed (e.g. mcts); the same seed '
+                             'plays the same games, unless there is a time budget and an AI searches until it '
+                             'runs out')
+    parser.add_argument('--min-size', type=int, default=DEFAULT_MIN_PLAN_SIZE, help='minimum plan width and height')
+    parser.add_argument('--max-size', type=int, default=DEFAULT_MAX_PLAN_SIZE, help='maximum plan width and height')
+    parser.add_argument('--max-walls', type=float, default=DEFAULT_MAX_WALL_DENSITY, metavar='DENSITY',
+                        help='maximum share of a plan covered by walls (default: %(default)s)')
+    parser.add_argument('--time-budget', type=int, default=None, metavar='MS',
+                        help='time budget of a move in milliseconds')
+    parser.add_argument('--max-rounds', type=int, default=None)
+    parser.add_argument('--format', choices=(json_util.SUITEBOT_FORMAT, json_util.TRON_LEAGUE_FORMAT),
+                        default=json_util.SUITEBOT_FORMAT, help='format of the move requests (default: %(default)s)')
+    parser.add_argument('--json', action='store_true', help='print the standings as JSON')
+    return parser.parse_args(args)
+
+
+def main(args: List[str]) -> None:
+    options = _parse_args(args)
+    seed = options.seed if options.seed is not None else random.getrandbits(32)
+    jobs = schedule(len(options.entrants), options.players, options.games, seed,
+                    options.min_size, options.max_size, options.max_walls)
+    settings = GameSettings(
+        specs=tuple(options.entrants),
+        time_budget=options.time_budget / 1000 if options.time_budget is not None else None,
+        max_rounds=options.max_rounds,
+        request_format=options.format,
+    )
+    for spec in options.entrants:
+        # fail before starting the pool
+        parse_spec(spec)
+    standings = Standings(options.entrants)
+    for (played, (job, result)) in enumerate(run(settings, jobs, options.workers or os.cpu_count() or 1), start=1):
+        standings.record(job, result)
+        if not options.json and played % max(1, len(jobs) // 10) == 0:
+            print("%i/%i games played" % (played, len(jobs)), file=sys.stderr)
+    if options.json:
+        result = standings.to_dict()
+        result['seed'] = seed
+        print(json.dumps(result, indent=2, sort_keys=True))
+    else:
+        print("seed %i" % seed)
+        print(standings.format_table())
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,9 @@
+from suitebot.game import game_state_factory
+
+
+def create_game_state(game_plan):
+    """Creates the game state of a plan with all its bots alive (the factory leaves them dead)."""
+    game_state = game_state_factory.create_from_game_plan_lines(game_plan)
+    for bot in game_state.get_bots():
+        bot.is_alive = True
+    return game_state
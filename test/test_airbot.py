@@ -1,7 +1,11 @@
-from suitebot.ai.airbot import Airbot
+from suitebot.ai.airbot import Airbot, STRAIGHT_DOUBLE_MOVES
+from suitebot.ai.deadline import Deadline
 from suitebot.game import game_state_factory
 from suitebot.game.direction import *
 from suitebot.game.move import Move
+from suitebot.game.point import Point, to_index, from_index
+
+from game_plans import create_game_state
 
 
 class BaseAirbotTest:
@@ -417,3 +421,103 @@ class TestDirection:
         assert LEFT.destination_from(Point(0,0), width=3) == Point(2,0)
         assert LEFT.destination_from(Point(1,0), width=3) == Point(0,0)
         assert LEFT.destination_from(Point(2,0), width=3) == Point(1,0)
+
+    def test_destination_index_from__matches_destination_from(self):
+        width, height = 4, 3
+        for index in range(width * height):
+            point = from_index(index, width)
+            for direction in ALL_DIRECTIONS:
+                expected = direction.destination_from(point, height=height, width=width)
+                assert direction.destination_index_from(index, width, height) == to_index(expected, width)
+
+    def test_neighbor_table_should_be_cached_per_plan_size(self):
+        assert neighbor_table(4, 3) is neighbor_table(4, 3)
+        assert neighbor_table(4, 3) is not neighbor_table(3, 4)
+
+
+class TestBatchScoring:
+
+    def test_calculators_score_all_moves_at_once(self):
+        batches = []
+
+        class RecordingAirbot(Airbot):
+            def get_move_score_calculators(self):
+                def record(context, moves):
+                    batches.append(list(moves))
+                    return [0] * len(moves)
+                return super().get_move_score_calculators() + (record,)
+
+        scored_moves = RecordingAirbot().score_moves(1, create_game_state(['     ', ' 1   ', '     ']))
+        assert len(batches) == 1
+        assert batches[0] == [move for (move, score) in scored_moves]
+        assert len(batches[0]) == 16
+
+    def test_last_supplied_move_wins_ties(self):
+        class FlatAirbot(Airbot):
+            def get_move_score_calculators(self):
+                return ()
+
+        # all single moves score 1.0, haste moves 1.2, detours 0.8: the last haste move wins
+        move = FlatAirbot().make_move(1, create_game_state(['     ', '  1  ', '     ', '     ']))
+        assert move == STRAIGHT_DOUBLE_MOVES[-1]
+
+    def test_one_instance_plays_several_games_at_once(self):
+        first_game = ['     ', ' 1   ', '     ']
+        second_game = ['*****', '*  1*', '*****', '  2  ']
+        expected = Airbot().score_moves(1, create_game_state(first_game))
+        other_game_state = create_game_state(second_game)
+
+        class NestingAirbot(Airbot):
+            nested = []
+
+            def get_move_score_calculators(self):
+                def play_other_game(context, moves):
+                    if not self.nested:
+                        self.nested.append(self.make_move(1, other_game_state))
+                    return [0] * len(moves)
+                return (play_other_game,) + super().get_move_score_calculators()
+
+        airbot = NestingAirbot()
+        # the turn of the second game, played in the middle of the first, does not disturb it
+        assert airbot.score_moves(1, create_game_state(first_game)) == expected
+        assert airbot.nested == [Move(LEFT)]
+
+    def test_safe_move_is_recorded_before_scoring(self):
+        calls = []
+
+        class SlowAirbot(Airbot):
+            def get_move_score_calculators(self):
+                def expire(context, moves):
+                    calls.append(deadline.get_best_move())
+                    deadline.cancel()
+                    return [0] * len(moves)
+
+                def skipped(context, moves):
+                    calls.append('skipped')
+                    return [0] * len(moves)
+                return (expire, skipped)
+
+        deadline = Deadline(10)
+        # the wall below: DOWN would be deadly
+        game_state = create_game_state(['     ', '  1  ', '*****', '     ', '    2'])
+        move = SlowAirbot().make_move(1, game_state, deadline)
+        assert len(calls) == 1 and calls[0] is not None
+        assert game_state.is_free_index(to_index(calls[0].step1.destination_from(Point(2, 1)), 5))
+        # the deadline expired in the first calculator: the second one is skipped
+        assert move == deadline.get_best_move() == calls[0]
+
+    def test_expired_deadline_still_gets_a_safe_move(self):
+        deadline = Deadline(0)
+        game_state = create_game_state(['     ', '  1  ', '*****', '     ', '    2'])
+        move = Airbot().make_move(1, game_state, deadline)
+        assert move == deadline.get_best_move()
+        assert move.step1 != DOWN
+
+    def test_scoring_stops_at_the_deadline(self):
+        game_state = create_game_state(['     ', '  1  ', '     ', '     '])
+        scored_moves = Airbot().score_moves(1, game_state, Deadline(0))
+        # none of the calculators ran: the scores are the suppliers' coefficients
+        assert {score for (move, score) in scored_moves} == {1.0, 1.2, 0.8}
+        assert [move for (move, score) in scored_moves] == \
+               [move for (move, score) in Airbot().score_moves(1, game_state)]
+
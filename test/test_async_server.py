@@ -0,0 +1,95 @@
+import socket
+import threading
+import time
+
+from suitebot import bot_server
+from suitebot.server.async_server import AsyncServer
+from suitebot.server.simple_request_handler import SimpleRequestHandler
+from suitebot.server.simple_server import SHUTDOWN_REQUEST
+from suitebot.server.stats import ServerStats
+
+
+class LengthRequestHandler(SimpleRequestHandler):
+    """Answers the length of the request."""
+
+    def process_request(self, request):
+        return str(len(request))
+
+
+class SlowRequestHandler(SimpleRequestHandler):
+    """Answers the request itself, after a while."""
+
+    def process_request(self, request):
+        time.sleep(0.3)
+        return request
+
+
+def _free_port():
+    sock = socket.socket()
+    sock.bind(('localhost', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def _send(port, request):
+    for attempt in range(50):
+        try:
+            connection = socket.create_connection(('localhost', port), timeout=5)
+            break
+        except ConnectionRefusedError:
+            time.sleep(0.05)
+    with connection:
+        connection.sendall((request + '\n').encode('utf'))
+        with connection.makefile() as reader:
+            return reader.read()
+
+
+class TestAsyncServer:
+
+    def _serve(self, **kwargs):
+        port = _free_port()
+        return port, self._run(AsyncServer(port, LengthRequestHandler(), **kwargs))
+
+    def _run(self, server):
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        return thread
+
+    def _shut_down(self, port, thread):
+        _send(port, SHUTDOWN_REQUEST)
+        thread.join(5)
+
+    def test_request_over_asyncio_default_limit(self):
+        port, thread = self._serve()
+        try:
+            assert _send(port, 'x' * 70000) == '70000'
+        finally:
+            self._shut_down(port, thread)
+
+    def test_request_over_limit_is_answered_with_an_error(self):
+        port, thread = self._serve(max_request_size=100)
+        try:
+            assert _send(port, 'x' * 1000).startswith('ERROR')
+            assert _send(port, 'x' * 10) == '10'
+        finally:
+            self._shut_down(port, thread)
+
+    def test_slow_requests_of_bot_server_overlap(self):
+        port = _free_port()
+        options = bot_server._parse_args([str(port), '--server', 'async'])
+        thread = self._run(bot_server._create_server(options, SlowRequestHandler(), ServerStats(), thread_safe=True))
+        try:
+            responses = []
+            clients = [threading.Thread(target=lambda request=request: responses.append(_send(port, request)))
+                       for request in ('1', '2')]
+            started = time.monotonic()
+            for client in clients:
+                client.start()
+            for client in clients:
+                client.join(5)
+            assert sorted(responses) == ['1', '2']
+            # one after the other, the two requests would take 0.6 s
+            assert time.monotonic() - started < 0.5
+        finally:
+            self._shut_down(port, thread)
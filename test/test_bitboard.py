@@ -0,0 +1,20 @@
+from suitebot.ai.bitboard import BitboardPlan, free_bitboard
+
+from game_plans import create_game_state
+
+
+class TestBitboardPlan:
+
+    def test_expand_wraps_around(self):
+        plan = BitboardPlan(3, 3)
+        # the corner (0, 0) neighbours (1, 0), (2, 0), (0, 1) and (0, 2)
+        assert plan.expand(1 << 0) == (1 << 1) | (1 << 2) | (1 << 3) | (1 << 6)
+
+    def test_flood_levels(self):
+        plan = BitboardPlan(5, 1)
+        levels = plan.flood_levels(1 << 0, 0b11110)
+        assert levels == [0b00001, 0b10011, 0b11111]
+
+    def test_free_bitboard(self):
+        game_state = create_game_state(['* 1', '  *'])
+        assert free_bitboard(game_state) == 0b011010
@@ -0,0 +1,230 @@
+import json
+import os
+import threading
+import time
+
+from suitebot import json_util
+from suitebot.ai.bot_ai import BotAi
+from suitebot.ai.deadline import Deadline
+from suitebot.bot_request_handler import BotRequestHandler, FALLBACK_MOVE
+from suitebot.game.direction import *
+from suitebot.game.move import Move
+from suitebot.game_session import GameSessionCache
+from suitebot.request_profiler import RequestProfiler, OUTPUT_FORMATS
+
+
+class SlowBotAi(BotAi):
+    """Records a move right away, then keeps "thinking" past any deadline."""
+
+    def __init__(self, first_move=None, final_move=Move(UP), delay=0.5):
+        self._first_move = first_move
+        self._final_move = final_move
+        self._delay = delay
+
+    def make_move(self, bot_id, game_state, deadline=None):
+        if deadline and self._first_move:
+            deadline.update_best_move(self._first_move)
+        time.sleep(self._delay)
+        return self._final_move
+
+    def get_name(self):
+        return 'Slow AI'
+
+
+class PonderingBotAi(BotAi):
+    """Plays UP right away, then ponders until cancelled."""
+
+    def __init__(self):
+        self.pondered = []
+        self.pondering = threading.Event()
+
+    def make_move(self, bot_id, game_state, deadline=None):
+        return Move(UP)
+
+    def ponder(self, bot_id, game_state, move, deadline):
+        self.pondered.append((bot_id, move))
+        self.pondering.set()
+        while not deadline.is_expired():
+            time.sleep(0.001)
+        self.pondering.clear()
+
+    def get_name(self):
+        return 'Pondering AI'
+
+
+class BlockingBotAi(PonderingBotAi):
+    """Like PonderingBotAi, but its moves wait while blocking is set."""
+
+    def __init__(self):
+        super().__init__()
+        self.blocking = threading.Event()
+        self.moving = threading.Event()
+
+    def make_move(self, bot_id, game_state, deadline=None):
+        self.moving.set()
+        while self.blocking.is_set():
+            time.sleep(0.001)
+        return super().make_move(bot_id, game_state, deadline)
+
+
+MOVE_REQUEST = json.dumps({
+    'yourBotId': 1,
+    'botIds': [1, 2],
+    'liveBotIds': [1, 2],
+    'gamePlan': ['1   ', '   2'],
+})
+
+
+class TestDeadline:
+
+    def test_should_expire_after_budget(self):
+        deadline = Deadline(0.01)
+        assert not deadline.is_expired()
+        time.sleep(0.02)
+        assert deadline.is_expired()
+        assert deadline.remaining() == 0.0
+
+    def test_cancel_should_expire_deadline(self):
+        deadline = Deadline(10)
+        deadline.cancel()
+        assert deadline.is_expired()
+        assert deadline.remaining() == 0.0
+
+    def test_should_keep_best_move(self):
+        deadline = Deadline(1)
+        assert deadline.get_best_move() is None
+        deadline.update_best_move(Move(LEFT))
+        assert deadline.get_best_move() == Move(LEFT)
+
+
+def _game_state(game_plan=('1   ', '   2')):
+    return json_util.bot_id_and_game_state_from_move_request(
+        {'yourBotId': 1, 'botIds': [1, 2], 'liveBotIds': [1, 2], 'gamePlan': list(game_plan)})[1]
+
+
+class TestDeadlineEnforcement:
+
+    def test_should_wait_for_ai_without_deadline(self):
+        handler = BotRequestHandler(SlowBotAi(delay=0))
+        assert handler._make_move(1, None, None) == Move(UP)
+
+    def test_should_return_ai_move_within_deadline(self):
+        handler = BotRequestHandler(SlowBotAi(first_move=Move(LEFT), delay=0))
+        assert handler._make_move(1, _game_state(), Deadline(1)) == Move(UP)
+
+    def test_should_return_best_move_so_far_on_overrun(self):
+        handler = BotRequestHandler(SlowBotAi(first_move=Move(LEFT)))
+        started = time.monotonic()
+        assert handler._make_move(1, _game_state(), Deadline(0.05)) == Move(LEFT)
+        assert time.monotonic() - started < 0.4
+
+    def test_should_return_safe_move_on_overrun_without_best_move(self):
+        handler = BotRequestHandler(SlowBotAi())
+        # UP and DOWN (around the plan) lead into the wall
+        assert handler._make_move(1, _game_state(['1   ', '*  2']), Deadline(0.05)) == Move(LEFT)
+        handler = BotRequestHandler(SlowBotAi())
+        assert handler._make_move(1, _game_state(['***', '*1*', '***', '2  ']), Deadline(0.05)) == FALLBACK_MOVE
+
+    def test_next_request_should_meet_its_deadline_while_ai_overruns(self):
+        game_states = []
+
+        class RecordingSlowBotAi(SlowBotAi):
+            def make_move(self, bot_id, game_state, deadline=None):
+                game_states.append(game_state)
+                return super().make_move(bot_id, game_state, deadline)
+
+        handler = BotRequestHandler(RecordingSlowBotAi(first_move=Move(LEFT), delay=0.5), time_budget=0.06,
+                                    sessions=GameSessionCache())
+        for _ in range(2):
+            started = time.monotonic()
+            assert handler.process_request(MOVE_REQUEST) == str(Move(LEFT))
+            assert time.monotonic() - started < 0.15
+        started = time.monotonic()
+        assert handler.process_request('NAME') == 'Slow AI'
+        assert time.monotonic() - started < 0.05
+        # the overrunning AI keeps its game state: the next move got a new one
+        assert len(game_states) == 2 and game_states[0] is not game_states[1]
+
+    def test_request_time_budget_should_override_default(self):
+        handler = BotRequestHandler(SlowBotAi(), time_budget=10)
+        assert handler._create_deadline(0.5).remaining() < 1
+        assert handler._create_deadline(None).remaining() > 1
+        assert BotRequestHandler(SlowBotAi())._create_deadline(None) is None
+
+
+class TestProfiling:
+
+    def test_should_refuse_profile_request_without_profiler(self):
+        handler = BotRequestHandler(SlowBotAi(delay=0))
+        assert handler.process_request('PROFILE 3').startswith('ERROR')
+
+    def test_should_write_profiles_of_requested_moves(self, tmpdir):
+        for output_format in OUTPUT_FORMATS:
+            output_dir = str(tmpdir.join(output_format))
+            handler = BotRequestHandler(SlowBotAi(delay=0.01), profiler=RequestProfiler(output_dir, output_format))
+            assert handler.process_request('PROFILE 2') == 'OK'
+            for _ in range(3):
+                assert handler._make_move(1, None, None, profile=handler._profiler.should_profile()) == Move(UP)
+            assert len(os.listdir(output_dir)) == 2
+
+
+class TestPondering:
+
+    def test_should_ponder_after_response_until_next_request(self):
+        bot_ai = PonderingBotAi()
+        handler = BotRequestHandler(bot_ai, ponder=True)
+        assert handler.process_request(MOVE_REQUEST) == str(Move(UP))
+        assert bot_ai.pondered == []
+        handler.on_response_sent(MOVE_REQUEST)
+        assert bot_ai.pondering.wait(1)
+        assert bot_ai.pondered == [(1, Move(UP))]
+
+        started = time.monotonic()
+        assert handler.process_request('NAME') == 'Pondering AI'
+        assert time.monotonic() - started < 0.1
+        assert not bot_ai.pondering.is_set()
+
+    def test_should_not_ponder_unless_enabled(self):
+        bot_ai = PonderingBotAi()
+        handler = BotRequestHandler(bot_ai)
+        handler.process_request(MOVE_REQUEST)
+        handler.on_response_sent(MOVE_REQUEST)
+        assert handler._pondering is None
+        assert bot_ai.pondered == []
+
+    def test_should_not_ponder_while_ai_overruns(self):
+        handler = BotRequestHandler(SlowBotAi(first_move=Move(LEFT)), ponder=True)
+        request = json.loads(MOVE_REQUEST)
+        request[json_util.TIME_BUDGET_KEY] = 50
+        request = json.dumps(request)
+        handler.process_request(request)
+        handler.on_response_sent(request)
+        assert handler._pondering is None
+
+    def test_should_not_ponder_while_another_request_is_processed(self):
+        bot_ai = BlockingBotAi()
+        handler = BotRequestHandler(bot_ai, ponder=True)
+        handler.process_request(MOVE_REQUEST)
+        bot_ai.blocking.set()
+        other_request = MOVE_REQUEST.replace('"yourBotId": 1', '"yourBotId": 2')
+        other = threading.Thread(target=handler.process_request, args=(other_request,))
+        other.start()
+        try:
+            assert bot_ai.moving.wait(1)
+            handler.on_response_sent(MOVE_REQUEST)
+            assert handler._pondering is None
+        finally:
+            bot_ai.blocking.clear()
+            other.join(1)
+        assert bot_ai.pondered == []
+
+    def test_should_ponder_only_the_position_of_its_request(self):
+        bot_ai = PonderingBotAi()
+        handler = BotRequestHandler(bot_ai, ponder=True)
+        handler.process_request(MOVE_REQUEST)
+        handler.on_response_sent('NAME')
+        assert handler._pondering is None
+        handler.on_response_sent(MOVE_REQUEST)
+        assert bot_ai.pondering.wait(1)
+        handler.stop_pondering()
+        assert bot_ai.pondered == [(1, Move(UP))]
@@ -0,0 +1,86 @@
+from suitebot.ai.airbot import Airbot, SINGLE_MOVES
+from suitebot.ai.chambers import ChamberAnalysis
+from suitebot.ai.deadline import Deadline
+from suitebot.ai.turn_context import TurnContext
+from suitebot.game.direction import *
+from suitebot.game.move import Move
+
+from game_plans import create_game_state
+
+
+# a 3x3 room on the left behind a one-cell door, a 3x4 room on the right
+TWO_ROOMS = [
+    '**********',
+    '*   *    *',
+    '*      1 *',
+    '*   *    *',
+    '**********',
+]
+
+
+class TestChamberAnalysis:
+
+    def test_reachable_area(self):
+        analysis = ChamberAnalysis(create_game_state(TWO_ROOMS), 1)
+        assert analysis.reachable_area == 21
+
+    def test_fillable_space_leaves_through_one_door(self):
+        analysis = ChamberAnalysis(create_game_state(TWO_ROOMS), 1)
+        # the right room (11 free cells), then the door and the left room
+        assert analysis.max_fillable() == 20
+        assert analysis.fillable_after(Move(LEFT)) == 20
+
+    def test_corridor_counts_fully(self):
+        analysis = ChamberAnalysis(create_game_state(['*1    *']), 1)
+        assert analysis.fillable_after(Move(RIGHT)) == 3
+        assert analysis.fillable_after(Move(RIGHT, RIGHT)) == 2
+
+    def test_fork_only_one_branch_is_fillable(self):
+        game_plan = [
+            '*******',
+            '*     *',
+            '***1***',
+            '*******',
+        ]
+        analysis = ChamberAnalysis(create_game_state(game_plan), 1)
+        assert analysis.reachable_area == 5
+        assert analysis.fillable_after(Move(UP)) == 2
+        assert analysis.fillable_after(Move(UP, LEFT)) == 1
+
+    def test_crashing_move_fills_nothing(self):
+        analysis = ChamberAnalysis(create_game_state(['*1 ']), 1)
+        assert analysis.fillable_after(Move(LEFT)) == 0
+        assert analysis.fillable_after(Move(RIGHT, LEFT)) == 0
+
+    def test_wraps_around(self):
+        analysis = ChamberAnalysis(create_game_state(['1   ']), 1)
+        # a ring: all free cells are in one chamber
+        assert analysis.fillable_after(Move(LEFT)) == 2
+        assert analysis.fillable_after(Move(RIGHT)) == 2
+
+
+class TestAirbotChambers:
+
+    def test_avoids_small_chamber_behind_door(self):
+        game_plan = [
+            '*********',
+            '*  *    *',
+            '*  1    *',
+            '*  *    *',
+            '*********',
+        ]
+        move = Airbot(chamber_analysis=True).make_move(1, create_game_state(game_plan))
+        assert move.step1 == RIGHT
+
+    def test_chamber_analysis_is_opt_in(self):
+        assert Airbot()._cramped_chamber_calculator not in Airbot().get_move_score_calculators()
+
+    def test_skipped_when_the_deadline_is_short(self):
+        airbot = Airbot(chamber_analysis=True)
+        game_state = create_game_state(TWO_ROOMS)
+        context = TurnContext(1, game_state, Deadline(0))
+        assert airbot._cramped_chamber_calculator(context, list(SINGLE_MOVES)) == [0] * 4
+        assert context._chambers is None
+        context = TurnContext(1, game_state, Deadline(10))
+        airbot._cramped_chamber_calculator(context, list(SINGLE_MOVES))
+        assert context._chambers is not None
@@ -0,0 +1,111 @@
+from suitebot.ai import endgame
+from suitebot.ai.airbot import Airbot
+from suitebot.ai.endgame import EndgameSolver
+
+from game_plans import create_game_state
+
+
+def _play_out(solver, game_state, bot_id=1):
+    """Plays the solver's moves until it has none; returns the number of moves survived."""
+    moves = 0
+    while True:
+        move = solver.make_move(bot_id, game_state)
+        if move is None:
+            return moves
+        game_state.apply_moves({bot_id: move})
+        if not game_state.get_bot(bot_id).is_alive:
+            return moves
+        moves += 1
+
+
+# bot 1 is isolated from bot 2 in a ring with a spur: at most 11 of its 12 free cells can be filled
+ISOLATED = [
+    '*******',
+    '*1    *',
+    '* * * *',
+    '*     *',
+    '*******',
+    '*2*****',
+    '*******',
+]
+
+
+class TestEndgameSolver:
+
+    def test_not_isolated(self):
+        game_state = create_game_state(['1   2'])
+        assert EndgameSolver().make_move(1, game_state) is None
+
+    def test_opponent_reaching_the_region_from_afar_is_not_isolated(self):
+        game_state = create_game_state([
+            '*********',
+            '*1      *',
+            '******* *',
+            '*2      *',
+            '*********',
+        ])
+        assert EndgameSolver().make_move(1, game_state) is None
+
+    def test_opponent_close_behind_a_wall_is_isolated(self):
+        game_state = create_game_state([
+            '*****',
+            '*1  *',
+            '*****',
+            '*2  *',
+            '*****',
+        ])
+        assert EndgameSolver().make_move(1, game_state) is not None
+
+    def test_no_opponents_is_not_an_endgame(self):
+        game_state = create_game_state(['*1  *'])
+        assert EndgameSolver().make_move(1, game_state) is None
+
+    def test_exact_longest_path(self):
+        game_state = create_game_state(ISOLATED)
+        assert _play_out(EndgameSolver(), game_state) == 11
+
+    def test_planned_path_is_replayed(self):
+        game_state = create_game_state(ISOLATED)
+        solver = EndgameSolver()
+        first_move = solver.make_move(1, game_state)
+        game_state.apply_moves({1: first_move})
+
+        def fail(*args):
+            raise AssertionError("the path should not be planned again")
+        original = endgame._longest_path
+        endgame._longest_path = fail
+        try:
+            assert solver.make_move(1, game_state) is not None
+        finally:
+            endgame._longest_path = original
+
+    def test_path_of_another_game_is_not_replayed(self):
+        solver = EndgameSolver()
+        assert solver.make_move(1, create_game_state(ISOLATED)) is not None
+        # another game on a plan of the same size, bot 1 at the same place - but not isolated
+        other_game = list(ISOLATED)
+        other_game[3] = '*    2*'
+        other_game[5] = '*******'
+        assert solver.make_move(1, create_game_state(other_game)) is None
+        # isolated, but in another region
+        other_game = list(ISOLATED)
+        other_game[2] = '* *** *'
+        expected_move = EndgameSolver().make_move(1, create_game_state(other_game))
+        assert solver.make_move(1, create_game_state(ISOLATED)) is not None
+        assert solver.make_move(1, create_game_state(other_game)) == expected_move
+        assert _play_out(solver, create_game_state(other_game)) == \
+               _play_out(EndgameSolver(), create_game_state(other_game))
+
+    def test_heuristic_path_fills_big_region(self):
+        game_plan = ['*' * 12] + ['*' + ' ' * 10 + '*'] * 10 + ['*' * 12, '*2*' + '*' * 9]
+        game_plan[1] = '*1' + ' ' * 9 + '*'
+        game_state = create_game_state(game_plan)
+        # an open rectangle can be filled completely
+        assert _play_out(EndgameSolver(), game_state) == 99
+
+
+class TestAirbotEndgame:
+
+    def test_leaves_endgame_to_solver(self):
+        expected_move = EndgameSolver().make_move(1, create_game_state(ISOLATED))
+        assert Airbot().make_move(1, create_game_state(ISOLATED)) == expected_move
@@ -0,0 +1,123 @@
+import copy
+
+from suitebot import json_util
+from suitebot.game.point import Point
+from suitebot.game_session import GameSessionCache
+
+from test_json_util import TRON_LEAGUE_JSON
+
+
+def suitebot_request(game_plan, live_bot_ids=(1, 2)):
+    return {
+        'gamePlan': game_plan,
+        'yourBotId': 1,
+        'botIds': [1, 2],
+        'liveBotIds': list(live_bot_ids),
+    }
+
+
+def assert_same_state(state, expected):
+    assert state.get_obstacle_locations() == expected.get_obstacle_locations()
+    assert state.get_live_bot_ids() == expected.get_live_bot_ids()
+    for bot_id in expected.get_all_bot_ids():
+        assert state.get_bot_location(bot_id) == expected.get_bot_location(bot_id)
+
+
+class TestSuitebotSessions:
+
+    TURNS = (
+        [
+            '*   ',
+            ' 1  ',
+            '   2',
+        ],
+        [
+            '*   ',
+            ' *1 ',
+            '  2*',
+        ],
+        [
+            '* 1 ',
+            ' ** ',
+            ' 2**',
+        ],
+    )
+
+    def test_should_extend_previous_state(self):
+        sessions = GameSessionCache()
+        _, first_state = sessions.bot_id_and_game_state_from_move_request(suitebot_request(self.TURNS[0]))
+        for game_plan in self.TURNS[1:]:
+            request = suitebot_request(game_plan)
+            bot_id, state = sessions.bot_id_and_game_state_from_move_request(request)
+            assert bot_id == 1
+            assert state is first_state
+            assert_same_state(state, json_util.bot_id_and_game_state_from_move_request(request)[1])
+
+    def test_should_update_live_bots(self):
+        sessions = GameSessionCache()
+        sessions.bot_id_and_game_state_from_move_request(suitebot_request(self.TURNS[0]))
+        _, state = sessions.bot_id_and_game_state_from_move_request(suitebot_request(self.TURNS[1], [1]))
+        assert state.get_live_bot_ids() == {1}
+
+    def test_should_rebuild_state_not_extending_previous_one(self):
+        sessions = GameSessionCache()
+        _, first_state = sessions.bot_id_and_game_state_from_move_request(suitebot_request(self.TURNS[1]))
+        request = suitebot_request(self.TURNS[0])
+        _, state = sessions.bot_id_and_game_state_from_move_request(request)
+        assert state is not first_state
+        assert_same_state(state, json_util.bot_id_and_game_state_from_move_request(request)[1])
+
+    def test_should_keep_games_apart(self):
+        sessions = GameSessionCache()
+        request = suitebot_request(self.TURNS[0])
+        _, first_state = sessions.bot_id_and_game_state_from_move_request(request)
+        other_game_request = dict(request, botIds=[1, 2, 3])
+        _, state = sessions.bot_id_and_game_state_from_move_request(other_game_request)
+        assert state is not first_state
+
+    def test_should_evict_least_recently_used_session(self):
+        sessions = GameSessionCache(max_sessions=1)
+        request = suitebot_request(self.TURNS[0])
+        _, first_state = sessions.bot_id_and_game_state_from_move_request(request)
+        sessions.bot_id_and_game_state_from_move_request(dict(request, gameId='other'))
+        _, state = sessions.bot_id_and_game_state_from_move_request(request)
+        assert state is not first_state
+
+    def test_should_rebuild_discarded_session(self):
+        sessions = GameSessionCache()
+        _, first_state = sessions.bot_id_and_game_state_from_move_request(suitebot_request(self.TURNS[0]))
+        sessions.discard(first_state)
+        request = suitebot_request(self.TURNS[1])
+        _, state = sessions.bot_id_and_game_state_from_move_request(request)
+        assert state is not first_state
+        assert_same_state(state, json_util.bot_id_and_game_state_from_move_request(request)[1])
+
+
+class TestTronLeagueSessions:
+
+    def test_should_append_new_segments(self):
+        sessions = GameSessionCache()
+        _, first_state = sessions.bot_id_and_game_state_from_move_request(TRON_LEAGUE_JSON)
+
+        request = copy.deepcopy(TRON_LEAGUE_JSON)
+        request['gameState']['playerStateMap']['1']['segments'].append({'x': 1, 'y': 5})
+        request['gameState']['playerStateMap']['2']['segments'].append({'x': 19, 'y': 5})
+        request['gameState']['livePlayers'].pop()
+        bot_id, state = sessions.bot_id_and_game_state_from_move_request(request)
+
+        assert bot_id == 1
+        assert state is first_state
+        assert state.get_bot_location(1) == Point(1, 5)
+        assert not state.is_free(Point(19, 5))
+        assert state.get_live_bot_ids() == {1}
+
+    def test_should_rebuild_state_on_changed_segments(self):
+        sessions = GameSessionCache()
+        _, first_state = sessions.bot_id_and_game_state_from_move_request(TRON_LEAGUE_JSON)
+
+        request = copy.deepcopy(TRON_LEAGUE_JSON)
+        request['gameState']['playerStateMap']['1']['segments'] = [{'x': 7, 'y': 7}]
+        _, state = sessions.bot_id_and_game_state_from_move_request(request)
+
+        assert state is not first_state
+        assert state.get_bot_location(1) == Point(7, 7)
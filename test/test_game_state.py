@@ -0,0 +1,143 @@
+import pytest
+
+from suitebot.game import game_state_factory
+from suitebot.game.bot import Bot
+from suitebot.game.point import Point
+from suitebot.game.move import Move
+from suitebot.game.direction import UP, DOWN, LEFT, RIGHT
+
+from game_plans import create_game_state
+
+
+class TestOccupancy:
+
+    def create(self):
+        return game_state_factory.create_from_game_plan_lines([
+            '*  ',
+            ' 1 ',
+            '  2',
+        ])
+
+    def test_is_free(self):
+        state = self.create()
+        assert not state.is_free(Point(0, 0))
+        assert not state.is_free(Point(1, 1))
+        assert not state.is_free(Point(2, 2))
+        assert state.is_free(Point(1, 0))
+        assert state.is_free(Point(0, 2))
+
+    def test_is_free_index(self):
+        state = self.create()
+        assert not state.is_free_index(0)
+        assert not state.is_free_index(1 * 3 + 1)
+        assert state.is_free_index(1)
+
+    def test_should_track_added_segments(self):
+        state = self.create()
+        obstacles = state.get_obstacle_locations()
+        state.get_bot(1).add_segment(Point(1, 0))
+        assert not state.is_free(Point(1, 0))
+        assert Point(1, 0) not in obstacles
+        assert Point(1, 0) in state.get_obstacle_locations()
+
+    def test_should_track_added_bots(self):
+        state = self.create()
+        state.add_bot(Bot(id=3, name='Bot #3', segments=[Point(0, 2)]))
+        assert not state.is_free(Point(0, 2))
+        state.get_bot(3).add_segment(Point(0, 1))
+        assert not state.is_free(Point(0, 1))
+
+    def test_obstacle_locations_should_be_cached(self):
+        state = self.create()
+        assert state.get_obstacle_locations() is state.get_obstacle_locations()
+        assert state.get_obstacle_locations() == {Point(0, 0), Point(1, 1), Point(2, 2)}
+
+
+class TestGameStateFactory:
+
+    def test_should_locate_bots_and_obstacles(self):
+        state = game_state_factory.create_from_game_plan_lines([
+            '* 2 ',
+            ' 1 *',
+        ])
+        assert state.get_plan_width() == 4
+        assert state.get_plan_height() == 2
+        assert state.get_all_bot_ids() == {1, 2}
+        assert state.get_bot_location(1) == Point(1, 1)
+        assert state.get_bot_location(2) == Point(2, 0)
+        assert state.get_obstacle_locations() == {Point(0, 0), Point(3, 1), Point(1, 1), Point(2, 0)}
+
+    def test_should_reject_unrecognized_character(self):
+        with pytest.raises(ValueError) as error:
+            game_state_factory.create_from_game_plan_lines([' 1x'])
+        assert 'x' in str(error.value)
+
+    def test_should_reject_non_rectangular_plan(self):
+        with pytest.raises(ValueError):
+            game_state_factory.create_from_game_plan_lines([' 1', '   '])
+
+
+class TestMoveSimulation:
+
+    def snapshot(self, state):
+        return (bytes(state._grid), state.get_live_bot_ids(),
+                {bot.id: list(bot.get_segments()) for bot in state.get_bots()})
+
+    def test_should_move_bots(self):
+        state = create_game_state([
+            '     ',
+            ' 1 2 ',
+            '     ',
+        ])
+        state.apply_moves({1: Move(UP), 2: Move(RIGHT, RIGHT)})
+        assert state.get_bot_location(1) == Point(1, 0)
+        assert state.get_bot_location(2) == Point(0, 1)    # wraps around
+        assert not state.is_free(Point(4, 1))
+        assert state.get_live_bot_ids() == {1, 2}
+
+    def test_should_kill_bot_hitting_obstacle(self):
+        state = create_game_state([
+            ' * ',
+            ' 1 ',
+            '   ',
+        ])
+        state.apply_moves({1: Move(UP)})
+        assert state.get_live_bot_ids() == set()
+        assert state.get_bot_location(1) == Point(1, 1)
+        assert state.is_free(Point(2, 1))
+
+    def test_should_kill_both_bots_in_head_on_crash(self):
+        state = create_game_state([
+            '     ',
+            '1   2',
+            '     ',
+        ])
+        state.apply_moves({1: Move(RIGHT, RIGHT), 2: Move(LEFT, LEFT)})
+        assert state.get_live_bot_ids() == set()
+        assert state.is_free(Point(2, 1))
+        assert not state.is_free(Point(1, 1))
+
+    def test_should_kill_bot_stepping_onto_cell_taken_by_first_step(self):
+        state = create_game_state([
+            '  2  ',
+            '1    ',
+            '     ',
+        ])
+        state.apply_moves({1: Move(RIGHT, RIGHT), 2: Move(DOWN)})
+        assert state.get_live_bot_ids() == {2}
+        assert state.get_bot_location(1) == Point(1, 1)
+
+    def test_undo_should_restore_state(self):
+        state = create_game_state([
+            '  2  ',
+            '1   *',
+            '     ',
+        ])
+        original = self.snapshot(state)
+        state.apply_moves({1: Move(RIGHT, RIGHT), 2: Move(DOWN)})
+        after_first = self.snapshot(state)
+        state.apply_moves({2: Move(RIGHT, RIGHT)})
+        state.undo()
+        assert self.snapshot(state) == after_first
+        state.undo()
+        assert self.snapshot(state) == original
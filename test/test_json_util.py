@@ -1,5 +1,8 @@
+import copy
 import json
 
+import pytest
+
 from suitebot import json_util
 from suitebot.game.game_state import GameState
 from suitebot.game.point import Point
@@ -131,10 +134,11 @@ def test_game_state_from_tron_league_json():
 
     assert state.get_bot_location(1) == Point(2,5)
     assert state.get_bot_location(2) == Point(18,5)
-    assert state.get_bot_location(3) == None
+    # there is no bot 3 (unlike a dead bot, it has no location at all)
+    assert 3 not in state.get_all_bot_ids()
 
     obstacle_locations = state.get_obstacle_locations()
-    assert len(obstacle_locations) == 8
+    assert len(obstacle_locations) == 9
     segments_of_bot_1 = {
         Point(5,5),
         Point(4,5),
@@ -148,4 +152,80 @@ def test_game_state_from_tron_league_json():
         Point(18,5),
     }
     all_bot_segments = segments_of_bot_1 | segments_of_bot_2
-    assert all_bot_segments == obstacle_locations
+    walls = {
+        Point(0,0),
+    }
+    assert all_bot_segments | walls == obstacle_locations
+
+
+def test_bot_id_and_game_state_from_suitebot_json():
+    data = {
+        'gamePlan': [
+            '* 2',
+            ' 1 ',
+            ' **',
+        ],
+        'yourBotId': 2,
+        'botIds': [1, 2],
+        'liveBotIds': [2],
+    }
+    bot_id, state = json_util.bot_id_and_game_state_from_json(json.dumps(data))
+
+    assert bot_id == 2
+    assert state.get_live_bot_ids() == frozenset({2})
+    assert state.get_bot_location(2) == Point(2,0)
+
+
+def test_bot_id_and_game_state_from_tron_league_json():
+    bot_id, state = json_util.bot_id_and_game_state_from_json(json.dumps(TRON_LEAGUE_JSON))
+
+    assert bot_id == 1
+    assert state.get_plan_width() == 30
+    assert state.get_bot_location(2) == Point(18,5)
+
+
+def test_bot_id_and_game_state_from_json_should_parse_once(monkeypatch):
+    calls = []
+
+    def counting_loads(move_request_json):
+        calls.append(move_request_json)
+        return json.loads(move_request_json)
+
+    monkeypatch.setattr(json_util._json_backend, 'loads', counting_loads)
+    json_util.bot_id_and_game_state_from_json(json.dumps(TRON_LEAGUE_JSON))
+
+    assert len(calls) == 1
+
+
+def test_detect_format_should_reject_unknown_format():
+    with pytest.raises(ValueError):
+        json_util.detect_format({'foo': 'bar'})
+
+
+def test_tron_league_walls_should_be_obstacles():
+    bot_id, state = json_util.bot_id_and_game_state_from_json(json.dumps(TRON_LEAGUE_JSON))
+
+    assert not state.is_free(Point(0,0))
+    assert state.is_free(Point(1,0))
+    assert Point(0,0) in state.get_obstacle_locations()
+
+
+def test_tron_league_static_grid_should_be_cached():
+    walls = [{'x': 1, 'y': 2}, {'x': 0, 'y': 0}]
+    grid = json_util._static_grid_from_walls(3, 4, walls)
+
+    assert json_util._static_grid_from_walls(3, 4, list(walls)) is grid
+    assert json_util._static_grid_from_walls(4, 3, walls) is not grid
+    assert grid == bytes([1, 0, 0,
+                          0, 0, 0,
+                          0, 1, 0,
+                          0, 0, 0])
+
+
+def test_tron_league_bots_without_segments_should_stand_on_starting_positions():
+    data = copy.deepcopy(TRON_LEAGUE_JSON)
+    data['gameState']['playerStateMap']['2']['segments'] = []
+
+    bot_id, state = json_util.bot_id_and_game_state_from_json(json.dumps(data))
+
+    assert state.get_bot_location(2) == Point(15,5)
@@ -0,0 +1,60 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from suitebot.server.async_server import AsyncServer
+from suitebot.server.simple_server import SimpleServer, SHUTDOWN_REQUEST
+
+from test_async_server import LengthRequestHandler, _free_port, _send
+
+
+@pytest.fixture(params=[SimpleServer, AsyncServer])
+def port(request):
+    port = _free_port()
+    server = request.param(port, LengthRequestHandler(), keep_alive=True)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    yield port
+    _send(port, SHUTDOWN_REQUEST)
+    thread.join(5)
+    assert not thread.is_alive()
+
+
+def _connect(port):
+    for attempt in range(50):
+        try:
+            return socket.create_connection(('localhost', port), timeout=5)
+        except ConnectionRefusedError:
+            time.sleep(0.05)
+    raise ConnectionRefusedError(port)
+
+
+class TestKeepAlive:
+
+    def test_several_requests_on_one_connection(self, port):
+        with _connect(port) as connection, connection.makefile() as reader:
+            for request in ('a', 'bb', 'ccc'):
+                connection.sendall((request + '\n').encode('utf'))
+                assert reader.readline() == '%i\n' % len(request)
+
+    def test_pipelined_requests_are_answered_in_order(self, port):
+        with _connect(port) as connection, connection.makefile() as reader:
+            connection.sendall(b'a\nbb\n\nccc\n')
+            assert [reader.readline() for _ in range(3)] == ['1\n', '2\n', '3\n']
+
+    def test_server_closes_the_connection_after_the_client(self, port):
+        with _connect(port) as connection, connection.makefile() as reader:
+            connection.sendall(b'a\nbb\n')
+            connection.shutdown(socket.SHUT_WR)
+            # the requests sent before the client closed its side are still answered
+            assert reader.read() == '1\n2\n'
+
+    def test_closed_connection_does_not_block_the_next_one(self, port):
+        with _connect(port) as connection, connection.makefile() as reader:
+            connection.sendall(b'a\n')
+            assert reader.readline() == '1\n'
+        with _connect(port) as connection, connection.makefile() as reader:
+            connection.sendall(b'bb\n')
+            assert reader.readline() == '2\n'
@@ -0,0 +1,120 @@
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+from suitebot.ai.deadline import Deadline
+from suitebot.ai.mcts_bot import MctsBot, snapshot, restore, merge_root_stats
+from suitebot.game.direction import *
+from suitebot.game.move import Move
+
+from game_plans import create_game_state
+
+
+OPEN_PLAN = [
+    '        ',
+    ' 1      ',
+    '      2 ',
+    '        ',
+]
+
+
+class TestMctsBot:
+
+    def test_avoids_dead_end(self):
+        game_plan = [
+            '*******',
+            '*     *',
+            '***1***',
+            '*** ***',
+            '*******',
+            '*2   **',
+            '*******',
+        ]
+        move = MctsBot(workers=1).make_move(1, create_game_state(game_plan))
+        assert move.step1 == UP
+
+    def test_leaves_game_state_unchanged(self):
+        game_state = create_game_state(OPEN_PLAN)
+        grid = bytes(game_state.get_grid())
+        MctsBot(workers=1, iterations=50).make_move(1, game_state)
+        assert bytes(game_state.get_grid()) == grid
+        assert game_state.get_live_bot_ids() == {1, 2}
+        assert game_state.get_bot(1).get_segment_count() == 1
+
+    def test_reports_best_move_to_deadline(self):
+        deadline = Deadline(0.05)
+        move = MctsBot(workers=1).make_move(1, create_game_state(OPEN_PLAN), deadline)
+        assert deadline.get_best_move() == move
+
+    def test_same_seed_plays_same_moves(self):
+        def play(seed):
+            bots = {1: MctsBot(workers=1, iterations=20, seed=seed), 2: MctsBot(workers=1, iterations=20, seed=seed)}
+            game_state = create_game_state(OPEN_PLAN)
+            moves = []
+            for _ in range(6):
+                turn = {bot_id: bot.make_move(bot_id, game_state) for (bot_id, bot) in bots.items()}
+                moves.append(turn)
+                game_state.apply_moves(turn)
+            return moves
+        assert play(7) == play(7)
+
+    def test_merges_results_of_parallel_workers(self):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            move = MctsBot(workers=2, iterations=20, executor=executor).make_move(1, create_game_state(OPEN_PLAN))
+        assert move is not None
+
+    def test_process_pool(self):
+        bot = MctsBot(workers=2, iterations=20)
+        try:
+            assert bot.make_move(1, create_game_state(OPEN_PLAN)) is not None
+        finally:
+            bot.shutdown()
+
+    def test_process_pool_in_forked_process(self):
+        # like the workers of the prefork server: the AI is created, and has played, before the fork
+        bot = MctsBot(workers=2, iterations=20)
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        try:
+            bot.make_move(1, create_game_state(OPEN_PLAN))
+            child = context.Process(target=_play_and_report, args=(bot, results))
+            child.start()
+            child.join(10)
+            if child.is_alive():
+                child.terminate()
+            assert child.exitcode == 0
+            assert results.get(timeout=1) is not None
+        finally:
+            bot.shutdown()
+
+    def test_ignores_live_bot_without_segments(self):
+        grid = bytearray(32)
+        grid[9] = 1
+        game_state = restore((8, 4, bytes(grid), [(1, True, [1], [1]), (2, True, [], [])]))
+        assert MctsBot(workers=1, iterations=20).make_move(1, game_state) is not None
+
+    def test_dead_bot_plays_default_move(self):
+        game_state = create_game_state(['1 2'])
+        game_state.get_bot(1).is_alive = False
+        assert MctsBot(workers=1).make_move(1, game_state) == Move(DOWN)
+
+
+def _play_and_report(bot, results):
+    results.put(bot.make_move(1, create_game_state(OPEN_PLAN)))
+    bot.shutdown()
+
+
+class TestSnapshot:
+
+    def test_restore(self):
+        game_state = create_game_state(['*1 ', ' 2 '])
+        game_state.get_bot(2).is_alive = False
+        restored = restore(snapshot(game_state))
+        assert restored.get_plan_width() == 3
+        assert bytes(restored.get_grid()) == bytes(game_state.get_grid())
+        assert restored.get_live_bot_ids() == {1}
+        assert restored.get_bot_location(2) == game_state.get_bot_location(2)
+
+
+def test_merge_root_stats():
+    merged = merge_root_stats([{Move(UP): (2, 1.0)}, {Move(UP): (3, 0.5), Move(DOWN): (1, 1.0)}])
+    assert merged == {Move(UP): (5, 1.5), Move(DOWN): (1, 1.0)}
@@ -0,0 +1,46 @@
+import pickle
+
+import pytest
+
+from suitebot.game.bot import Bot
+from suitebot.game.direction import *
+from suitebot.game.move import Move
+
+
+class TestMove:
+
+    def test_moves_should_be_interned(self):
+        assert Move(UP) is Move(UP)
+        assert Move(UP, LEFT) is Move(UP, LEFT)
+        assert Move(UP, LEFT) is not Move(LEFT, UP)
+
+    def test_moves_should_be_hashable(self):
+        assert {Move(UP): 1, Move(UP, UP): 2}[Move(UP, UP)] == 2
+        assert len({Move(DOWN), Move(DOWN), Move(DOWN, DOWN)}) == 2
+
+    def test_pickled_move_should_stay_interned(self):
+        assert pickle.loads(pickle.dumps(Move(RIGHT, DOWN))) is Move(RIGHT, DOWN)
+
+    def test_str(self):
+        assert str(Move(UP)) == 'U'
+        assert str(Move(RIGHT, DOWN)) == 'RD'
+
+    def test_from_string(self):
+        assert Move.from_string('U') is Move(UP)
+        assert Move.from_string('RD') is Move(RIGHT, DOWN)
+        for invalid in ('', 'X', 'UDL', 'u'):
+            with pytest.raises(ValueError):
+                Move.from_string(invalid)
+
+
+class TestBot:
+
+    def test_segments(self):
+        bot = Bot(id=1, name='Bot #1', segments=[Point(1, 2)])
+        bot.add_segment(Point(1, 3))
+        assert bot.get_segments() == [Point(1, 2), Point(1, 3)]
+        assert bot.get_location() == Point(1, 3)
+        assert bot.get_segment_count() == 2
+
+    def test_bot_without_segments_has_no_location(self):
+        assert Bot(id=1, name='Bot #1').get_location() is None
@@ -0,0 +1,67 @@
+import os
+import signal
+import socket
+import threading
+import time
+
+import pytest
+
+from suitebot.server.prefork_server import PreforkServer, WORKER_CHECK_INTERVAL
+from suitebot.server.simple_request_handler import SimpleRequestHandler
+from suitebot.server.simple_server import SHUTDOWN_REQUEST, UPTIME_REQUEST
+
+from test_async_server import _free_port, _send
+
+
+class PidRequestHandler(SimpleRequestHandler):
+    """Answers the process ID of the worker."""
+
+    def process_request(self, request):
+        return str(os.getpid())
+
+
+class TestPreforkServer:
+
+    def _serve(self, workers):
+        port = _free_port()
+        thread = threading.Thread(target=PreforkServer(port, PidRequestHandler(), workers=workers).run, daemon=True)
+        thread.start()
+        return port, thread
+
+    def test_restarts_dead_worker(self):
+        port, thread = self._serve(workers=1)
+        try:
+            pid = int(_send(port, 'PID'))
+            os.kill(pid, signal.SIGKILL)
+            time.sleep(WORKER_CHECK_INTERVAL * 2)
+            new_pid = int(_send(port, 'PID'))
+            assert new_pid != pid
+        finally:
+            _send(port, SHUTDOWN_REQUEST)
+            thread.join(5)
+
+    def test_uptime_of_restarted_worker_counts_from_start_of_server(self):
+        port, thread = self._serve(workers=1)
+        try:
+            pid = int(_send(port, 'PID'))
+            time.sleep(1.1)
+            os.kill(pid, signal.SIGKILL)
+            time.sleep(WORKER_CHECK_INTERVAL * 2)
+            assert int(_send(port, 'PID')) != pid
+            assert int(_send(port, UPTIME_REQUEST)) >= 1
+        finally:
+            _send(port, SHUTDOWN_REQUEST)
+            thread.join(5)
+
+    def test_exit_stops_all_workers(self):
+        port, thread = self._serve(workers=3)
+        pids = {int(_send(port, 'PID')) for _ in range(10)}
+        _send(port, SHUTDOWN_REQUEST)
+        thread.join(5)
+        assert not thread.is_alive()
+        for pid in pids:
+            with pytest.raises(ProcessLookupError):
+                os.kill(pid, 0)
+        # no worker is left holding the listening socket
+        with pytest.raises(ConnectionRefusedError):
+            socket.create_connection(('localhost', port), timeout=1)
@@ -0,0 +1,176 @@
+import random
+import socket
+import threading
+
+import pytest
+
+from suitebot import json_util
+from suitebot.ai.airbot import Airbot
+from suitebot.game.direction import *
+from suitebot.game.move import Move
+from suitebot.game.point import Point
+from suitebot.referee import Game, Player, AiPlayer, SocketPlayer, create_random_game_state
+
+from game_plans import create_game_state
+
+
+class FixedPlayer(Player):
+    """Plays the given moves, then no valid move; records the requests."""
+
+    def __init__(self, *moves):
+        self._moves = list(moves)
+        self.move_requests = []
+
+    def make_move(self, move_request):
+        self.move_requests.append(move_request)
+        return self._moves.pop(0) if self._moves else None
+
+    def get_name(self):
+        return 'Fixed'
+
+
+class TestGame:
+
+    def test_head_on_collision_is_a_draw(self):
+        game = Game(create_game_state(['1 2 ']), {1: FixedPlayer(Move(RIGHT)), 2: FixedPlayer(Move(LEFT))})
+        result = game.play()
+        assert result.rounds == 1
+        assert result.winner is None
+        assert result.death_rounds == {1: 1, 2: 1}
+
+    def test_last_bot_standing_wins(self):
+        game_plan = ['1   ', '    ', '2   ']
+        game = Game(create_game_state(game_plan),
+                    {1: FixedPlayer(Move(RIGHT), Move(LEFT)), 2: FixedPlayer(Move(RIGHT))})
+        result = game.play()
+        # bot 1 runs into its own tail in round 2, while bot 2 has no move left
+        assert result.winner is None
+        assert result.death_rounds == {1: 2, 2: 2}
+        assert len(result.latencies[1]) == 2
+
+        game = Game(create_game_state(game_plan),
+                    {1: FixedPlayer(Move(RIGHT), Move(DOWN)), 2: FixedPlayer(Move(RIGHT))})
+        result = game.play()
+        assert result.winner == 1
+        assert result.death_rounds == {1: None, 2: 2}
+
+    def test_plan_wraps_around(self):
+        game = Game(create_game_state(['1 ', '  ', ' 2']),
+                    {1: FixedPlayer(Move(UP), Move(LEFT)), 2: FixedPlayer(Move(DOWN), Move(RIGHT))})
+        game.play_round()
+        assert game.get_game_state().get_bot_location(1) == Point(0, 2)
+        assert game.get_game_state().get_bot_location(2) == Point(1, 0)
+
+    def test_max_rounds(self):
+        game = Game(create_game_state(['1    ', '     ', '  2  ']),
+                    {1: FixedPlayer(Move(RIGHT)), 2: FixedPlayer(Move(RIGHT))}, max_rounds=1)
+        result = game.play()
+        assert result.rounds == 1
+        assert result.winner is None
+        assert result.death_rounds == {1: None, 2: None}
+
+    def test_every_bot_needs_a_player(self):
+        with pytest.raises(ValueError):
+            Game(create_game_state(['1 2']), {1: FixedPlayer()})
+
+
+class TestMoveRequests:
+
+    GAME_PLAN = ['*1  ', '    ', '2   ']
+
+    def _play_first_round(self, request_format):
+        game_state = create_game_state(self.GAME_PLAN)
+        game = Game(game_state, {1: FixedPlayer(), 2: FixedPlayer()}, time_budget=0.1,
+                    request_format=request_format, game_id='g')
+        game_state.apply_moves({1: Move(RIGHT, DOWN), 2: Move(UP)})
+        return game
+
+    def test_suitebot_move_request(self):
+        game = self._play_first_round(json_util.SUITEBOT_FORMAT)
+        assert game.move_request(2) == {
+            'gamePlan': ['*** ', '2 1 ', '*   '],
+            'yourBotId': 2,
+            'botIds': [1, 2],
+            'liveBotIds': [1, 2],
+            json_util.TIME_BUDGET_KEY: 100,
+            'gameId': 'g',
+        }
+
+    def test_dead_bot_is_left_out_of_suitebot_plan(self):
+        game = self._play_first_round(json_util.SUITEBOT_FORMAT)
+        game.get_game_state().get_bot(2).is_alive = False
+        move_request = game.move_request(1)
+        assert move_request['gamePlan'] == ['*** ', '* 1 ', '*   ']
+        assert move_request['liveBotIds'] == [1]
+
+    def test_move_requests_describe_the_game_state(self):
+        for request_format in (json_util.SUITEBOT_FORMAT, json_util.TRON_LEAGUE_FORMAT):
+            game = self._play_first_round(request_format)
+            bot_id, game_state = json_util.bot_id_and_game_state_from_move_request(game.move_request(1))
+            assert json_util.detect_format(game.move_request(1)) == request_format
+            assert bot_id == 1
+            assert game_state.get_live_bot_ids() == {1, 2}
+            assert game_state.get_bot_location(1) == Point(2, 1)
+            assert game_state.get_bot_location(2) == Point(0, 1)
+            assert bytes(game_state.get_grid()) == bytes(game.get_game_state().get_grid())
+
+    def test_tron_league_walls_and_starting_positions(self):
+        game = self._play_first_round(json_util.TRON_LEAGUE_FORMAT)
+        game_plan = game.move_request(1)['gameState']['gamePlan']
+        assert game_plan['walls'] == [{'x': 0, 'y': 0}]
+        assert game_plan['startingPositions'] == [{'x': 1, 'y': 0}, {'x': 0, 'y': 2}]
+
+
+class TestPlayers:
+
+    def test_ai_player(self):
+        game = Game(create_game_state(['   ', ' 1 ', '   ', ' 2 ']), {1: AiPlayer(Airbot()), 2: FixedPlayer()})
+        result = game.play()
+        assert result.winner == 1
+
+    def test_socket_player(self):
+        server = socket.socket()
+        server.bind(('localhost', 0))
+        server.listen()
+        requests = []
+
+        def serve():
+            for response in ('Fixed bot', 'RD', 'nonsense'):
+                connection, address = server.accept()
+                with connection:
+                    requests.append(connection.makefile().readline().strip())
+                    connection.sendall(response.encode('utf'))
+
+        thread = threading.Thread(target=serve, daemon=True)
+        thread.start()
+        try:
+            player = SocketPlayer('localhost', server.getsockname()[1], timeout=1)
+            assert player.get_name() == 'Fixed bot'
+            assert player.make_move({'yourBotId': 1}) == Move(RIGHT, DOWN)
+            assert player.make_move({'yourBotId': 1}) is None
+            thread.join(1)
+        finally:
+            server.close()
+        assert requests == ['NAME', '{"yourBotId": 1}', '{"yourBotId": 1}']
+
+    def test_unreachable_server_plays_no_move(self):
+        server = socket.socket()
+        server.bind(('localhost', 0))
+        port = server.getsockname()[1]
+        server.close()
+        assert SocketPlayer('localhost', port, timeout=1).make_move({}) is None
+
+
+class TestRandomGameState:
+
+    def test_reproducible(self):
+        first = create_random_game_state(20, 10, 3, random.Random(5))
+        second = create_random_game_state(20, 10, 3, random.Random(5))
+        assert bytes(first.get_grid()) == bytes(second.get_grid())
+        assert first.get_live_bot_ids() == {1, 2, 3}
+        assert [first.get_bot_location(bot_id) for bot_id in (1, 2, 3)] == \
+               [second.get_bot_location(bot_id) for bot_id in (1, 2, 3)]
+
+    def test_no_room(self):
+        with pytest.raises(ValueError):
+            create_random_game_state(2, 1, 3, random.Random(1))
@@ -0,0 +1,157 @@
+import random
+import threading
+import time
+
+from suitebot.ai.airbot import Airbot
+from suitebot.ai.deadline import Deadline
+from suitebot.ai.search_bot import SearchBot
+from suitebot.ai.transposition_table import TranspositionTable, ZobristHasher, EXACT, LOWER_BOUND
+from suitebot.game.direction import *
+from suitebot.game.move import Move
+from suitebot.referee import create_random_game_state
+
+from game_plans import create_game_state
+
+
+class TestSearchBot:
+
+    def test_avoids_dead_end(self):
+        game_plan = [
+            '*****',
+            '*   *',
+            '* 1**',
+            '* ***',
+            '*****',
+        ]
+        game_state = create_game_state(game_plan)
+        move = SearchBot().make_move(1, game_state)
+        assert move.step1 in (UP, LEFT)
+
+    def test_seats_sharing_one_instance_do_not_share_results(self):
+        search_bot = SearchBot(max_depth=2)
+        for seed in range(10):
+            game_state = create_random_game_state(8, 8, 2, random.Random(seed))
+            search_bot.make_move(1, game_state)
+            assert search_bot.make_move(2, game_state) == SearchBot(max_depth=2).make_move(2, game_state)
+
+    def test_leaves_game_state_unchanged(self):
+        game_plan = [
+            '      ',
+            ' 1    ',
+            '    2 ',
+            '      ',
+        ]
+        game_state = create_game_state(game_plan)
+        obstacles = game_state.get_obstacle_locations()
+        grid = bytes(game_state.get_grid())
+        SearchBot(max_depth=3).make_move(1, game_state)
+        assert game_state.get_obstacle_locations() == obstacles
+        assert bytes(game_state.get_grid()) == grid
+        assert game_state.get_live_bot_ids() == {1, 2}
+
+    def test_reports_best_move_to_deadline(self):
+        game_plan = [
+            '        ',
+            ' 1      ',
+            '      2 ',
+            '        ',
+        ]
+        deadline = Deadline(0.05)
+        move = SearchBot().make_move(1, create_game_state(game_plan), deadline)
+        assert deadline.get_best_move() == move
+
+    def test_dead_bot_plays_default_move(self):
+        game_state = create_game_state(['1 2'])
+        game_state.get_bot(1).is_alive = False
+        assert SearchBot().make_move(1, game_state) == Move(DOWN)
+
+
+class TestPondering:
+
+    GAME_PLAN = [
+        '        ',
+        ' 1      ',
+        '      2 ',
+        '        ',
+    ]
+
+    def _ponder_in_background(self, search_bot, game_state, move):
+        deadline = Deadline(10)
+        thread = threading.Thread(target=search_bot.ponder, args=(1, game_state, move, deadline))
+        thread.start()
+        return thread, deadline
+
+    def test_expected_position_starts_warm(self):
+        game_state = create_game_state(self.GAME_PLAN)
+        table = TranspositionTable()
+        search_bot = SearchBot(transposition_table=table)
+        thread, deadline = self._ponder_in_background(search_bot, game_state, Move(RIGHT))
+        time.sleep(0.2)
+        deadline.cancel()
+        thread.join(1)
+        assert not thread.is_alive()
+
+        enemy_scores = Airbot().score_moves(2, game_state)
+        enemy_move = max(enemy_scores, key=lambda elem: elem[1])[0]
+        game_state.apply_moves({1: Move(RIGHT), 2: enemy_move})
+        hasher = ZobristHasher(8, 4)
+        entry = table.get(hasher.hash(game_state) ^ hasher.perspective_key(1))
+        assert entry is not None and entry.flag == EXACT and entry.depth >= 2
+
+        # the move pondered is played without searching again
+        move = SearchBot(max_depth=entry.depth, transposition_table=table).make_move(1, game_state)
+        assert move == entry.best_move
+
+    def test_leaves_game_state_unchanged(self):
+        game_state = create_game_state(self.GAME_PLAN)
+        grid = bytes(game_state.get_grid())
+        thread, deadline = self._ponder_in_background(SearchBot(), game_state, Move(DOWN))
+        time.sleep(0.05)
+        started = time.monotonic()
+        deadline.cancel()
+        thread.join(1)
+        assert time.monotonic() - started < 0.05
+        assert bytes(game_state.get_grid()) == grid
+        assert game_state.get_live_bot_ids() == {1, 2}
+
+
+class TestZobristHasher:
+
+    def test_incremental_hash_matches_full_hash(self):
+        game_plan = [
+            '      ',
+            ' 1    ',
+            '    2 ',
+            '      ',
+        ]
+        game_state = create_game_state(game_plan)
+        hasher = ZobristHasher(6, 4)
+        before = hasher.hash(game_state)
+        game_state.apply_moves({1: Move(RIGHT, RIGHT), 2: Move(UP)})
+        after = hasher.hash(game_state)
+        assert after != before
+        game_state.undo()
+        assert hasher.hash(game_state) == before
+
+    def test_head_matters(self):
+        hasher = ZobristHasher(3, 1)
+        assert hasher.hash(create_game_state(['1 2'])) != hasher.hash(create_game_state(['2 1']))
+
+
+class TestTranspositionTable:
+
+    def test_keeps_deeper_entry(self):
+        table = TranspositionTable()
+        table.put(42, 3, 1.0, EXACT, Move(UP))
+        table.put(42, 1, 2.0, LOWER_BOUND, Move(DOWN))
+        assert table.get(42).depth == 3
+        assert table.get(42).best_move == Move(UP)
+
+    def test_evicts_oldest_entry(self):
+        table = TranspositionTable(max_entries=2)
+        table.put(1, 1, 0.0, EXACT, None)
+        table.put(2, 1, 0.0, EXACT, None)
+        table.put(3, 1, 0.0, EXACT, None)
+        assert len(table) == 2
+        assert table.get(1) is None
+        assert table.get(3) is not None
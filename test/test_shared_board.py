@@ -0,0 +1,81 @@
+import os
+import subprocess
+import sys
+import textwrap
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from suitebot.game import shared_board
+from suitebot.game.shared_board import SharedBoard, BoardDescriptor, read_game_state
+from suitebot.game.point import Point
+
+from game_plans import create_game_state
+
+pytestmark = pytest.mark.skipif(not shared_board.is_supported(), reason="requires multiprocessing.shared_memory")
+
+
+def _read_live_bots(descriptor: BoardDescriptor):
+    game_state = read_game_state(descriptor)
+    return sorted(game_state.get_live_bot_ids())
+
+
+class TestSharedBoard:
+
+    def setup_method(self):
+        self.board = SharedBoard()
+
+    def teardown_method(self):
+        self.board.close()
+
+    def test_read_written_game_state(self):
+        game_state = create_game_state(['*1 ', ' 2 '])
+        game_state.get_bot(2).is_alive = False
+        read = read_game_state(self.board.write(game_state))
+        assert (read.get_plan_width(), read.get_plan_height()) == (3, 2)
+        assert bytes(read.get_grid()) == bytes(game_state.get_grid())
+        assert read.get_live_bot_ids() == {1}
+        assert read.get_bot_location(1) == Point(1, 0)
+        assert read.get_bot_location(2) == Point(1, 1)
+
+    def test_overwritten_board_is_not_read(self):
+        descriptor = self.board.write(create_game_state(['1 2']))
+        self.board.write(create_game_state(['12 ']))
+        assert read_game_state(descriptor) is None
+
+    def test_grows_for_bigger_plans(self):
+        self.board.write(create_game_state(['1 2']))
+        game_state = create_game_state(['1   ', '  23', '    '])
+        read = read_game_state(self.board.write(game_state))
+        assert bytes(read.get_grid()) == bytes(game_state.get_grid())
+        assert read.get_bot_location(3) == Point(3, 1)
+
+    def test_read_in_worker_process(self):
+        descriptor = self.board.write(create_game_state(['1 2 3']))
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            assert executor.submit(_read_live_bots, descriptor).result() == [1, 2, 3]
+
+    def test_workers_leave_the_block_to_the_writer(self):
+        # the workers are started before the writer's resource tracker, so they get trackers of their own
+        script = textwrap.dedent("""
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            from suitebot.game.shared_board import SharedBoard, read_game_state
+            from game_plans import create_game_state
+
+            def read_live_bots(descriptor):
+                return sorted(read_game_state(descriptor).get_live_bot_ids())
+
+            if __name__ == '__main__':
+                with ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context('fork')) as executor:
+                    executor.submit(abs, 0).result()
+                    board = SharedBoard()
+                    descriptor = board.write(create_game_state(['1 2']))
+                    assert list(executor.map(read_live_bots, [descriptor] * 4)) == [[1, 2]] * 4
+                    board.close()
+        """)
+        test_dir = os.path.dirname(os.path.abspath(__file__))
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([os.path.dirname(test_dir), test_dir]))
+        completed = subprocess.run([sys.executable, '-c', script], env=env, stderr=subprocess.PIPE, timeout=30)
+        assert completed.returncode == 0
+        assert completed.stderr == b''
@@ -0,0 +1,43 @@
+from suitebot.server.stats import LatencyHistogram, ServerStats, TOTAL_PHASE, PARSE_PHASE
+
+
+class TestLatencyHistogram:
+
+    def test_empty(self):
+        histogram = LatencyHistogram()
+        assert histogram.get_count() == 0
+        assert histogram.percentile(50) == 0.0
+
+    def test_percentiles_should_be_within_bucket_precision(self):
+        histogram = LatencyHistogram()
+        for ms in range(1, 101):
+            histogram.record(ms / 1000)
+        assert histogram.get_count() == 100
+        assert histogram.get_max() == 0.1
+        assert 0.050 <= histogram.percentile(50) <= 0.050 * 1.2
+        assert 0.095 <= histogram.percentile(95) <= 0.1
+        assert histogram.percentile(100) == 0.1
+
+    def test_should_accept_extreme_latencies(self):
+        histogram = LatencyHistogram()
+        histogram.record(0.0)
+        histogram.record(1e6)
+        assert histogram.get_count() == 2
+        assert histogram.percentile(100) == 1e6
+
+
+class TestServerStats:
+
+    def test_should_count_requests_errors_and_phases(self):
+        stats = ServerStats()
+        stats.record_request('MOVE', 0.01)
+        stats.record_request('MOVE', 0.02)
+        stats.record_latency('MOVE', PARSE_PHASE, 0.001)
+        stats.record_error('MOVE')
+
+        move_stats = stats.to_dict()['MOVE']
+        assert move_stats['count'] == 2
+        assert move_stats['errors'] == 1
+        assert move_stats['latency'][TOTAL_PHASE]['count'] == 2
+        assert move_stats['latency'][TOTAL_PHASE]['max'] == 20.0
+        assert set(move_stats['latency'][PARSE_PHASE]) == {'count', 'p50', 'p95', 'p99', 'max'}
@@ -0,0 +1,100 @@
+import pytest
+
+from suitebot import json_util
+from suitebot.referee import GameResult
+from suitebot.tournament import GameJob, GameSettings, Standings, INITIAL_RATING, parse_spec, create_ai, schedule, \
+    wilson_interval, run
+
+
+class TestSpecs:
+
+    def test_parse_spec(self):
+        assert parse_spec('airbot') == ('airbot', {})
+        assert parse_spec('search:max_depth=3, transposition_table=None') == \
+            ('search', {'max_depth': 3, 'transposition_table': None})
+        with pytest.raises(ValueError):
+            parse_spec('search:3')
+
+    def test_create_ai(self):
+        assert create_ai('search:max_depth=1').get_name() == 'Searchbot'
+        with pytest.raises(ValueError):
+            create_ai('nobot')
+
+    def test_create_ai_passes_seed_if_taken(self):
+        assert create_ai('mcts:workers=1', seed=5)._seed.random() == create_ai('mcts:workers=1', seed=5)._seed.random()
+        assert create_ai('mcts:workers=1,seed=6', seed=5)._seed.random() != \
+               create_ai('mcts:workers=1', seed=5)._seed.random()
+        assert create_ai('airbot', seed=5).get_name() == 'Airbot'
+
+    def test_create_ai_passes_workers_if_taken(self):
+        assert create_ai('mcts', workers=1)._workers == 1
+        assert create_ai('mcts:workers=1', workers=2)._workers == 1
+        assert create_ai('airbot', workers=1).get_name() == 'Airbot'
+
+
+class TestSchedule:
+
+    def test_same_seed_same_games(self):
+        assert schedule(3, 2, 12, 7, 10, 20, 0.1) == schedule(3, 2, 12, 7, 10, 20, 0.1)
+        assert schedule(3, 2, 12, 7, 10, 20, 0.1) != schedule(3, 2, 12, 8, 10, 20, 0.1)
+
+    def test_seats_are_balanced(self):
+        jobs = schedule(3, 2, 12, 7, 10, 20, 0.1)
+        for entrant in range(3):
+            assert sum(1 for job in jobs if job.entrants[0] == entrant) == 4
+            assert sum(1 for job in jobs if job.entrants[1] == entrant) == 4
+        assert all(10 <= job.width <= 20 and 10 <= job.height <= 20 for job in jobs)
+
+    def test_needs_enough_entrants(self):
+        with pytest.raises(ValueError):
+            schedule(1, 2, 1, 7, 10, 20, 0.1)
+
+
+class TestWilsonInterval:
+
+    def test_interval(self):
+        low, high = wilson_interval(50, 100)
+        assert low == pytest.approx(0.4038, abs=1e-4)
+        assert high == pytest.approx(0.5962, abs=1e-4)
+
+    def test_extremes(self):
+        assert wilson_interval(0, 0) == (0.0, 1.0)
+        low, high = wilson_interval(10, 10)
+        assert 0.6 < low < 1.0 and high == 1.0
+
+
+class TestStandings:
+
+    def _result(self, winner, death_rounds, rounds=10):
+        return GameResult(rounds, winner, death_rounds, {bot_id: [0.001] for bot_id in death_rounds})
+
+    def test_win_loss_and_draw(self):
+        standings = Standings(['a', 'b'])
+        standings.record(GameJob(0, 0, (0, 1), 10, 10, 0.0), self._result(1, {1: None, 2: 10}))
+        standings.record(GameJob(1, 0, (1, 0), 10, 10, 0.0), self._result(None, {1: 10, 2: 10}))
+        a, b = standings.entrants
+        assert (a.wins, a.draws, a.losses) == (1, 1, 0)
+        assert (b.wins, b.draws, b.losses) == (0, 1, 1)
+        assert a.get_score() == 0.75
+        assert a.rating > INITIAL_RATING > b.rating
+        assert a.rating + b.rating == pytest.approx(2 * INITIAL_RATING)
+        assert a.latencies.get_count() == 2
+
+    def test_survivors_of_unfinished_game_draw(self):
+        standings = Standings(['a', 'b', 'c'])
+        standings.record(GameJob(0, 0, (0, 1, 2), 10, 10, 0.0), self._result(None, {1: None, 2: 3, 3: None}))
+        a, b, c = standings.entrants
+        assert (a.draws, b.losses, c.draws) == (1, 1, 1)
+        assert a.rating == c.rating > b.rating
+
+
+class TestRun:
+
+    def test_games_are_reproducible(self):
+        settings = GameSettings(specs=('airbot', 'search:max_depth=1'), time_budget=None, max_rounds=20,
+                                request_format=json_util.SUITEBOT_FORMAT)
+        jobs = schedule(2, 2, 2, 3, 8, 10, 0.1)
+        first = [result.death_rounds for (job, result) in run(settings, jobs)]
+        second = [result.death_rounds for (job, result) in run(settings, jobs)]
+        assert first == second
+        assert len(first) == 2
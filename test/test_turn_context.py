@@ -0,0 +1,49 @@
+from suitebot.ai.turn_context import TurnContext
+from suitebot.game.direction import UP, DOWN, LEFT, RIGHT
+from suitebot.game.move import Move
+
+from game_plans import create_game_state
+
+
+GAME_PLAN = [
+    '*    ',
+    ' 1   ',
+    '    2',
+]
+
+
+class TestTurnContext:
+
+    def test_heads(self):
+        context = TurnContext(1, create_game_state(GAME_PLAN))
+        assert context.head == 1 * 5 + 1
+        assert context.live_bot_ids == {1, 2}
+        assert context.enemy_heads() == {2 * 5 + 4}
+
+    def test_dead_bot(self):
+        game_state = create_game_state(GAME_PLAN)
+        game_state.get_bot(1).is_alive = False
+        context = TurnContext(1, game_state)
+        assert context.is_dead()
+        assert TurnContext(2, game_state).enemy_heads() == frozenset()
+
+    def test_enemy_zone_wraps_around(self):
+        context = TurnContext(1, create_game_state(GAME_PLAN))
+        assert context.enemy_zone() == {1 * 5 + 4, 0 * 5 + 4, 2 * 5 + 3, 2 * 5 + 0}
+
+    def test_destinations(self):
+        context = TurnContext(1, create_game_state(GAME_PLAN))
+        assert context.destinations(Move(UP)) == (0 * 5 + 1,)
+        assert context.destinations(Move(RIGHT, DOWN)) == (1 * 5 + 2, 2 * 5 + 2)
+        assert context.destination(Move(LEFT, LEFT)) == 1 * 5 + 4
+        assert context.destinations(Move(UP)) is context.destinations(Move(UP))
+
+    def test_blocked_neighbor_count(self):
+        context = TurnContext(1, create_game_state(GAME_PLAN))
+        # the wall above and the bot 1 below
+        assert context.blocked_neighbor_count(0 * 5 + 1) == 2
+        assert context.blocked_neighbor_count(0 * 5 + 3) == 0
+
+    def test_chambers_are_computed_once(self):
+        context = TurnContext(1, create_game_state(GAME_PLAN))
+        assert context.chambers() is context.chambers()